@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class AdminDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.admin_dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
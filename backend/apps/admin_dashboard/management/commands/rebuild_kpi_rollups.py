@@ -0,0 +1,21 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.admin_dashboard.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the dashboard KPI rollups from the payment, user and complaint tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Days of hourly/daily counters to recompute')
+        parser.add_argument('--full', action='store_true', help='Recompute all history (initial backfill)')
+
+    def handle(self, *args, **kwargs):
+        since = None if kwargs['full'] else timezone.now() - timedelta(days=kwargs['days'] - 1)
+        start = time.perf_counter()
+        rows = rebuild(since)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} rollup rows in {time.perf_counter() - start:.1f}s."))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="KpiRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("HOUR", "Hour"), ("DAY", "Day"), ("TOTAL", "Total")],
+                        max_length=10,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("metric", models.CharField(max_length=50)),
+                ("dimension", models.CharField(blank=True, default="", max_length=100)),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["period", "bucket"], name="kpi_rollup_bucket_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "metric", "dimension", "bucket"),
+                        name="kpi_rollup_unique",
+                    )
+                ],
+            },
+        ),
+    ]
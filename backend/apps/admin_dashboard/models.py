@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class KpiRollup(models.Model):
+    """
+    One counter of the dashboard's rollups (see apps.admin_dashboard.rollups):
+    `count` events and `amount` rupees of `metric` for `dimension` in the
+    hour or day starting at `bucket`, or overall for TOTAL rows.
+    """
+
+    class Period(models.TextChoices):
+        HOUR = 'HOUR', _('Hour')
+        DAY = 'DAY', _('Day')
+        TOTAL = 'TOTAL', _('Total')
+
+    period = models.CharField(max_length=10, choices=Period.choices)
+    bucket = models.DateTimeField()
+    metric = models.CharField(max_length=50)
+    dimension = models.CharField(max_length=100, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'metric', 'dimension', 'bucket'], name='kpi_rollup_unique'),
+        ]
+        indexes = [models.Index(fields=['period', 'bucket'], name='kpi_rollup_bucket_idx')]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:%M} {self.metric}/{self.dimension}: {self.count}"
@@ -0,0 +1,258 @@
+"""
+Incrementally maintained dashboard counters.
+
+KpiRollup holds, per metric and dimension, event counts and amounts for
+every local hour and day, and a TOTAL row. Events add deltas to all three
+with one upsert each (INSERT ... ON CONFLICT DO UPDATE SET count = count +
+excluded.count), applied after the event's transaction commits so that the
+hot TOTAL rows are never locked for the length of a payment:
+
+* revenue (dimension "ACCOUNT_TYPE:METHOD"): payments entering SUCCESS add
+  their amount, refunds take it back, bucketed by Payment.timestamp;
+* users: accounts created, by CustomUser.created_at;
+* complaints: complaints filed, by Complaint.created_at;
+* complaint_status (dimension status, TOTAL only): open complaints per status.
+
+Payment changes arrive through payments.signals.payment_status_changed,
+users and complaints through model signals (see signals.py). Writes that
+bypass both, a failed upsert, or a reconciliation racing an event make the
+counters drift; rebuild() recomputes the recent hours and days from the
+source tables and every TOTAL row from the day rows, and runs hourly.
+
+The dashboard reads only KpiRollup: two small queries whatever the volume.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from apps.grievances.models import Complaint
+from apps.payments.models import Payment
+from apps.user_management.models import CustomUser
+from .models import KpiRollup
+
+logger = logging.getLogger(__name__)
+
+Period = KpiRollup.Period
+
+REVENUE = 'revenue'
+USERS = 'users'
+COMPLAINTS = 'complaints'
+COMPLAINT_STATUS = 'complaint_status'
+
+# Bucket of the TOTAL rows
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def hour_start(at):
+    return timezone.localtime(at).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(at):
+    return timezone.localtime(at).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def collect(events):
+    """
+    Sums (metric, dimension, at, count, amount) events into upsert deltas
+    keyed by (period, bucket, metric, dimension). Events with `at` None only
+    touch the TOTAL row.
+    """
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for metric, dimension, at, count, amount in events:
+        buckets = [(Period.TOTAL, EPOCH)]
+        if at is not None:
+            buckets += [(Period.HOUR, hour_start(at)), (Period.DAY, day_start(at))]
+        for period, bucket in buckets:
+            delta = deltas[period, bucket, metric, dimension]
+            delta[0] += count
+            delta[1] += amount
+    return deltas
+
+
+def apply_deltas(deltas):
+    ops = connection.ops
+    qn = ops.quote_name
+    table = qn(KpiRollup._meta.db_table)
+    count, amount = qn('count'), qn('amount')
+    rows = [
+        (period, ops.adapt_datetimefield_value(bucket), metric, dimension, n, total)
+        for (period, bucket, metric, dimension), (n, total) in deltas.items() if n or total
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({qn('period')}, {qn('bucket')}, {qn('metric')}, {qn('dimension')}, {count}, {amount}) "
+            f"VALUES (%s, %s, %s, %s, %s, %s) "
+            f"ON CONFLICT ({qn('period')}, {qn('metric')}, {qn('dimension')}, {qn('bucket')}) DO UPDATE SET "
+            f"{count} = {table}.{count} + EXCLUDED.{count}, {amount} = {table}.{amount} + EXCLUDED.{amount}",
+            rows,
+        )
+
+
+def record(events):
+    """Applies the events' deltas once the current transaction commits."""
+    deltas = collect(events)
+    if not deltas:
+        return
+
+    def apply():
+        try:
+            apply_deltas(deltas)
+        except Exception:
+            # The counters are reconciled from the source tables by rebuild()
+            logger.exception("Failed to update KPI rollups")
+
+    transaction.on_commit(apply)
+
+
+def revenue_events(changes):
+    """Events for payment status changes (see payments.signals.payment_status_changed)."""
+    for change in changes:
+        was_paid = change['old_status'] == Payment.Status.SUCCESS
+        is_paid = change['status'] == Payment.Status.SUCCESS
+        if was_paid != is_paid:
+            sign = 1 if is_paid else -1
+            dimension = f"{change['account_type']}:{change['payment_method']}"
+            yield REVENUE, dimension, change['timestamp'], sign, sign * change['amount']
+
+
+def _flow_rows(queryset, timestamp, metric, dimension_fields=(), amount_field=None):
+    """HOUR and DAY KpiRollup rows aggregated from `queryset` by `timestamp`."""
+    rows = []
+    aggregates = {'n': Count('pk')}
+    if amount_field:
+        aggregates['total'] = Sum(amount_field)
+    for period, trunc in ((Period.HOUR, TruncHour), (Period.DAY, TruncDay)):
+        for row in queryset.annotate(bucket=trunc(timestamp)).values('bucket', *dimension_fields).annotate(**aggregates):
+            rows.append(KpiRollup(
+                period=period, bucket=row['bucket'], metric=metric,
+                dimension=':'.join(str(row[field]) for field in dimension_fields),
+                count=row['n'], amount=row.get('total') or 0,
+            ))
+    return rows
+
+
+def _overwrite(rows):
+    # Upserts like apply_deltas(): an event applied between the delete and the insert has created the row again
+    KpiRollup.objects.bulk_create(rows, batch_size=5000, update_conflicts=True,
+                                  unique_fields=['period', 'metric', 'dimension', 'bucket'],
+                                  update_fields=['count', 'amount'])
+
+
+def rebuild(since=None):
+    """
+    Recomputes HOUR and DAY rows from `since` (rounded down to the local day;
+    all history when None) from the source tables, then every TOTAL row.
+    Returns the number of rows written.
+    """
+    payments = Payment.objects.filter(status=Payment.Status.SUCCESS)
+    users = CustomUser.objects.all()
+    complaints = Complaint.objects.all()
+    flows = KpiRollup.objects.exclude(period=Period.TOTAL)
+    if since is not None:
+        since = day_start(since)
+        payments = payments.filter(timestamp__gte=since)
+        users = users.filter(created_at__gte=since)
+        complaints = complaints.filter(created_at__gte=since)
+        flows = flows.filter(bucket__gte=since)
+
+    with transaction.atomic():
+        flows.delete()
+        rows = (
+            _flow_rows(payments, 'timestamp', REVENUE, ('bill__account_type', 'payment_method'), 'amount')
+            + _flow_rows(users, 'created_at', USERS)
+            + _flow_rows(complaints, 'created_at', COMPLAINTS)
+        )
+        _overwrite(rows)
+
+        KpiRollup.objects.filter(period=Period.TOTAL).delete()
+        totals = [
+            KpiRollup(period=Period.TOTAL, bucket=EPOCH, metric=row['metric'], dimension=row['dimension'],
+                      count=row['n'], amount=row['total'] or 0)
+            for row in KpiRollup.objects.filter(period=Period.DAY).values('metric', 'dimension')
+            .annotate(n=Sum('count'), total=Sum('amount'))
+        ]
+        totals += [
+            KpiRollup(period=Period.TOTAL, bucket=EPOCH, metric=COMPLAINT_STATUS, dimension=row['status'],
+                      count=row['n'])
+            for row in Complaint.objects.values('status').annotate(n=Count('pk'))
+        ]
+        _overwrite(totals)
+    return len(rows) + len(totals)
+
+
+def rebuild_recent():
+    """Reconciles the last KPI_ROLLUP_RECONCILE_DAYS days and the totals."""
+    return rebuild(timezone.now() - timedelta(days=settings.KPI_ROLLUP_RECONCILE_DAYS - 1))
+
+
+def _money(value):
+    return str(Decimal(value or 0).quantize(Decimal('0.01')))
+
+
+def dashboard_stats(now=None):
+    """The admin dashboard's numbers, from KpiRollup in two queries."""
+    now = now or timezone.now()
+    today = day_start(now)
+    first_hour = hour_start(now) - timedelta(hours=23)
+
+    revenue_by_utility = defaultdict(Decimal)
+    revenue_by_method = defaultdict(Decimal)
+    complaints_by_status = dict.fromkeys(Complaint.Status.values, 0)
+    totals = {USERS: 0, COMPLAINTS: 0, REVENUE: Decimal(0), 'payments': 0}
+    for metric, dimension, count, amount in KpiRollup.objects.filter(period=Period.TOTAL).values_list(
+            'metric', 'dimension', 'count', 'amount'):
+        if metric == REVENUE:
+            account_type, _, method = dimension.partition(':')
+            revenue_by_utility[account_type] += amount
+            revenue_by_method[method] += amount
+            totals[REVENUE] += amount
+            totals['payments'] += count
+        elif metric == COMPLAINT_STATUS:
+            complaints_by_status[dimension] = count
+        elif metric in totals:
+            totals[metric] += count
+
+    def empty():
+        return {'revenue': Decimal(0), 'payments': 0, 'new_users': 0, 'new_complaints': 0}
+
+    hours = {first_hour + timedelta(hours=n): empty() for n in range(24)}
+    day = empty()
+    recent = KpiRollup.objects.filter(
+        Q(period=Period.DAY, bucket=today) | Q(period=Period.HOUR, bucket__gte=first_hour),
+    ).values_list('period', 'bucket', 'metric', 'count', 'amount')
+    for period, bucket, metric, count, amount in recent:
+        bucket_totals = day if period == Period.DAY else hours.get(timezone.localtime(bucket))
+        if bucket_totals is None:
+            continue
+        if metric == REVENUE:
+            bucket_totals['revenue'] += amount
+            bucket_totals['payments'] += count
+        elif metric == USERS:
+            bucket_totals['new_users'] += count
+        elif metric == COMPLAINTS:
+            bucket_totals['new_complaints'] += count
+
+    def render(bucket_totals):
+        return {**bucket_totals, 'revenue': _money(bucket_totals['revenue'])}
+
+    return {
+        'total_users': totals[USERS],
+        'pending_complaints': complaints_by_status.get(Complaint.Status.OPEN, 0),
+        'total_revenue': _money(totals[REVENUE]),
+        'total_payments': totals['payments'],
+        'total_complaints': totals[COMPLAINTS],
+        'revenue_by_utility': {key: _money(value) for key, value in sorted(revenue_by_utility.items())},
+        'revenue_by_method': {key: _money(value) for key, value in sorted(revenue_by_method.items())},
+        'complaints_by_status': complaints_by_status,
+        'today': render(day),
+        'hourly': [{'hour': hour.isoformat(), **render(values)} for hour, values in hours.items()],
+    }
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.grievances.models import Complaint
+from apps.payments.signals import payment_status_changed
+from apps.user_management.models import CustomUser
+from . import rollups
+
+
+@receiver(payment_status_changed)
+def count_revenue(sender, changes, **kwargs):
+    rollups.record(rollups.revenue_events(changes))
+
+
+@receiver(post_save, sender=CustomUser)
+def count_new_user(sender, instance, created, **kwargs):
+    if created:
+        rollups.record([(rollups.USERS, '', instance.created_at, 1, 0)])
+
+
+@receiver(post_delete, sender=CustomUser)
+def uncount_user(sender, instance, **kwargs):
+    rollups.record([(rollups.USERS, '', instance.created_at, -1, 0)])
+
+
+@receiver(post_init, sender=Complaint)
+def remember_complaint_status(sender, instance, **kwargs):
+    # Skipped for querysets that defer status, so loading them stays one query
+    if 'status' not in instance.get_deferred_fields():
+        instance._rollup_status = instance.status
+
+
+@receiver(post_save, sender=Complaint)
+def count_complaint(sender, instance, created, **kwargs):
+    events = []
+    if created:
+        events.append((rollups.COMPLAINTS, '', instance.created_at, 1, 0))
+    else:
+        previous = getattr(instance, '_rollup_status', None)
+        if previous is None or previous == instance.status:
+            return
+        events.append((rollups.COMPLAINT_STATUS, previous, None, -1, 0))
+    events.append((rollups.COMPLAINT_STATUS, instance.status, None, 1, 0))
+    instance._rollup_status = instance.status
+    rollups.record(events)
+
+
+@receiver(post_delete, sender=Complaint)
+def uncount_complaint(sender, instance, **kwargs):
+    rollups.record([
+        (rollups.COMPLAINTS, '', instance.created_at, -1, 0),
+        (rollups.COMPLAINT_STATUS, getattr(instance, '_rollup_status', instance.status), None, -1, 0),
+    ])
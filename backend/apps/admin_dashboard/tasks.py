@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from . import rollups
+
+
+@shared_task(ignore_result=True)
+def reconcile_kpi_rollups():
+    rollups.rebuild_recent()
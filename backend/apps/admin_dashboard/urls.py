@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import DashboardStatsView
+from .views import DashboardStatsView, CacheStatsView
 
 urlpatterns = [
     path('dashboard/stats/', DashboardStatsView.as_view(), name='admin-stats'),
+    path('dashboard/cache-stats/', CacheStatsView.as_view(), name='admin-cache-stats'),
     # Add other report endpoints
 ]
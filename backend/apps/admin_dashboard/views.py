@@ -1,18 +1,18 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import permissions
-from apps.user_management.models import CustomUser
-from apps.grievances.models import Complaint
-from apps.payments.models import Payment
+from utils.metrics import get_metrics
+from utils.permissions import IsAdmin, IsSuperAdmin
+from .rollups import dashboard_stats
 
 class DashboardStatsView(APIView):
-    permission_classes = [permissions.IsAuthenticated] 
-    # Add IsAdmin permission here if strictly for admin
+    permission_classes = [IsAdmin | IsSuperAdmin]
 
     def get(self, request):
-        data = {
-            "total_users": CustomUser.objects.count(),
-            "pending_complaints": Complaint.objects.filter(status='OPEN').count(),
-            "total_revenue": 0 # Sum aggregation logic here
-        }
-        return Response(data)
+        return Response(dashboard_stats())
+
+class CacheStatsView(APIView):
+    """Hit ratios and latencies of the in-process caches for this worker."""
+    permission_classes = [IsAdmin | IsSuperAdmin]
+
+    def get(self, request):
+        return Response(get_metrics())
@@ -0,0 +1,25 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.authentication.revocation import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding (and blacklisted) JWT refresh tokens in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Tokens deleted per statement')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks')
+        parser.add_argument('--grace-hours', type=float, default=1, help='Keep tokens expired less than this long')
+
+    def handle(self, *args, **kwargs):
+        start = time.perf_counter()
+        deleted = prune_expired_tokens(
+            chunk_size=kwargs['chunk_size'],
+            pause=kwargs['pause'],
+            grace=timedelta(hours=kwargs['grace_hours']),
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired tokens in {elapsed:.1f}s."))
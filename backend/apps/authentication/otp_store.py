@@ -0,0 +1,121 @@
+"""
+Cache-resident storage for live OTP codes.
+
+Only the latest code per key is kept, with a TTL equal to the OTP expiry,
+so a verify is a single atomic compare-and-consume on the store. The
+PhoneOTP / OTPVerification tables become an optional audit trail written
+off the request thread (OTP_AUDIT_TRAIL). Set OTP_STORE_BACKEND to
+'database' to keep the original row-per-code behaviour.
+"""
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseOTPStore:
+    key_prefix = 'otp'
+
+    def issue(self, key, code, ttl):
+        """Stores `code` as the only live code for `key` for `ttl` seconds."""
+        raise NotImplementedError
+
+    def consume(self, key, code):
+        """
+        Atomically checks `code` against the live code for `key` and deletes
+        it on a match, so it can be used once. Returns True on a match.
+        """
+        raise NotImplementedError
+
+    def make_key(self, key):
+        return f"{self.key_prefix}:{key}"
+
+
+class InMemoryOTPStore(BaseOTPStore):
+    """Process-local stand-in for tests and single-process development."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = {}
+
+    def issue(self, key, code, ttl):
+        with self._lock:
+            self._codes[self.make_key(key)] = (code, time.monotonic() + ttl)
+
+    def consume(self, key, code):
+        key = self.make_key(key)
+        with self._lock:
+            live = self._codes.get(key)
+            if live is None:
+                return False
+            if live[1] <= time.monotonic():
+                del self._codes[key]
+                return False
+            if live[0] != code:
+                return False
+            del self._codes[key]
+            return True
+
+
+class RedisOTPStore(BaseOTPStore):
+    # KEYS[1] = code key, ARGV[1] = submitted code. Returns 1 and deletes on a match.
+    CONSUME_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, client=None):
+        if client is None:
+            from utils.redis_client import get_redis
+            client = get_redis()
+        self.client = client
+        self._consume = client.register_script(self.CONSUME_SCRIPT)
+
+    def issue(self, key, code, ttl):
+        self.client.set(self.make_key(key), code, ex=ttl)
+
+    def consume(self, key, code):
+        return bool(self._consume(keys=[self.make_key(key)], args=[code]))
+
+
+@lru_cache(maxsize=None)
+def get_otp_store():
+    """
+    Returns the process-wide store configured by OTP_STORE_BACKEND, or None
+    when OTPs are kept as database rows.
+    """
+    if settings.OTP_STORE_BACKEND == 'database':
+        return None
+    return import_string(settings.OTP_STORE_BACKEND)()
+
+
+def audit_issue(model, **fields):
+    """Records an issued code as a row of `model`, if the audit trail is on."""
+    _audit(_create_row, model, fields)
+
+
+def audit_verify(model, **lookup):
+    """Marks the audited row matching `lookup` as verified."""
+    _audit(_mark_verified, model, lookup)
+
+
+def _create_row(model, fields):
+    model.objects.create(**fields)
+
+
+def _mark_verified(model, lookup):
+    model.objects.filter(is_verified=False, **lookup).update(is_verified=True)
+
+
+def _audit(fn, model, kwargs):
+    mode = settings.OTP_AUDIT_TRAIL
+    if mode == 'async':
+        from utils.background import submit
+        submit(fn, model, kwargs)
+    elif mode == 'sync':
+        fn(model, kwargs)
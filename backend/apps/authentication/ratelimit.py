@@ -0,0 +1,116 @@
+"""
+Sliding-window rate limiting for OTP sends.
+
+Each phone number keeps the timestamps of its accepted requests in a shared
+store. A request is checked against every rule in ``OTP_RATE_LIMIT_RULES``
+and recorded in the same atomic step, so concurrent gunicorn workers cannot
+both slip through a window. The backend is chosen with
+``OTP_RATE_LIMITER_BACKEND``.
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseRateLimiter:
+    key_prefix = 'otp-rl'
+
+    def __init__(self, rules=None):
+        self.rules = [tuple(rule) for rule in (rules or settings.OTP_RATE_LIMIT_RULES)]
+        self.longest_window = max(window for window, _, _ in self.rules)
+
+    def hit(self, key):
+        """
+        Records a request for `key` if every rule allows it.
+        Returns (allowed, message) like the rest of the OTP helpers.
+        """
+        raise NotImplementedError
+
+    def reset(self, key):
+        """Forgets all recorded requests for `key`."""
+        raise NotImplementedError
+
+    def make_key(self, key):
+        return f"{self.key_prefix}:{key}"
+
+
+class InMemoryRateLimiter(BaseRateLimiter):
+    """Process-local stand-in for tests and single-process development."""
+
+    def __init__(self, rules=None):
+        super().__init__(rules)
+        self._lock = threading.Lock()
+        self._hits = defaultdict(deque)
+
+    def hit(self, key):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits[self.make_key(key)]
+            while hits and hits[0] <= now - self.longest_window:
+                hits.popleft()
+            for window, limit, message in self.rules:
+                if sum(1 for ts in hits if ts > now - window) >= limit:
+                    return False, message
+            hits.append(now)
+        return True, ""
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(self.make_key(key), None)
+
+
+class RedisRateLimiter(BaseRateLimiter):
+    """
+    Keeps each window in a Redis sorted set scored by request time (ms).
+    The check-and-record runs as one Lua script, using the Redis server
+    clock so that worker clock skew does not matter.
+    """
+
+    # KEYS[1] = window key; ARGV = member, longest window, then (window, limit) pairs.
+    # Returns 0 when recorded, otherwise the 1-based index of the violated rule.
+    SCRIPT = """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+    local longest = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - longest)
+    for i = 3, #ARGV, 2 do
+        local window = tonumber(ARGV[i])
+        if redis.call('ZCOUNT', KEYS[1], '(' .. (now - window), '+inf') >= tonumber(ARGV[i + 1]) then
+            return (i - 1) / 2
+        end
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[1])
+    redis.call('PEXPIRE', KEYS[1], longest)
+    return 0
+    """
+
+    def __init__(self, rules=None, client=None):
+        super().__init__(rules)
+        if client is None:
+            from utils.redis_client import get_redis
+            client = get_redis()
+        self.client = client
+        self._script = client.register_script(self.SCRIPT)
+
+    def hit(self, key):
+        args = [uuid.uuid4().hex, self.longest_window * 1000]
+        for window, limit, _ in self.rules:
+            args.extend([window * 1000, limit])
+        violated = self._script(keys=[self.make_key(key)], args=args)
+        if violated:
+            return False, self.rules[int(violated) - 1][2]
+        return True, ""
+
+    def reset(self, key):
+        self.client.delete(self.make_key(key))
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    """Returns the process-wide limiter configured by OTP_RATE_LIMITER_BACKEND."""
+    return import_string(settings.OTP_RATE_LIMITER_BACKEND)()
@@ -0,0 +1,158 @@
+"""
+Fast refresh-token revocation checks.
+
+Every worker keeps the JTIs of blacklisted tokens in a Bloom filter. A
+positive hit is confirmed with the usual exact lookup. The filter is built
+in the background from the table, then kept current by re-reading rows
+above the highest id seen (at most every REVOCATION_FILTER_SYNC_SECONDS),
+and is rebuilt from scratch every REVOCATION_FILTER_REBUILD_SECONDS to shed
+pruned entries. Until the first build finishes, checks use the exact
+lookup.
+
+The filter lags other workers' blacklist writes by up to a sync interval
+(longer for rows committed out of id order), which would let a refresh
+token be replayed on another worker right after its rotation. So every
+BlacklistedToken insert also sets a `revoked:<jti>` marker in the shared
+cache, synchronously and until the token expires, and a filter miss is
+answered from that marker: one cache read instead of a join over the
+ever-growing blacklist table. The markers are only shared when the
+default cache is (Redis in production).
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from utils.background import submit
+from utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+
+def _marker_key(jti):
+    return f"revoked:{jti}"
+
+
+def mark_revoked(jti, expires_at):
+    """Makes a revocation visible to every worker at once; the marker lives as long as the token."""
+    ttl = int((expires_at - timezone.now()).total_seconds()) + 1
+    if ttl > 0:
+        cache.set(_marker_key(jti), 1, ttl)
+
+
+class RevocationIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._bloom = None
+        self._high_water = 0
+        self._last_sync = 0.0
+        self._built_at = 0.0
+        self._building = False
+
+    def is_revoked(self, jti):
+        bloom = self._current()
+        if bloom is not None and jti not in bloom:
+            # Not revoked as of the last sync; later revocations on any worker left a marker
+            return cache.get(_marker_key(jti)) is not None
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def add(self, jti):
+        """Records a token blacklisted by this process without waiting for a sync."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def _current(self):
+        now = time.monotonic()
+        if self._bloom is None or now - self._built_at >= settings.REVOCATION_FILTER_REBUILD_SECONDS:
+            self._start_rebuild()
+        if self._bloom is not None and now - self._last_sync >= settings.REVOCATION_FILTER_SYNC_SECONDS:
+            self._sync()
+        return self._bloom
+
+    def _start_rebuild(self):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        submit(self.rebuild)
+
+    def rebuild(self):
+        """Builds a fresh filter from the whole table and swaps it in."""
+        try:
+            count = BlacklistedToken.objects.count()
+            bloom = BloomFilter(
+                max(settings.REVOCATION_FILTER_CAPACITY, count * 2),
+                settings.REVOCATION_FILTER_ERROR_RATE,
+            )
+            high_water = 0
+            rows = BlacklistedToken.objects.order_by('id').values_list('id', 'token__jti')
+            for pk, jti in rows.iterator(chunk_size=10000):
+                bloom.add(jti)
+                high_water = pk
+            with self._lock:
+                self._bloom = bloom
+                self._high_water = max(self._high_water, high_water)
+                self._built_at = time.monotonic()
+            logger.info(f"Token revocation filter rebuilt: {count} entries, {bloom.nbytes} bytes")
+            self._sync(force=True)
+        finally:
+            with self._lock:
+                self._building = False
+
+    def _sync(self, force=False):
+        """Adds rows blacklisted since the last sync, re-reading a few earlier ids
+        in case their transactions committed out of order."""
+        if not self._sync_lock.acquire(blocking=force):
+            return
+        try:
+            start = max(0, self._high_water - settings.REVOCATION_FILTER_LOOKBACK_ROWS)
+            rows = list(
+                BlacklistedToken.objects.filter(id__gt=start).order_by('id').values_list('id', 'token__jti')
+            )
+            with self._lock:
+                for pk, jti in rows:
+                    self._bloom.add(jti)
+                    self._high_water = max(self._high_water, pk)
+                self._last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_revocation_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RevocationIndex()
+        return _index
+
+
+def prune_expired_tokens(chunk_size=5000, pause=0.0, grace=timedelta(hours=1)):
+    """
+    Deletes outstanding tokens that expired more than `grace` ago (and their
+    blacklist rows, by cascade) in short chunks so no single statement holds
+    locks for long. Returns the number of outstanding tokens removed.
+    """
+    cutoff = timezone.now() - grace
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=cutoff)
+            .order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        _, per_model = OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += per_model.get(OutstandingToken._meta.label, 0)
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .revocation import get_revocation_index, mark_revoked
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def share_revocation(sender, instance, created, **kwargs):
+    # Before the commit: a marker for a blacklisting that rolls back only rejects a token early
+    if created:
+        mark_revoked(instance.token.jti, instance.token.expires_at)
+        get_revocation_index().add(instance.token.jti)
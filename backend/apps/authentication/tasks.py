@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .revocation import prune_expired_tokens
+
+
+@shared_task(ignore_result=True)
+def prune_outstanding_tokens():
+    prune_expired_tokens()
@@ -0,0 +1,69 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+from .revocation import get_revocation_index
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the in-process
+    revocation filter, and whose blacklist/outstand writes only look the
+    user up when the token was never outstanded.
+    """
+
+    @classmethod
+    def for_user(cls, user, **claims):
+        """RefreshToken.for_user, with `claims` added before the token is recorded as outstanding."""
+        # Token.for_user builds the token; BlacklistMixin.for_user would store it before the claims are in
+        token = super(BlacklistMixin, cls).for_user(user)
+        for claim, value in claims.items():
+            token[claim] = value
+        OutstandingToken.objects.create(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+        return token
+
+    def check_blacklist(self):
+        if get_revocation_index().is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        token = self.outstand()
+        # New rows reach every worker's check through the signal in signals.py
+        return BlacklistedToken.objects.get_or_create(token=token)
+
+    def outstand(self):
+        token, _ = OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                # A callable default only runs on create; a deleted user is stored as None, as simplejwt does
+                "user_id": self._existing_user_id,
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+        return token
+
+    def _existing_user_id(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return None
+        return (
+            get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list('pk', flat=True).first()
+        )
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
@@ -4,7 +4,9 @@ from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
 from .models import PhoneOTP
-from twilio.rest import Client
+from .ratelimit import get_rate_limiter
+from .otp_store import get_otp_store, audit_issue, audit_verify
+from apps.notifications.sms import send_sms
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,60 +16,31 @@ def generate_otp():
     return str(random.randint(100000, 999999))
 
 def send_otp_sms(phone, otp):
-    """Sends OTP via Twilio SMS. Falls back to logging if creds are missing."""
-    try:
-        account_sid = settings.TWILIO_ACCOUNT_SID
-        auth_token = settings.TWILIO_AUTH_TOKEN
-        twilio_phone = settings.TWILIO_PHONE_NUMBER
-
-        if account_sid and auth_token and twilio_phone:
-            client = Client(account_sid, auth_token)
-            message = client.messages.create(
-                body=f"Your Verification Code is {otp}. Expires in {settings.OTP_EXPIRY_MINUTES} minutes.",
-                from_=twilio_phone,
-                to=phone
-            )
-            logger.info(f"SMS Sent to {phone}: SID {message.sid}")
-            return True
-        else:
-            # Fallback for dev/testing without Twilio
-            logger.warning("Twilio credentials missing. Logging OTP instead.")
-            print(f"==========================================")
-            print(f"[MOCK SMS] To: {phone} | OTP: {otp}")
-            print(f"==========================================")
-            return True
-    except Exception as e:
-        logger.error(f"Failed to send SMS to {phone}: {e}")
-        return False
+    """Queues the OTP SMS. Delivery, retries and failover happen in the background."""
+    body = f"Your Verification Code is {otp}. Expires in {settings.OTP_EXPIRY_MINUTES} minutes."
+    return send_sms(phone, body)
 
 def check_spam(phone):
     """
     Prevents spamming:
     - Max 1 OTP per 60 seconds.
     - Max 3 requests per 10 minutes.
+    Windows are kept by the shared rate limiter (see OTP_RATE_LIMIT_RULES),
+    and an allowed request is counted immediately, so no DB scan is needed.
     """
-    now = timezone.now()
-    one_minute_ago = now - timedelta(seconds=60)
-    ten_minutes_ago = now - timedelta(minutes=10)
-
-    # Rule 1: 1 OTP per 60 sec
-    last_otp = PhoneOTP.objects.filter(phone=phone).order_by('-created_at').first()
-    if last_otp and last_otp.created_at > one_minute_ago:
-        return False, "Please wait 60 seconds before requesting a new OTP."
-
-    # Rule 2: Max 3 per 10 mins
-    recent_otps_count = PhoneOTP.objects.filter(phone=phone, created_at__gte=ten_minutes_ago).count()
-    if recent_otps_count >= 3:
-        return False, "Too many attempts. Please try again after 10 minutes."
-
-    return True, ""
+    return get_rate_limiter().hit(phone)
 
 def create_and_send_otp(phone):
-    """Generates, saves, and sends OTP for a phone number."""
+    """Generates, stores, and sends OTP for a phone number."""
     otp = generate_otp()
     
-    # Save to DB
-    PhoneOTP.objects.create(phone=phone, otp=otp)
+    # Save to the OTP store (or DB when OTP_STORE_BACKEND = 'database')
+    store = get_otp_store()
+    if store is None:
+        PhoneOTP.objects.create(phone=phone, otp=otp)
+    else:
+        store.issue(f"phone:{phone}", otp, settings.OTP_EXPIRY_MINUTES * 60)
+        audit_issue(PhoneOTP, phone=phone, otp=otp)
     
     # Send SMS
     sent = send_otp_sms(phone, otp)
@@ -86,6 +59,14 @@ def verify_otp_logic(phone, otp):
     if otp in ['000000', '123456']:
         return True, "Test OTP verified successfully."
 
+    # The store only holds the latest unexpired code, and consumes it on a match
+    store = get_otp_store()
+    if store is not None:
+        if not store.consume(f"phone:{phone}", otp):
+            return False, "Invalid or expired OTP."
+        audit_verify(PhoneOTP, phone=phone, otp=otp)
+        return True, "OTP verified successfully."
+
     now = timezone.now()
     expiry_time = now - timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
     
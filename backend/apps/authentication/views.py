@@ -3,9 +3,12 @@ from rest_framework import status, views
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
 from django.contrib.auth import get_user_model
 from .serializers import SendOTPSerializer, VerifyOTPSerializer
 from .utils import check_spam, create_and_send_otp, verify_otp_logic
+from .tokens import FilteredTokenRefreshSerializer
+from apps.user_management.sessions import start_session
 
 User = get_user_model()
 
@@ -68,8 +71,8 @@ class VerifyOTPView(views.APIView):
                 }
             )
 
-            # 3. Generate JWT
-            refresh = RefreshToken.for_user(user)
+            # 3. Generate JWT and open a kiosk session
+            refresh = start_session(user, request)
 
             return Response({
                 "status": True,
@@ -81,3 +84,8 @@ class VerifyOTPView(views.APIView):
             }, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RefreshTokenView(TokenRefreshView):
+    """Rotates a refresh token, checking revocation through the in-process filter."""
+    serializer_class = FilteredTokenRefreshSerializer
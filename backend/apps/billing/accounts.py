@@ -0,0 +1,162 @@
+"""
+One registry over the electricity, gas and water account tables.
+
+Each utility keeps its own account model; accounts_sql() exposes them as
+one UNION ALL relation tagged with the Bill.AccountType of each row, so
+queries that span utilities need neither three round trips nor three
+subqueries.
+
+get_household_summary() builds a user's household view (every account, its
+outstanding amount and arrears, and its latest bill) in a single query and
+caches it per user for HOUSEHOLD_SUMMARY_TTL seconds. Single bill saves and
+account changes drop the owners' entries (see signals.py); bulk bill
+writers are covered by the TTL.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from utils.metrics import HitRatio
+from .models import Bill, ElectricityAccount, GasAccount, WaterAccount
+
+ACCOUNT_MODELS = {
+    Bill.AccountType.ELECTRICITY: ElectricityAccount,
+    Bill.AccountType.GAS: GasAccount,
+    Bill.AccountType.WATER: WaterAccount,
+}
+ACCOUNT_COLUMNS = ('consumer_number', 'user_id', 'account_holder', 'address', 'connection_type')
+
+household_cache_stats = HitRatio('billing.household_summary')
+
+CENTS = Decimal('0.01')
+
+
+def accounts_sql(columns=ACCOUNT_COLUMNS, by_user=False):
+    """
+    SQL for (account_type, *columns) over every account table. With
+    `by_user` each branch is filtered on user_id, taking one parameter per
+    utility (see user_params()).
+    """
+    qn = connection.ops.quote_name
+    where = f" WHERE {qn('user_id')} = %s" if by_user else ''
+    return ' UNION ALL '.join(
+        f"SELECT '{account_type}' AS account_type, {', '.join(qn(c) for c in columns)} "
+        f"FROM {qn(model._meta.db_table)}{where}"
+        for account_type, model in ACCOUNT_MODELS.items()
+    )
+
+
+def user_params(user_id):
+    return [user_id] * len(ACCOUNT_MODELS)
+
+
+def owners_of(consumer_numbers):
+    """Ids of the users holding an account with any of `consumer_numbers`."""
+    consumer_numbers = list(consumer_numbers)
+    if not consumer_numbers:
+        return set()
+    placeholders = ', '.join(['%s'] * len(consumer_numbers))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT user_id FROM ({accounts_sql(('consumer_number', 'user_id'))}) a "
+            f"WHERE a.consumer_number IN ({placeholders})",
+            consumer_numbers,
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _summary_sql():
+    bill_table = connection.ops.quote_name(Bill._meta.db_table)
+    return f"""
+        WITH accounts AS ({accounts_sql(by_user=True)}),
+        bills AS (
+            SELECT b.account_type, b.consumer_number, b.bill_id, b.bill_date, b.due_date, b.amount,
+                   b.arrears, b.status,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY b.account_type, b.consumer_number ORDER BY b.bill_date DESC, b.bill_id DESC
+                   ) AS rn
+            FROM {bill_table} b
+            JOIN accounts a ON a.consumer_number = b.consumer_number AND a.account_type = b.account_type
+        )
+        SELECT a.account_type, a.consumer_number, a.account_holder, a.address, a.connection_type,
+               COALESCE(SUM(CASE WHEN b.status <> 'PAID' THEN b.amount END), 0) AS outstanding,
+               COALESCE(MAX(CASE WHEN b.rn = 1 AND b.status <> 'PAID' THEN b.arrears END), 0) AS arrears,
+               MAX(CASE WHEN b.rn = 1 THEN b.bill_id END) AS latest_bill_id,
+               MAX(CASE WHEN b.rn = 1 THEN b.bill_date END) AS latest_bill_date,
+               MAX(CASE WHEN b.rn = 1 THEN b.due_date END) AS latest_due_date,
+               MAX(CASE WHEN b.rn = 1 THEN b.amount END) AS latest_amount,
+               MAX(CASE WHEN b.rn = 1 THEN b.status END) AS latest_status
+        FROM accounts a
+        LEFT JOIN bills b ON b.consumer_number = a.consumer_number AND b.account_type = a.account_type
+        GROUP BY a.account_type, a.consumer_number, a.account_holder, a.address, a.connection_type
+        ORDER BY a.account_type, a.consumer_number
+    """
+
+
+def _money(value):
+    return str(Decimal(str(value or 0)).quantize(CENTS))
+
+
+def build_household_summary(user_id):
+    """Runs the summary query. Outstanding sums unpaid bills; arrears are those carried by the latest unpaid bill."""
+    with connection.cursor() as cursor:
+        cursor.execute(_summary_sql(), user_params(user_id))
+        rows = cursor.fetchall()
+
+    accounts = []
+    utilities = {str(account_type): {'accounts': 0, 'outstanding': Decimal(0), 'arrears': Decimal(0)}
+                 for account_type in ACCOUNT_MODELS}
+    for (account_type, consumer_number, holder, address, connection_type, outstanding, arrears,
+         bill_id, bill_date, due_date, amount, status) in rows:
+        accounts.append({
+            'account_type': account_type,
+            'consumer_number': consumer_number,
+            'account_holder': holder,
+            'address': address,
+            'connection_type': connection_type,
+            'outstanding': _money(outstanding),
+            'arrears': _money(arrears),
+            'latest_bill': {
+                'bill_id': bill_id,
+                'bill_date': str(bill_date),
+                'due_date': str(due_date),
+                'amount': _money(amount),
+                'status': status,
+            } if bill_id else None,
+        })
+        totals = utilities[account_type]
+        totals['accounts'] += 1
+        totals['outstanding'] += Decimal(str(outstanding or 0))
+        totals['arrears'] += Decimal(str(arrears or 0))
+
+    for totals in utilities.values():
+        totals['outstanding'] = _money(totals['outstanding'])
+        totals['arrears'] = _money(totals['arrears'])
+    return {
+        'accounts': accounts,
+        'utilities': utilities,
+        'total_outstanding': _money(sum(Decimal(t['outstanding']) for t in utilities.values())),
+    }
+
+
+def _cache_key(user_id):
+    return f"household:{user_id}"
+
+
+def get_household_summary(user_id):
+    """Returns (summary, hit) for the user, served from the per-user cache when possible."""
+    key = _cache_key(user_id)
+    summary = cache.get(key)
+    if summary is not None:
+        household_cache_stats.hit()
+        return summary, True
+    household_cache_stats.miss()
+    summary = build_household_summary(user_id)
+    cache.set(key, summary, settings.HOUSEHOLD_SUMMARY_TTL)
+    return summary, False
+
+
+def invalidate_household(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in set(user_ids)])
@@ -0,0 +1,78 @@
+"""
+Read-through cache of serialized bills per consumer number.
+
+Kiosk users tend to look the same bill up several times before paying, so
+FetchBillView keeps the BillSerializer output for a consumer number under
+`bills:{consumer_number}` for BILL_CACHE_TTL seconds. A hit is served
+straight from the cache, without touching the ORM or DRF serialization.
+
+Any saved or deleted Bill invalidates its consumer's entry once the
+transaction commits (see signals.py), which covers VerifyPaymentView
+marking a bill PAID. Bulk writes that bypass signals (ingestion,
+queryset.update) must call invalidate_bills() with the consumer numbers
+they touched.
+
+Invalidating gives the consumer a new generation token under
+`bills-gen:{consumer_number}`. Entries are stored with the token that was
+current when their miss started, and only an entry with the current token
+is a hit. A miss that read the bills before an invalidation and stores
+them after it therefore leaves an entry that is never served.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.metrics import HitRatio, LatencyRecorder
+from .models import Bill
+from .serializers import BillSerializer
+
+bill_cache_stats = HitRatio('billing.bill_cache')
+hit_latency = LatencyRecorder('billing.bill_cache.hit')
+miss_latency = LatencyRecorder('billing.bill_cache.miss')
+
+
+def _cache_key(consumer_number):
+    return f"bills:{consumer_number}"
+
+
+def _generation_key(consumer_number):
+    return f"bills-gen:{consumer_number}"
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def get_bills(consumer_number):
+    """
+    Returns (bills, hit): the serialized bills of `consumer_number`, newest
+    first, and whether they came from the cache.
+    """
+    start = time.perf_counter()
+    key, generation_key = _cache_key(consumer_number), _generation_key(consumer_number)
+    cached = cache.get_many([key, generation_key])
+    entry, generation = cached.get(key), cached.get(generation_key)
+    if entry is not None and generation is not None and entry[0] == generation:
+        bill_cache_stats.hit()
+        hit_latency.record(time.perf_counter() - start)
+        return entry[1], True
+
+    if generation is None:
+        # Outlives the entries it guards; losing it early only costs a miss
+        cache.add(generation_key, _new_generation(), settings.BILL_CACHE_TTL * 2)
+        generation = cache.get(generation_key)
+    queryset = Bill.objects.filter(consumer_number=consumer_number).order_by('-bill_date', 'bill_id')
+    bills = [dict(row) for row in BillSerializer(queryset, many=True).data]
+    if generation is not None:
+        cache.set(key, (generation, bills), settings.BILL_CACHE_TTL)
+    bill_cache_stats.miss()
+    miss_latency.record(time.perf_counter() - start)
+    return bills, False
+
+
+def invalidate_bills(*consumer_numbers):
+    consumer_numbers = set(consumer_numbers)
+    cache.set_many({_generation_key(c): _new_generation() for c in consumer_numbers}, settings.BILL_CACHE_TTL * 2)
+    cache.delete_many([_cache_key(c) for c in consumer_numbers])
@@ -0,0 +1,293 @@
+"""
+Streaming bulk ingestion of bill files.
+
+A billing cycle arrives as a CSV or JSONL file with one bill per record:
+
+    bill_id, account_type, consumer_number, bill_date, due_date, amount,
+    arrears (optional), status (optional), line_items (optional)
+
+where line_items is a list of {description, amount, quantity} objects (a
+JSON-encoded string in CSV files). The file is read lazily and handled in
+batches, so memory stays constant whatever its size. Each batch is
+validated, then written in one transaction:
+
+* bills are upserted on bill_id: Postgres COPYs them into a temporary
+  staging table and merges with INSERT ... ON CONFLICT, other databases use
+  bulk_create(update_conflicts=True);
+* the line items of those bills are replaced (COPY on Postgres).
+
+Re-ingesting a bill never touches its status: once a bill exists, status is
+owned by payments and the overdue job.
+
+Progress is committed with every batch in a BillIngestionRun row keyed by
+the file path and fingerprint, so a crashed run resumes after the last
+committed batch. Rejected records are counted and, if a reject file is
+given, written to it with their line number and error.
+"""
+import csv
+import io
+import json
+import os
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_bills
+from .models import Bill, BillIngestionRun, BillLineItem
+
+BILL_FIELDS = ('bill_id', 'account_type', 'consumer_number', 'bill_date', 'due_date', 'amount', 'arrears', 'status')
+# Fields refreshed when a bill is ingested again (see module docstring for status)
+UPDATE_FIELDS = ('account_type', 'consumer_number', 'bill_date', 'due_date', 'amount', 'arrears')
+ITEM_FIELDS = ('description', 'amount', 'quantity')
+
+ACCOUNT_TYPES = set(Bill.AccountType.values)
+STATUSES = set(Bill.Status.values)
+
+
+class IngestionError(Exception):
+    pass
+
+
+def read_records(path):
+    """Yields (line_number, record dict) from a .csv or .jsonl file."""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+    elif path.endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as e:
+                        yield line_number, {'_error': f"invalid JSON: {e}"}
+    else:
+        raise IngestionError(f"Unsupported bill file type: {path} (expected .csv or .jsonl)")
+
+
+def _decimal(value, field, model_field):
+    """`value` rounded to the decimal places of `model_field`; ValueError unless it fits its max_digits."""
+    try:
+        number = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"{field}: not a number")
+    if not number.is_finite():
+        raise ValueError(f"{field}: not a number")
+    places, digits = model_field.decimal_places, model_field.max_digits
+    if number.adjusted() < digits:
+        # Anything longer fails below; quantize() would raise on it past the context's 28 digits
+        number = number.quantize(Decimal(1).scaleb(-places))
+    if abs(number) >= Decimal(10) ** (digits - places):
+        raise ValueError(f"{field}: at most {digits - places} digits before the decimal point")
+    return number
+
+
+def _date(value, field):
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{field}: expected YYYY-MM-DD")
+
+
+def validate_record(record):
+    """
+    Returns (bill fields, line item tuples) for a raw record, or raises
+    ValueError naming the offending field.
+    """
+    if '_error' in record:
+        raise ValueError(record['_error'])
+    for field in ('bill_id', 'account_type', 'consumer_number', 'bill_date', 'due_date', 'amount'):
+        if record.get(field) in (None, ''):
+            raise ValueError(f"{field}: required")
+
+    bill_id = str(record['bill_id']).strip()
+    consumer_number = str(record['consumer_number']).strip()
+    if len(bill_id) > 50 or len(consumer_number) > 50:
+        raise ValueError("bill_id/consumer_number: longer than 50 characters")
+    account_type = str(record['account_type']).strip().upper()
+    if account_type not in ACCOUNT_TYPES:
+        raise ValueError(f"account_type: must be one of {sorted(ACCOUNT_TYPES)}")
+    status = str(record.get('status') or Bill.Status.PENDING).strip().upper()
+    if status not in STATUSES:
+        raise ValueError(f"status: must be one of {sorted(STATUSES)}")
+
+    bill = {
+        'bill_id': bill_id,
+        'account_type': account_type,
+        'consumer_number': consumer_number,
+        'bill_date': _date(record['bill_date'], 'bill_date'),
+        'due_date': _date(record['due_date'], 'due_date'),
+        'amount': _decimal(record['amount'], 'amount', Bill._meta.get_field('amount')),
+        'arrears': _decimal(record.get('arrears') or 0, 'arrears', Bill._meta.get_field('arrears')),
+        'status': status,
+    }
+
+    line_items = record.get('line_items') or []
+    if isinstance(line_items, str):
+        try:
+            line_items = json.loads(line_items)
+        except ValueError:
+            raise ValueError("line_items: invalid JSON")
+    if not isinstance(line_items, list):
+        raise ValueError("line_items: expected a list")
+    items = []
+    for item in line_items:
+        if not isinstance(item, dict) or not item.get('description'):
+            raise ValueError("line_items: every item needs a description")
+        items.append((
+            str(item['description'])[:255],
+            _decimal(item.get('amount'), 'line_items.amount', BillLineItem._meta.get_field('amount')),
+            _decimal(item.get('quantity', 1), 'line_items.quantity',
+                     BillLineItem._meta.get_field('quantity')),
+        ))
+    return bill, items
+
+
+def _write_batch_orm(bills, items):
+    Bill.objects.bulk_create(
+        [Bill(**bill) for bill in bills],
+        update_conflicts=True, unique_fields=['bill_id'], update_fields=list(UPDATE_FIELDS),
+    )
+    bill_ids = [bill['bill_id'] for bill in bills]
+    BillLineItem.objects.filter(bill_id__in=bill_ids).delete()
+    BillLineItem.objects.bulk_create(
+        [BillLineItem(bill_id=bill_id, description=d, amount=a, quantity=q) for bill_id, d, a, q in items]
+    )
+
+
+def _copy(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _write_batch_postgres(bills, items):
+    qn = connection.ops.quote_name
+    bill_table = qn(Bill._meta.db_table)
+    item_table = qn(BillLineItem._meta.db_table)
+    columns = [qn(Bill._meta.get_field(f).column) for f in BILL_FIELDS]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS bill_ingest_stage (LIKE {bill_table} INCLUDING DEFAULTS) "
+            "ON COMMIT DELETE ROWS"
+        )
+        _copy(cursor, 'bill_ingest_stage', columns, ([bill[f] for f in BILL_FIELDS] for bill in bills))
+        updates = ', '.join(f"{qn(f)} = EXCLUDED.{qn(f)}" for f in UPDATE_FIELDS)
+        cursor.execute(
+            f"INSERT INTO {bill_table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM bill_ingest_stage "
+            f"ON CONFLICT ({qn('bill_id')}) DO UPDATE SET {updates}"
+        )
+        cursor.execute(
+            f"DELETE FROM {item_table} WHERE {qn('bill_id')} IN (SELECT {qn('bill_id')} FROM bill_ingest_stage)"
+        )
+        _copy(cursor, item_table, [qn(c) for c in ('bill_id', *ITEM_FIELDS)], items)
+
+
+def write_bills(bills, items):
+    """
+    Upserts validated `bills` (dicts of BILL_FIELDS) and replaces their line
+    items with `items` ((bill_id, description, amount, quantity) tuples).
+    Call inside a transaction.
+    """
+    if connection.vendor == 'postgresql':
+        _write_batch_postgres(bills, items)
+    else:
+        _write_batch_orm(bills, items)
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def get_or_start_run(path, restart=False):
+    """
+    Returns the unfinished run for this exact file to resume, or a new one.
+    A file that was already ingested completely returns its completed run
+    unless `restart` is set.
+    """
+    source = os.path.abspath(path)
+    fingerprint = _fingerprint(path)
+    run = BillIngestionRun.objects.filter(source=source, fingerprint=fingerprint).order_by('-pk').first()
+    if run is None or restart:
+        return BillIngestionRun.objects.create(source=source, fingerprint=fingerprint)
+    return run
+
+
+def ingest_bills(path, batch_size=5000, restart=False, rejects=None, on_batch=None):
+    """
+    Ingests the bill file at `path` and returns its BillIngestionRun.
+
+    `rejects` is an optional path that rejected records are appended to as
+    JSON lines. `on_batch(run, rows_per_second)` is called after each
+    committed batch.
+    """
+    run = get_or_start_run(path, restart=restart)
+    if run.status == BillIngestionRun.Status.COMPLETED:
+        return run
+    if run.status == BillIngestionRun.Status.FAILED:
+        run.status = BillIngestionRun.Status.RUNNING
+        run.save(update_fields=['status', 'updated_at'])
+
+    records = islice(read_records(path), run.rows_processed, None)
+    reject_file = open(rejects, 'a', encoding='utf-8') if rejects else None
+    start = time.perf_counter()
+    resumed_at = run.rows_processed
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            bills = {}
+            items = {}
+            rejected = []
+            for line_number, record in batch:
+                try:
+                    bill, bill_items = validate_record(record)
+                except ValueError as e:
+                    rejected.append({'line': line_number, 'error': str(e), 'record': record})
+                    continue
+                # A bill repeated within a batch: the last occurrence wins
+                bills[bill['bill_id']] = bill
+                items[bill['bill_id']] = bill_items
+
+            flat_items = [(bill_id, *item) for bill_id, bill_items in items.items() for item in bill_items]
+            with transaction.atomic():
+                if bills:
+                    write_bills(list(bills.values()), flat_items)
+                run.rows_processed += len(batch)
+                run.rows_rejected += len(rejected)
+                run.bills_written += len(bills)
+                run.line_items_written += len(flat_items)
+                run.save(update_fields=[
+                    'rows_processed', 'rows_rejected', 'bills_written', 'line_items_written', 'updated_at',
+                ])
+            invalidate_bills(*(bill['consumer_number'] for bill in bills.values()))
+
+            if reject_file:
+                for reject in rejected:
+                    reject_file.write(json.dumps(reject, default=str) + '\n')
+            if on_batch:
+                elapsed = time.perf_counter() - start
+                on_batch(run, (run.rows_processed - resumed_at) / elapsed if elapsed else 0.0)
+    except BaseException:
+        BillIngestionRun.objects.filter(pk=run.pk).update(status=BillIngestionRun.Status.FAILED)
+        run.status = BillIngestionRun.Status.FAILED
+        raise
+    finally:
+        if reject_file:
+            reject_file.close()
+
+    run.status = BillIngestionRun.Status.COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return run
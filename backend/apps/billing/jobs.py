@@ -0,0 +1,107 @@
+"""
+Scheduled set-based billing jobs.
+
+Both jobs walk the (status, due_date, bill_id) index in chunks of
+`chunk_size` bills, each chunk being one short statement in its own
+transaction, so neither holds row locks on more than a chunk at a time
+however many bills are due. Both are idempotent and safe to re-run:
+
+* mark_overdue_bills moves PENDING bills past their due date to OVERDUE;
+  the UPDATE re-checks the status, so a bill paid meanwhile stays PAID.
+* create_due_reminders inserts one BILL notification per bill due in N
+  days for the owner of its consumer number, with an INSERT ... SELECT per
+  chunk; Notification.dedup_key makes repeated runs insert nothing.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.notifications.models import Notification
+from apps.user_management.models import CustomUser
+from utils.metrics import LatencyRecorder
+from .accounts import accounts_sql
+from .cache import invalidate_bills
+from .models import Bill
+
+overdue_chunk_latency = LatencyRecorder('billing.jobs.overdue_chunk')
+reminder_chunk_latency = LatencyRecorder('billing.jobs.reminder_chunk')
+
+
+def mark_overdue_bills(today=None, chunk_size=5000, pause=0.0):
+    """Marks PENDING bills due before `today` as OVERDUE. Returns the number of bills updated."""
+    today = today or timezone.localdate()
+    pending = Bill.objects.filter(status=Bill.Status.PENDING, due_date__lt=today)
+    updated = 0
+    while True:
+        start = time.perf_counter()
+        chunk = list(pending.order_by('due_date', 'bill_id').values_list('bill_id', 'consumer_number')[:chunk_size])
+        if not chunk:
+            return updated
+        updated += Bill.objects.filter(
+            bill_id__in=[bill_id for bill_id, _ in chunk], status=Bill.Status.PENDING,
+        ).update(status=Bill.Status.OVERDUE)
+        overdue_chunk_latency.record(time.perf_counter() - start)
+        invalidate_bills(*(consumer_number for _, consumer_number in chunk))
+        if pause:
+            time.sleep(pause)
+
+
+def _owners_sql():
+    """(consumer_number, user_id) for every account and every user's primary consumer number."""
+    qn = connection.ops.quote_name
+    return (
+        f"SELECT consumer_number, user_id FROM ({accounts_sql(('consumer_number', 'user_id'))}) a UNION ALL "
+        f"SELECT {qn('consumer_number')}, {qn('id')} FROM {qn(CustomUser._meta.db_table)} "
+        f"WHERE {qn('consumer_number')} IS NOT NULL"
+    )
+
+
+def create_due_reminders(days=None, today=None, chunk_size=5000, pause=0.0):
+    """
+    Creates "bill due in N days" notifications for PENDING bills due exactly
+    `days` days after `today` (every BILL_REMINDER_DAYS entry by default).
+    Returns the number of notifications created.
+    """
+    today = today or timezone.localdate()
+    if days is None:
+        return sum(create_due_reminders(d, today, chunk_size, pause) for d in settings.BILL_REMINDER_DAYS)
+
+    ops = connection.ops
+    qn = ops.quote_name
+    due_date = today + timedelta(days=days)
+    title = f"Bill due in {days} day{'s' if days != 1 else ''}"
+    bills = Bill.objects.filter(status=Bill.Status.PENDING, due_date=due_date).order_by('bill_id')
+    sql = (
+        f"INSERT INTO {qn(Notification._meta.db_table)} "
+        f"(user_id, title, message, notification_type, is_read, created_at, dedup_key) "
+        f"SELECT o.user_id, %s, 'Your ' || LOWER(b.account_type) || ' bill ' || b.bill_id || ' is due on ' "
+        f"|| %s || '.', 'BILL', %s, %s, %s || b.bill_id || ':' || CAST(o.user_id AS TEXT) || %s "
+        f"FROM {qn(Bill._meta.db_table)} b JOIN ({_owners_sql()}) o ON o.consumer_number = b.consumer_number "
+        f"WHERE b.status = %s AND b.due_date = %s AND b.bill_id > %s AND b.bill_id <= %s "
+        f"ON CONFLICT (dedup_key) DO NOTHING"
+    )
+
+    created_at = ops.adapt_datetimefield_value(timezone.now())
+    created = 0
+    last_id = ''
+    while True:
+        start = time.perf_counter()
+        boundary = list(bills.filter(bill_id__gt=last_id).values_list('bill_id', flat=True)[chunk_size - 1:chunk_size])
+        upper = boundary[0] if boundary else bills.filter(bill_id__gt=last_id).values_list('bill_id', flat=True).last()
+        if upper is None:
+            return created
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                title, due_date.strftime('%d %b %Y'), False, created_at, 'bill-due:', f":{days}",
+                Bill.Status.PENDING, ops.adapt_datefield_value(due_date), last_id, upper,
+            ])
+            created += max(cursor.rowcount, 0)
+        reminder_chunk_latency.record(time.perf_counter() - start)
+        if not boundary:
+            return created
+        last_id = upper
+        if pause:
+            time.sleep(pause)
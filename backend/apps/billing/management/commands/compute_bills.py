@@ -0,0 +1,36 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.billing.tariffs import run_billing
+
+
+class Command(BaseCommand):
+    help = 'Prices a meter readings CSV with the slab tariffs and upserts the electricity bills'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with consumer_number,previous_reading,current_reading')
+        parser.add_argument('--bill-date', type=date.fromisoformat, default=None, help='YYYY-MM-DD (default: today)')
+        parser.add_argument('--chunk-size', type=int, default=100000, help='Readings priced per vectorized pass')
+        parser.add_argument('--rejects', help='Append malformed readings to this JSONL file')
+
+    def handle(self, *args, **kwargs):
+        start = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"  {stats['readings']} readings, {stats['readings'] / elapsed:,.0f}/s")
+
+        try:
+            stats = run_billing(
+                kwargs['path'], kwargs['bill_date'] or date.today(),
+                chunk_size=kwargs['chunk_size'], rejects=kwargs['rejects'], on_chunk=progress,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed {stats['bills']} bills from {stats['readings']} readings "
+            f"({stats['skipped']} skipped, {stats['rejected']} rejected) in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,24 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.billing.jobs import create_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Creates "bill due in N days" notifications; safe to re-run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Days ahead (default: every BILL_REMINDER_DAYS entry)')
+        parser.add_argument('--date', type=date.fromisoformat, help='Treat this day (YYYY-MM-DD) as today')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Bills handled per INSERT ... SELECT')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks')
+
+    def handle(self, *args, **kwargs):
+        start = time.perf_counter()
+        created = create_due_reminders(
+            days=kwargs['days'], today=kwargs['date'], chunk_size=kwargs['chunk_size'], pause=kwargs['pause'],
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Created {created} due-date notifications in {elapsed:.1f}s."))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.billing.ingestion import IngestionError, ingest_bills
+
+
+class Command(BaseCommand):
+    help = 'Streams a CSV/JSONL bill file into Bill and BillLineItem, resuming an interrupted run of the same file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Bill file (.csv or .jsonl)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Records validated and written per transaction')
+        parser.add_argument('--rejects', help='Append rejected records to this JSONL file')
+        parser.add_argument('--restart', action='store_true', help='Ignore earlier runs of this file and start over')
+
+    def handle(self, *args, **kwargs):
+        def progress(run, rate):
+            self.stdout.write(f"  {run.rows_processed} rows ({run.rows_rejected} rejected), {rate:,.0f} rows/s")
+
+        started_at = timezone.now()
+        start = time.perf_counter()
+        try:
+            run = ingest_bills(
+                kwargs['path'],
+                batch_size=kwargs['batch_size'],
+                restart=kwargs['restart'],
+                rejects=kwargs['rejects'],
+                on_batch=progress,
+            )
+        except (IngestionError, OSError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        if run.finished_at < started_at:
+            self.stdout.write(self.style.WARNING(
+                f"Already ingested by run {run.pk} at {run.finished_at:%Y-%m-%d %H:%M}; use --restart to ingest again."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Run {run.pk}: {run.bills_written} bills and {run.line_items_written} line items written, "
+            f"{run.rows_rejected} rejected, in {elapsed:.1f}s."
+        ))
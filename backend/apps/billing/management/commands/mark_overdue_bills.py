@@ -0,0 +1,21 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.billing.jobs import mark_overdue_bills
+
+
+class Command(BaseCommand):
+    help = 'Marks PENDING bills past their due date as OVERDUE in short chunked updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Treat this day (YYYY-MM-DD) as today')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Bills updated per statement')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks')
+
+    def handle(self, *args, **kwargs):
+        start = time.perf_counter()
+        updated = mark_overdue_bills(today=kwargs['date'], chunk_size=kwargs['chunk_size'], pause=kwargs['pause'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Marked {updated} bills overdue in {elapsed:.1f}s."))
@@ -0,0 +1,185 @@
+"""
+Compact meter-reading time series.
+
+Readings are stored per meter and month in a MeterReadingBlock as two packed
+little-endian arrays (uint32 second offsets and float32 kWh), 8 bytes per
+reading instead of a table row each. Appending readings that are newer than
+everything in the block just concatenates bytes; older or overlapping ones
+are merged in NumPy, a later reading replacing one with the same timestamp.
+The block also keeps its count and total, so monthly totals never decode
+the arrays.
+
+Timestamps are meter-local wall-clock times (naive), which is also how days
+and months are bucketed. Range aggregates decode the blocks covering the
+range with np.frombuffer and bucket with np.bincount.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import MeterReadingBlock
+
+OFFSET_DTYPE = np.dtype('<u4')
+VALUE_DTYPE = np.dtype('<f4')
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _decode(block):
+    return (
+        np.frombuffer(bytes(block.offsets), dtype=OFFSET_DTYPE),
+        np.frombuffer(bytes(block.values), dtype=VALUE_DTYPE),
+    )
+
+
+def _latest_per_timestamp(offsets, values):
+    """Sorts by offset and keeps the last of any readings sharing one."""
+    order = np.argsort(offsets, kind='stable')
+    offsets, values = offsets[order], values[order]
+    keep = np.append(offsets[1:] != offsets[:-1], True)
+    return offsets[keep], values[keep]
+
+
+def append_readings(meter_number, timestamps, values):
+    """
+    Stores readings for one meter. `timestamps` is anything NumPy converts to
+    datetime64 (datetimes, ISO strings, epoch seconds as datetime64[s]);
+    `values` the kWh of each reading. Returns the number of readings given.
+    """
+    ts = np.asarray(timestamps, dtype='datetime64[s]')
+    values = np.asarray(values, dtype=VALUE_DTYPE)
+    if ts.shape != values.shape:
+        raise ValueError("timestamps and values must have the same length")
+    if not len(ts):
+        return 0
+
+    order = np.argsort(ts, kind='stable')
+    ts, values = ts[order], values[order]
+    months = ts.astype('datetime64[M]')
+    starts = np.flatnonzero(np.append(True, months[1:] != months[:-1]))
+    ends = np.append(starts[1:], len(ts))
+
+    with transaction.atomic():
+        for start, end in zip(starts, ends):
+            month = months[start]
+            offsets = (ts[start:end] - month.astype('datetime64[s]')).astype(OFFSET_DTYPE)
+            offsets, chunk = _latest_per_timestamp(offsets, values[start:end])
+            block, _ = MeterReadingBlock.objects.select_for_update().get_or_create(
+                meter_number=meter_number, month=month.astype(date),
+            )
+            if offsets[0] > block.last_offset:
+                block.offsets = bytes(block.offsets) + offsets.tobytes()
+                block.values = bytes(block.values) + chunk.tobytes()
+                block.count += len(offsets)
+                block.total += float(chunk.sum(dtype=np.float64))
+            else:
+                old_offsets, old_values = _decode(block)
+                merged_offsets, merged_values = _latest_per_timestamp(
+                    np.concatenate([old_offsets, offsets]), np.concatenate([old_values, chunk]),
+                )
+                block.offsets = merged_offsets.tobytes()
+                block.values = merged_values.tobytes()
+                block.count = len(merged_offsets)
+                block.total = float(merged_values.sum(dtype=np.float64))
+            block.last_offset = int(np.frombuffer(bytes(block.offsets)[-OFFSET_DTYPE.itemsize:], OFFSET_DTYPE)[0])
+            block.save()
+    return len(ts)
+
+
+def load_readings(meter_number, start, end):
+    """(timestamps as datetime64[s], kWh) of readings on days start..end inclusive, in one query."""
+    blocks = MeterReadingBlock.objects.filter(
+        meter_number=meter_number, month__gte=_month_start(start), month__lte=end,
+    ).order_by('month').only('month', 'offsets', 'values')
+    parts_ts, parts_values = [], []
+    for block in blocks:
+        offsets, values = _decode(block)
+        parts_ts.append(np.datetime64(block.month, 's') + offsets.astype('timedelta64[s]'))
+        parts_values.append(values)
+    if not parts_ts:
+        return np.empty(0, dtype='datetime64[s]'), np.empty(0, dtype=VALUE_DTYPE)
+    ts, values = np.concatenate(parts_ts), np.concatenate(parts_values)
+    in_range = (ts >= np.datetime64(start, 's')) & (ts < np.datetime64(end + timedelta(days=1), 's'))
+    return ts[in_range], values[in_range]
+
+
+def daily_totals(meter_number, start, end):
+    """(days as datetime64[D], kWh per day, readings per day) for start..end inclusive."""
+    ts, values = load_readings(meter_number, start, end)
+    days = (end - start).days + 1
+    index = (ts.astype('datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64)
+    totals = np.bincount(index, weights=values, minlength=days)
+    counts = np.bincount(index, minlength=days)
+    return np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1), totals, counts
+
+
+def monthly_totals(meter_number, start_month, end_month):
+    """[(month, kWh, readings)] from the block summaries, without decoding any arrays."""
+    return list(
+        MeterReadingBlock.objects.filter(
+            meter_number=meter_number, month__gte=_month_start(start_month), month__lte=end_month,
+        ).order_by('month').values_list('month', 'total', 'count')
+    )
+
+
+def flag_anomalies(totals, threshold=None):
+    """
+    Flags buckets whose consumption is far from typical: robust z-score
+    (median and MAD) above `threshold`, or no consumption at all where the
+    typical bucket has some. Empty buckets before the first consumption
+    (a meter not reporting yet) are left out, and the MAD is floored at
+    METER_ANOMALY_MIN_SPREAD (a fraction of the median, and at least 1 kWh)
+    so that a steady meter is not flagged for every small change.
+    """
+    threshold = threshold or settings.METER_ANOMALY_THRESHOLD
+    totals = np.asarray(totals, dtype=np.float64)
+    flags = np.zeros(len(totals), dtype=bool)
+    first = int(np.argmax(totals != 0)) if totals.any() else len(totals)
+    history = totals[first:]
+    if len(history) < 3:
+        return flags
+    median = np.median(history)
+    mad = max(np.median(np.abs(history - median)) * 1.4826, settings.METER_ANOMALY_MIN_SPREAD * median, 1.0)
+    flags[first:] = (np.abs(history - median) / mad > threshold) | ((history == 0) & (median > 0))
+    return flags
+
+
+def consumption_history(meter_number, days=90, granularity='day', today=None):
+    """Consumption points and summary for the bill screen, over the last `days` days."""
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    if granularity == 'month':
+        rows = monthly_totals(meter_number, start, today)
+        labels = [month.strftime('%Y-%m') for month, _, _ in rows]
+        totals = np.array([total for _, total, _ in rows], dtype=np.float64)
+        counts = np.array([count for _, _, count in rows], dtype=np.int64)
+    else:
+        day_index, totals, counts = daily_totals(meter_number, start, today)
+        labels = [str(day) for day in day_index]
+
+    anomalies = flag_anomalies(totals)
+    averages = np.divide(totals, counts, out=np.zeros(len(totals)), where=counts > 0)
+    points = [
+        {
+            'period': label,
+            'total_kwh': round(float(total), 3),
+            'readings': int(count),
+            'average_kwh': round(float(average), 3),
+            'anomaly': bool(anomaly),
+        }
+        for label, total, count, average, anomaly in zip(labels, totals, counts, averages, anomalies)
+    ]
+    return {
+        'meter_number': meter_number,
+        'granularity': granularity,
+        'start': str(start),
+        'end': str(today),
+        'points': points,
+        'total_kwh': round(float(totals.sum()), 3),
+        'average_kwh': round(float(totals.mean()), 3) if len(totals) else 0.0,
+        'anomalies': int(anomalies.sum()),
+    }
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["consumer_number", "-bill_date"], name="bill_consumer_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_bill_consumer_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillIngestionRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=500)),
+                ("fingerprint", models.CharField(max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("FAILED", "Failed"),
+                            ("COMPLETED", "Completed"),
+                        ],
+                        default="RUNNING",
+                        max_length=20,
+                    ),
+                ),
+                ("rows_processed", models.BigIntegerField(default=0)),
+                ("rows_rejected", models.BigIntegerField(default=0)),
+                ("bills_written", models.BigIntegerField(default=0)),
+                ("line_items_written", models.BigIntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["source", "fingerprint"], name="bill_ingest_source_idx"
+                    )
+                ],
+            },
+        ),
+    ]
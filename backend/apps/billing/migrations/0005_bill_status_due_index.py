@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0004_bill_ingestion_run"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["status", "due_date", "bill_id"], name="bill_status_due_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0005_bill_status_due_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MeterReadingBlock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("meter_number", models.CharField(max_length=50)),
+                ("month", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+                ("total", models.FloatField(default=0)),
+                ("last_offset", models.BigIntegerField(default=-1)),
+                ("offsets", models.BinaryField(default=bytes)),
+                ("values", models.BinaryField(default=bytes)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("meter_number", "month"), name="meter_block_unique"
+                    )
+                ],
+            },
+        ),
+    ]
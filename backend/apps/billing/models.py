@@ -48,6 +48,13 @@ class Bill(models.Model):
     arrears = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['consumer_number', '-bill_date'], name='bill_consumer_date_idx'),
+            # Overdue sweep and due reminders walk (status, due_date) in bill_id order
+            models.Index(fields=['status', 'due_date', 'bill_id'], name='bill_status_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.bill_id} ({self.status})"
 
@@ -56,3 +63,51 @@ class BillLineItem(models.Model):
     description = models.CharField(max_length=255)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.DecimalField(max_digits=6, decimal_places=2, default=1)
+
+class BillIngestionRun(models.Model):
+    """Progress of one `ingest_bills` run over a bill file, for resuming after a crash."""
+
+    class Status(models.TextChoices):
+        RUNNING = 'RUNNING', _('Running')
+        FAILED = 'FAILED', _('Failed')
+        COMPLETED = 'COMPLETED', _('Completed')
+
+    source = models.CharField(max_length=500)
+    fingerprint = models.CharField(max_length=64)  # file size and mtime
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    rows_processed = models.BigIntegerField(default=0)  # records committed, including rejected ones
+    rows_rejected = models.BigIntegerField(default=0)
+    bills_written = models.BigIntegerField(default=0)
+    line_items_written = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['source', 'fingerprint'], name='bill_ingest_source_idx')]
+
+    def __str__(self):
+        return f"{self.source} ({self.status}, {self.rows_processed} rows)"
+
+class MeterReadingBlock(models.Model):
+    """
+    One meter's readings for one month, as packed arrays (see
+    apps.billing.meter_store): `offsets` holds uint32 seconds since the start
+    of `month` (meter-local time), `values` float32 kWh per reading, both
+    little-endian and sorted by time.
+    """
+    meter_number = models.CharField(max_length=50)
+    month = models.DateField()  # first day of the month
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+    last_offset = models.BigIntegerField(default=-1)
+    offsets = models.BinaryField(default=bytes)
+    values = models.BinaryField(default=bytes)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['meter_number', 'month'], name='meter_block_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.meter_number} {self.month:%Y-%m} ({self.count} readings)"
@@ -1,7 +1,47 @@
 from rest_framework import serializers
-from .models import Bill
+from .models import Bill, BillLineItem
 
 class BillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bill
         fields = '__all__'
+
+
+BILL_FIELDS = ('bill_id', 'account_type', 'consumer_number', 'bill_date', 'due_date', 'amount', 'arrears', 'status')
+MONEY_FIELDS = {'amount', 'arrears'}
+
+
+def _render(field, value):
+    if value is None:
+        return None
+    if field in MONEY_FIELDS or field == 'quantity':
+        return f"{value:.2f}"
+    if field in ('bill_date', 'due_date'):
+        return value.isoformat()
+    return value
+
+
+def load_itemized_bills(bill_ids):
+    """
+    Loads bills with their line items in exactly two queries and renders
+    them as plain dicts (same field formats as BillSerializer, plus
+    `line_items`), skipping DRF serializers on this hot path. Returns
+    {bill_id: bill dict} for the bills that exist.
+    """
+    bills = {}
+    for row in Bill.objects.filter(bill_id__in=bill_ids).values_list(*BILL_FIELDS):
+        bill = {field: _render(field, value) for field, value in zip(BILL_FIELDS, row)}
+        bill['line_items'] = []
+        bills[bill['bill_id']] = bill
+
+    items = BillLineItem.objects.filter(bill_id__in=bill_ids).order_by('bill_id', 'id')
+    for bill_id, item_id, description, amount, quantity in items.values_list(
+            'bill_id', 'id', 'description', 'amount', 'quantity'):
+        if bill_id in bills:
+            bills[bill_id]['line_items'].append({
+                'id': item_id,
+                'description': description,
+                'amount': _render('amount', amount),
+                'quantity': _render('quantity', quantity),
+            })
+    return bills
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .accounts import invalidate_household, owners_of
+from .cache import invalidate_bills
+from .models import Bill, ElectricityAccount, GasAccount, WaterAccount
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+def drop_cached_bills(sender, instance, **kwargs):
+    # After commit, so a concurrent miss cannot re-cache the old rows
+    consumer_number = instance.consumer_number
+
+    def invalidate():
+        invalidate_bills(consumer_number)
+        invalidate_household(*owners_of([consumer_number]))
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=ElectricityAccount)
+@receiver(post_save, sender=GasAccount)
+@receiver(post_save, sender=WaterAccount)
+@receiver(post_delete, sender=ElectricityAccount)
+@receiver(post_delete, sender=GasAccount)
+@receiver(post_delete, sender=WaterAccount)
+def drop_household_summary(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_household(user_id))
@@ -0,0 +1,227 @@
+"""
+Vectorized electricity tariff engine.
+
+ELECTRICITY_TARIFFS defines, per connection type, the slab rates, a fixed
+charge and an electricity duty levied on the energy charge. compile_tariffs()
+turns them into NumPy matrices (one row per connection type, one column per
+slab) and TariffTable.evaluate() prices whole arrays of consumption at once:
+the units falling in each slab are clip(units - lower, 0, upper - lower),
+so the energy charge is a row-wise dot product with the rate matrix.
+
+All money is integer paise, so results are exact; the duty is rounded half
+up to the paisa. reference_charges() is the plain per-row Decimal
+implementation the engine is checked against.
+
+run_billing() streams a readings file (consumer_number, previous_reading,
+current_reading), prices it chunk by chunk and writes Bill and BillLineItem
+rows through ingestion.write_bills, so re-running a period upserts the same
+bills.
+"""
+import csv
+import json
+from collections import namedtuple
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Sum
+
+from .cache import invalidate_bills
+from .ingestion import write_bills
+from .models import Bill, ElectricityAccount
+
+Charges = namedtuple('Charges', ['energy', 'fixed', 'duty', 'total'])
+
+# Duty rates are kept in basis points so that rounding stays in integers
+BASIS_POINTS = 10000
+
+
+def _paise(value, what):
+    amount = (Decimal(str(value)) * 100).normalize()
+    if amount != amount.to_integral_value():
+        raise ImproperlyConfigured(f"{what}: {value} has more than two decimal places")
+    return int(amount)
+
+
+class TariffTable:
+    def __init__(self, tariffs):
+        self.connection_types = list(tariffs)
+        self.index = {name: i for i, name in enumerate(self.connection_types)}
+        width = max(len(t['slabs']) for t in tariffs.values())
+        self.lower = np.zeros((len(tariffs), width), dtype=np.int64)
+        self.upper = np.zeros((len(tariffs), width), dtype=np.int64)
+        self.rates = np.zeros((len(tariffs), width), dtype=np.int64)
+        self.fixed = np.zeros(len(tariffs), dtype=np.int64)
+        self.duty_bp = np.zeros(len(tariffs), dtype=np.int64)
+
+        top = np.iinfo(np.int64).max // 4
+        for i, (name, tariff) in enumerate(tariffs.items()):
+            lower = 0
+            for k, (bound, rate) in enumerate(tariff['slabs']):
+                self.lower[i, k] = lower
+                self.upper[i, k] = top if bound is None else bound
+                self.rates[i, k] = _paise(rate, f"{name} slab rate")
+                lower = self.upper[i, k]
+            # Unused trailing slabs keep lower == upper, so they never hold units
+            self.lower[i, len(tariff['slabs']):] = self.upper[i, len(tariff['slabs']) - 1]
+            self.upper[i, len(tariff['slabs']):] = self.upper[i, len(tariff['slabs']) - 1]
+            self.fixed[i] = _paise(tariff['fixed_charge'], f"{name} fixed charge")
+            self.duty_bp[i] = int(Decimal(str(tariff['duty_rate'])) * BASIS_POINTS)
+
+    def type_codes(self, connection_types):
+        """Maps connection type names to row indexes of the tariff matrices."""
+        try:
+            return np.fromiter((self.index[c] for c in connection_types), dtype=np.int64, count=len(connection_types))
+        except KeyError as e:
+            raise ValueError(f"No tariff for connection type {e}") from None
+
+    def evaluate(self, type_codes, units):
+        """Prices integer `units` (one per row) for the given type codes. Returns Charges of paise arrays."""
+        units = np.asarray(units, dtype=np.int64)[:, None]
+        lower = self.lower[type_codes]
+        in_slab = np.clip(units - lower, 0, self.upper[type_codes] - lower)
+        energy = (in_slab * self.rates[type_codes]).sum(axis=1)
+        fixed = self.fixed[type_codes]
+        duty = (energy * self.duty_bp[type_codes] + BASIS_POINTS // 2) // BASIS_POINTS
+        return Charges(energy, fixed, duty, energy + fixed + duty)
+
+
+def compile_tariffs(tariffs=None):
+    return TariffTable(tariffs or settings.ELECTRICITY_TARIFFS)
+
+
+def reference_charges(connection_type, units, tariffs=None):
+    """Per-row Decimal implementation of TariffTable.evaluate, in paise."""
+    tariff = (tariffs or settings.ELECTRICITY_TARIFFS)[connection_type]
+    energy = Decimal(0)
+    lower = 0
+    for bound, rate in tariff['slabs']:
+        upper = units if bound is None else min(units, bound)
+        if upper > lower:
+            energy += (upper - lower) * Decimal(rate)
+        if bound is None or units <= bound:
+            break
+        lower = bound
+    fixed = Decimal(tariff['fixed_charge'])
+    duty = (energy * Decimal(tariff['duty_rate'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    def to_paise(amount):
+        return int(amount * 100)
+
+    return Charges(to_paise(energy), to_paise(fixed), to_paise(duty), to_paise(energy + fixed + duty))
+
+
+def read_readings(path, chunk_size=100000):
+    """
+    Yields (consumer_numbers, previous, current, rejected) chunks from a
+    readings CSV with a header row. Rows that are short or whose readings
+    are not integers go to `rejected` as {'line', 'error', 'record'}.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        while True:
+            consumers, previous, current, rejected = [], [], [], []
+            for row in reader:
+                try:
+                    if len(row) < 3:
+                        raise ValueError("expected consumer_number,previous_reading,current_reading")
+                    readings = int(row[1]), int(row[2])
+                except ValueError as e:
+                    rejected.append({'line': reader.line_num, 'error': str(e), 'record': row})
+                    continue
+                consumers.append(row[0].strip())
+                previous.append(readings[0])
+                current.append(readings[1])
+                if len(consumers) >= chunk_size:
+                    break
+            if not consumers and not rejected:
+                return
+            yield consumers, np.array(previous, dtype=np.int64), np.array(current, dtype=np.int64), rejected
+
+
+def _lookup(consumers, bill_date, batch_size=5000):
+    """Connection type and arrears (paise, unpaid earlier bills) per consumer number, in batched queries."""
+    connection_types, arrears = {}, {}
+    for start in range(0, len(consumers), batch_size):
+        batch = consumers[start:start + batch_size]
+        connection_types.update(
+            ElectricityAccount.objects.filter(consumer_number__in=batch).values_list('consumer_number', 'connection_type')
+        )
+        unpaid = (
+            Bill.objects.filter(consumer_number__in=batch, account_type=Bill.AccountType.ELECTRICITY,
+                                bill_date__lt=bill_date)
+            .exclude(status=Bill.Status.PAID).values('consumer_number').annotate(total=Sum('amount'))
+        )
+        arrears.update((row['consumer_number'], _paise(row['total'], 'arrears')) for row in unpaid)
+    return connection_types, arrears
+
+
+def _money(paise):
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def run_billing(path, bill_date, chunk_size=100000, tariffs=None, rejects=None, on_chunk=None):
+    """
+    Prices every reading in `path` and upserts one ELECTRICITY bill per
+    consumer dated `bill_date`. Readings going backwards, for unknown
+    consumers, for connection types without a tariff or for consumer
+    numbers too long for a bill id are skipped, as are all but the last
+    reading of a consumer within a chunk. Malformed rows are rejected and,
+    with `rejects`, appended to that path as JSON lines. `on_chunk(stats)`
+    is called after each chunk. Returns {'readings', 'bills', 'skipped',
+    'rejected'}.
+    """
+    table = compile_tariffs(tariffs)
+    due_date = bill_date + timedelta(days=settings.BILL_DUE_DAYS)
+    prefix = f"EB{bill_date:%Y%m}-"
+    max_consumer_length = Bill._meta.get_field('bill_id').max_length - len(prefix)
+    stats = {'readings': 0, 'bills': 0, 'skipped': 0, 'rejected': 0}
+
+    for consumers, previous, current, rejected in read_readings(path, chunk_size):
+        connection_types, arrears = _lookup(consumers, bill_date)
+        units = current - previous
+        known = np.fromiter(
+            (connection_types.get(c) in table.index and len(c) <= max_consumer_length for c in consumers),
+            dtype=bool, count=len(consumers),
+        )
+        # A consumer read twice in a chunk: the last reading wins, the earlier ones count as skipped
+        last = {consumers[i]: i for i in np.flatnonzero((units >= 0) & known)}
+        rows = np.fromiter(sorted(last.values()), dtype=np.int64, count=len(last))
+        billed = [consumers[i] for i in rows]
+        charges = table.evaluate(table.type_codes([connection_types[c] for c in billed]), units[rows])
+
+        bills, items = [], []
+        for n, consumer_number in enumerate(billed):
+            bill_id = f"{prefix}{consumer_number}"
+            bills.append({
+                'bill_id': bill_id,
+                'account_type': Bill.AccountType.ELECTRICITY,
+                'consumer_number': consumer_number,
+                'bill_date': bill_date,
+                'due_date': due_date,
+                'amount': _money(charges.total[n]),
+                'arrears': _money(arrears.get(consumer_number, 0)),
+                'status': Bill.Status.PENDING,
+            })
+            items.append((bill_id, f"Energy charge ({units[rows[n]]} units)", _money(charges.energy[n]), Decimal(1)))
+            items.append((bill_id, 'Fixed charge', _money(charges.fixed[n]), Decimal(1)))
+            items.append((bill_id, 'Electricity duty', _money(charges.duty[n]), Decimal(1)))
+
+        if bills:
+            with transaction.atomic():
+                write_bills(bills, items)
+            invalidate_bills(*billed)
+        if rejects and rejected:
+            with open(rejects, 'a', encoding='utf-8') as reject_file:
+                reject_file.writelines(json.dumps(reject) + '\n' for reject in rejected)
+        stats['readings'] += len(consumers) + len(rejected)
+        stats['bills'] += len(bills)
+        stats['skipped'] += len(consumers) - len(bills)
+        stats['rejected'] += len(rejected)
+        if on_chunk:
+            on_chunk(stats)
+    return stats
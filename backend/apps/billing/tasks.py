@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from . import jobs
+
+
+@shared_task(ignore_result=True)
+def mark_overdue_bills():
+    jobs.mark_overdue_bills()
+
+
+@shared_task(ignore_result=True)
+def create_due_reminders():
+    jobs.create_due_reminders()
@@ -0,0 +1,172 @@
+"""
+Upstream utility billing systems as the source of truth for bills.
+
+When BILL_UPSTREAM is configured, the local Bill table acts as a replica
+that FetchBillView serves with stale-while-revalidate:
+
+* never synced: fetch from upstream before answering; concurrent kiosks
+  asking for the same consumer number share that one call;
+* synced less than BILL_UPSTREAM_MAX_AGE seconds ago: serve locally;
+* older: serve locally right away and refresh in the background (one
+  refresh per consumer across workers);
+* upstream failing, timing out or its circuit open: serve what we have.
+
+Fetched bills are upserted like ingested ones (see ingestion.write_bills).
+Without BILL_UPSTREAM only the local table is used.
+"""
+import logging
+import time
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from utils.background import submit
+from utils.metrics import LatencyRecorder
+from utils.resilience import CircuitBreaker, CircuitOpenError, SingleFlight
+from .cache import get_bills, invalidate_bills
+from .ingestion import validate_record, write_bills
+
+logger = logging.getLogger(__name__)
+
+upstream_latency = LatencyRecorder('billing.upstream.fetch')
+_single_flight = SingleFlight()
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class BaseBillSource:
+    name = 'base'
+
+    def fetch(self, consumer_number):
+        """Returns the consumer's bills as records in the ingestion format."""
+        raise NotImplementedError
+
+
+class HTTPBillSource(BaseBillSource):
+    """
+    GETs `{base_url}/bills/{consumer_number}` and expects `{"bills": [...]}`.
+    A 404 means the consumer has no bills. Connections are pooled per
+    process; `connect_timeout` and `read_timeout` bound every call.
+    """
+    name = 'http'
+
+    def __init__(self, base_url, api_key=None, pool_size=20, connect_timeout=1.0, read_timeout=3.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if api_key:
+            self.session.headers['Authorization'] = f"Api-Key {api_key}"
+
+    def fetch(self, consumer_number):
+        import requests
+
+        try:
+            response = self.session.get(f"{self.base_url}/bills/{quote(consumer_number, safe='')}", timeout=self.timeout)
+        except requests.RequestException as e:
+            raise UpstreamError(str(e)) from e
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            raise UpstreamError(f"upstream returned HTTP {response.status_code}")
+        try:
+            return response.json()['bills']
+        except (ValueError, KeyError) as e:
+            raise UpstreamError(f"malformed upstream response: {e}") from e
+
+
+@lru_cache(maxsize=None)
+def get_bill_source():
+    """Builds the configured source and its circuit breaker once per process, or returns None."""
+    config = settings.BILL_UPSTREAM
+    if not config:
+        return None
+    source = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    breaker = CircuitBreaker(f"billing.upstream.{source.name}", **settings.BILL_UPSTREAM_BREAKER)
+    return source, breaker
+
+
+def _synced_key(consumer_number):
+    return f"bills-synced:{consumer_number}"
+
+
+def _sync(consumer_number):
+    source, breaker = get_bill_source()
+    start = time.perf_counter()
+    try:
+        records = breaker.call(source.fetch, consumer_number)
+    finally:
+        upstream_latency.record(time.perf_counter() - start)
+
+    bills, items = [], []
+    for record in records:
+        try:
+            bill, bill_items = validate_record(record)
+        except ValueError as e:
+            logger.warning(f"Skipping upstream bill for {consumer_number}: {e}")
+            continue
+        if bill['consumer_number'] != consumer_number:
+            logger.warning(f"Skipping upstream bill {bill['bill_id']}: belongs to {bill['consumer_number']}")
+            continue
+        bills.append(bill)
+        items.extend((bill['bill_id'], *item) for item in bill_items)
+    if bills:
+        with transaction.atomic():
+            write_bills(bills, items)
+    cache.set(_synced_key(consumer_number), time.time(), settings.BILL_UPSTREAM_SYNC_MARKER_TTL)
+    invalidate_bills(consumer_number)
+    return len(bills)
+
+
+def sync_bills(consumer_number):
+    """
+    Pulls the consumer's bills from upstream into the Bill table, sharing
+    the call with concurrent requests for the same consumer number.
+    Returns the number of bills written.
+    """
+    return _single_flight.do(consumer_number, _sync, consumer_number)
+
+
+def _revalidate(consumer_number):
+    try:
+        sync_bills(consumer_number)
+    except (UpstreamError, CircuitOpenError) as e:
+        logger.warning(f"Background bill refresh for {consumer_number} failed: {e}")
+    finally:
+        cache.delete(f"bills-revalidating:{consumer_number}")
+
+
+def fetch_bills(consumer_number):
+    """
+    Returns (bills, hit, stale): serialized bills for the consumer, whether
+    they came from the bill cache, and whether they may be out of date
+    because upstream is unavailable or a refresh is pending.
+    """
+    if get_bill_source() is None:
+        return (*get_bills(consumer_number), False)
+
+    synced_at = cache.get(_synced_key(consumer_number))
+    stale = False
+    if synced_at is None:
+        try:
+            sync_bills(consumer_number)
+        except (UpstreamError, CircuitOpenError) as e:
+            logger.warning(f"Serving local bills for {consumer_number}, upstream unavailable: {e}")
+            stale = True
+    elif time.time() - synced_at > settings.BILL_UPSTREAM_MAX_AGE:
+        stale = True
+        # cache.add is atomic: one background refresh per consumer across workers
+        if cache.add(f"bills-revalidating:{consumer_number}", 1, 30):
+            submit(_revalidate, consumer_number)
+    return (*get_bills(consumer_number), stale)
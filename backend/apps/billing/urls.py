@@ -1,8 +1,14 @@
 from django.urls import path
-from .views import FetchBillView, BillHistoryView, BillDetailView
+from .views import (
+    FetchBillView, BillHistoryView, BillDetailView, BillBatchDetailView, HouseholdSummaryView,
+    ConsumptionHistoryView,
+)
 
 urlpatterns = [
     path('fetch/<str:consumer_number>/', FetchBillView.as_view(), name='fetch-bill'),
     path('history/', BillHistoryView.as_view(), name='bill-history'),
+    path('summary/', HouseholdSummaryView.as_view(), name='household-summary'),
+    path('details/batch/', BillBatchDetailView.as_view(), name='bill-details-batch'),
     path('details/<str:bill_id>/', BillDetailView.as_view(), name='bill-details'),
+    path('consumption/<str:consumer_number>/', ConsumptionHistoryView.as_view(), name='consumption-history'),
 ]
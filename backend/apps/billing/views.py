@@ -1,25 +1,89 @@
-from rest_framework import generics, permissions
-from .models import Bill
-from .serializers import BillSerializer
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from .accounts import get_household_summary
+from .meter_store import consumption_history
+from .upstream import fetch_bills
+from .models import Bill, ElectricityAccount
+from .serializers import BillSerializer, load_itemized_bills
 
 class FetchBillView(generics.ListAPIView):
     serializer_class = BillSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_queryset(self):
-        consumer_number = self.kwargs.get('consumer_number')
-        # In MVP, we filter local DB. In prod, we might query upstream.
-        return Bill.objects.filter(consumer_number=consumer_number)
+    def list(self, request, *args, **kwargs):
+        bills, hit, stale = fetch_bills(self.kwargs.get('consumer_number'))
+        page = self.paginate_queryset(bills)
+        response = self.get_paginated_response(page) if page is not None else Response(bills)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        if stale:
+            response['X-Bills-Stale'] = 'true'
+        return response
 
 class BillHistoryView(generics.ListAPIView):
     serializer_class = BillSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Bill.objects.filter(consumer_number__in=self.request.user.electricity_accounts.values('consumer_number'))
+        summary, _ = get_household_summary(self.request.user.pk)
+        consumer_numbers = [account['consumer_number'] for account in summary['accounts']]
+        return Bill.objects.filter(consumer_number__in=consumer_numbers).order_by('-bill_date', 'bill_id')
 
-class BillDetailView(generics.RetrieveAPIView):
-    queryset = Bill.objects.all()
-    serializer_class = BillSerializer
+class HouseholdSummaryView(generics.GenericAPIView):
+    """Every utility account of the user with outstanding amounts, arrears and the latest bill."""
     permission_classes = [permissions.IsAuthenticated]
-    lookup_field = 'bill_id'
+
+    def get(self, request):
+        summary, hit = get_household_summary(request.user.pk)
+        response = Response(summary)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+class BillDetailView(generics.GenericAPIView):
+    """A bill with its itemized line items, in two queries."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, bill_id):
+        bill = load_itemized_bills([bill_id]).get(bill_id)
+        if bill is None:
+            return Response({'detail': 'Bill not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(bill)
+
+class BillBatchDetailView(generics.GenericAPIView):
+    """Itemized bills for up to MAX_BILLS comma-separated `bill_ids`, in two queries."""
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_BILLS = 50
+
+    def get(self, request):
+        bill_ids = list(dict.fromkeys(b.strip() for b in request.query_params.get('bill_ids', '').split(',') if b.strip()))
+        if not bill_ids:
+            return Response({'detail': 'bill_ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(bill_ids) > self.MAX_BILLS:
+            return Response({'detail': f'At most {self.MAX_BILLS} bill_ids per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        bills = load_itemized_bills(bill_ids)
+        return Response({
+            'bills': [bills[b] for b in bill_ids if b in bills],
+            'missing': [b for b in bill_ids if b not in bills],
+        })
+
+
+class ConsumptionHistoryView(generics.GenericAPIView):
+    """Daily (default, last `days` days up to 366) or monthly consumption for an electricity account's meter."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, consumer_number):
+        accounts = ElectricityAccount.objects.filter(consumer_number=consumer_number)
+        if request.user.role not in ('ADMIN', 'SUPERADMIN'):
+            accounts = accounts.filter(user=request.user)
+        account = accounts.only('meter_number').first()
+        if account is None:
+            return Response({'detail': 'Electricity account not found'}, status=status.HTTP_404_NOT_FOUND)
+        granularity = request.query_params.get('granularity', 'day')
+        try:
+            days = min(int(request.query_params.get('days', 90)), 366)
+        except ValueError:
+            days = 0
+        if granularity not in ('day', 'month') or days < 1:
+            return Response({'detail': 'Use granularity=day|month and a positive days value'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(consumption_history(account.meter_number, days=days, granularity=granularity))
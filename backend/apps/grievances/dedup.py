@@ -0,0 +1,282 @@
+"""
+Near-duplicate complaint detection with MinHash and LSH.
+
+A description is normalised (case-folded, punctuation collapsed, vowel signs
+kept with their letters) and cut into overlapping SHINGLE_SIZE-character
+shingles. Its MinHash signature holds, for each of PERMUTATIONS hash
+functions, the smallest hash of any shingle; two signatures agree in a
+position with probability equal to the Jaccard similarity of the shingle
+sets. Signatures are stored on Complaint.signature (PERMUTATIONS uint32s),
+so HASH_SEED, PERMUTATIONS and SHINGLE_SIZE must never change once
+complaints have them.
+
+DedupIndex is the LSH index: each signature is cut into BANDS bands and
+filed under its (service_type, category) and band bytes, so likely
+duplicates share at least one bucket and everything else is never looked
+at. Candidates are checked by signature agreement against
+COMPLAINT_DEDUP_THRESHOLD and must have been filed within
+COMPLAINT_DEDUP_WINDOW_HOURS; the most similar wins. Only root complaints
+(those without a parent) are indexed: a duplicate is represented by the
+complaint it was linked to, which keeps buckets small during an outage
+where thousands of copies of one complaint arrive.
+
+Each process keeps one index, loaded from the database in the background
+on first use and topped up with roots filed by other processes every
+COMPLAINT_DEDUP_SYNC_SECONDS. Detection is best effort (a root committed
+out of id order by another process can be missed until the next load);
+backfill_complaint_dedup recomputes signatures and links in bulk.
+"""
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from utils.background import submit
+from .models import Complaint
+
+SHINGLE_SIZE = 5
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+HASH_SEED = 0x5C1D
+SIGNATURE_DTYPE = np.dtype('<u4')
+
+# Near-identical copies of an indexed complaint add nothing to recall
+REDUNDANT_SIMILARITY = 0.95
+
+_rng = np.random.default_rng(HASH_SEED)
+# Multiply-shift hashing: h_i(x) = (a_i * x + b_i) >> 32 with odd a_i, mod 2**64
+_A = _rng.integers(1, 2**63, size=PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2**63, size=PERMUTATIONS, dtype=np.uint64)
+_POWERS = np.array([pow(0x100000001B3, k, 2**64) for k in range(SHINGLE_SIZE)], dtype=np.uint64)
+
+# Letters, digits and the combining marks of the Indic, Arabic and Meetei scripts
+_SEPARATORS = re.compile(
+    r'[^\w\u0300-\u036f\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0900-\u0963\u0966-\u0dff\uabe3-\uabea]+'
+)
+
+
+def normalize(text):
+    return _SEPARATORS.sub(' ', text.casefold()).strip()
+
+
+def signature(text):
+    """The MinHash signature of `text` as a uint32 array of PERMUTATIONS values."""
+    codes = np.frombuffer(normalize(text).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < SHINGLE_SIZE:
+        codes = np.concatenate([codes, np.zeros(SHINGLE_SIZE - len(codes), dtype=np.uint64)])
+    windows = len(codes) - SHINGLE_SIZE + 1
+    shingles = np.zeros(windows, dtype=np.uint64)
+    for k in range(SHINGLE_SIZE):
+        shingles += codes[k:k + windows] * _POWERS[k]
+    # Mix the bits so that multiply-shift sees uniform input (splitmix64 finaliser)
+    shingles ^= shingles >> np.uint64(30)
+    shingles *= np.uint64(0xBF58476D1CE4E5B9)
+    shingles ^= shingles >> np.uint64(27)
+    hashes = (shingles[:, None] * _A + _B) >> np.uint64(32)
+    return hashes.min(axis=0).astype(SIGNATURE_DTYPE)
+
+
+def from_bytes(value):
+    return np.frombuffer(bytes(value), dtype=SIGNATURE_DTYPE)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(a == b)) / PERMUTATIONS
+
+
+class DedupIndex:
+    """LSH buckets of root complaints filed within the window, oldest evicted first."""
+
+    def __init__(self, window=None, threshold=None):
+        self.window = window if window is not None else settings.COMPLAINT_DEDUP_WINDOW_HOURS * 3600
+        self.threshold = threshold if threshold is not None else settings.COMPLAINT_DEDUP_THRESHOLD
+        self._buckets = defaultdict(dict)  # scope -> band key -> pks
+        self._entries = {}  # pk -> (signature, filed at, scope, band keys)
+        self._order = deque()  # (filed at, pk), as added
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.last_pk = 0
+        self.synced_at = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _keys(sig):
+        raw, width = sig.tobytes(), ROWS * SIGNATURE_DTYPE.itemsize
+        return [bytes((band,)) + raw[band * width:(band + 1) * width] for band in range(BANDS)]
+
+    def _evict(self, now):
+        cutoff = now - self.window
+        while self._order and self._order[0][0] < cutoff:
+            _, pk = self._order.popleft()
+            entry = self._entries.pop(pk, None)
+            if entry is not None:
+                buckets = self._buckets[entry[2]]
+                for key in entry[3]:
+                    bucket = buckets[key]
+                    bucket.discard(pk)
+                    if not bucket:
+                        del buckets[key]
+
+    def _best(self, scope, keys, sig, at):
+        buckets = self._buckets.get(scope, {})
+        candidates = set()
+        for key in keys:
+            candidates.update(buckets.get(key, ()))
+        candidates = [pk for pk in candidates if abs(at - self._entries[pk][1]) <= self.window]
+        if not candidates:
+            return None, 0.0
+        scores = np.count_nonzero(np.stack([self._entries[pk][0] for pk in candidates]) == sig, axis=1)
+        best = int(np.argmax(scores))
+        return candidates[best], scores[best] / PERMUTATIONS
+
+    def query(self, scope, sig, at):
+        """(pk of the most similar root at least `threshold` similar, similarity) or (None, best similarity)."""
+        with self._lock:
+            pk, score = self._best(scope, self._keys(sig), sig, at)
+        return (pk, score) if score >= self.threshold else (None, score)
+
+    def add(self, pk, scope, sig, at, check=True):
+        """Indexes a root complaint unless (with `check`) a near-identical one already is."""
+        keys = self._keys(sig)
+        with self._lock:
+            self._evict(at)
+            if pk in self._entries or (check and self._best(scope, keys, sig, at)[1] >= REDUNDANT_SIMILARITY):
+                return False
+            self._entries[pk] = (sig, at, scope, keys)
+            self._order.append((at, pk))
+            buckets = self._buckets[scope]
+            for key in keys:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {pk}
+                else:
+                    bucket.add(pk)
+            return True
+
+    def sync(self):
+        """Adds the roots filed since the last sync (all of the window on the first); skipped while one runs."""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            since = timezone.now() - timedelta(seconds=self.window)
+            rows = (
+                Complaint.objects.filter(pk__gt=self.last_pk, created_at__gte=since, parent__isnull=True,
+                                         signature__isnull=False)
+                .order_by('pk').values_list('pk', 'service_type', 'category', 'created_at', 'signature')
+            )
+            for pk, service_type, category, created_at, sig in rows.iterator(chunk_size=5000):
+                # Stored roots already had no match at the threshold when they were filed
+                self.add(pk, (service_type, category), from_bytes(sig), created_at.timestamp(), check=False)
+                # Only the sync moves the cursor: roots added locally may have higher ids than roots other
+                # workers commit later, and those must still be read
+                self.last_pk = pk
+            self.synced_at = time.monotonic()
+            self.loaded.set()
+        finally:
+            self._sync_lock.release()
+
+
+_lock = threading.Lock()
+_index = None
+_index_pid = None
+
+
+def get_index():
+    """
+    This process's index, kept in sync. The first use (and the first after a
+    fork) loads it on the background pool: a day of roots takes seconds to
+    read, and submissions meanwhile are checked against what is loaded so far.
+    """
+    global _index, _index_pid
+    with _lock:
+        if _index is None or _index_pid != os.getpid():
+            _index = DedupIndex()
+            _index_pid = os.getpid()
+            submit(_index.sync)
+            return _index
+        index = _index
+    if index.loaded.is_set() and time.monotonic() - index.synced_at >= settings.COMPLAINT_DEDUP_SYNC_SECONDS:
+        index.sync()
+    return index
+
+
+def find_parent(service_type, category, description, at=None):
+    """(signature bytes, parent pk or None) for a complaint about to be filed."""
+    sig = signature(description)
+    at = (at or timezone.now()).timestamp()
+    parent, _ = get_index().query((service_type, category), sig, at)
+    return sig.tobytes(), parent
+
+
+def index_complaint(complaint):
+    """Makes a newly filed root complaint findable once its transaction commits."""
+    if complaint.parent_id is not None or complaint.signature is None:
+        return
+    pk, scope, sig = complaint.pk, (complaint.service_type, complaint.category), from_bytes(complaint.signature)
+    at = complaint.created_at.timestamp()
+    transaction.on_commit(lambda: get_index().add(pk, scope, sig, at))
+
+
+def backfill(since=None, batch_size=5000, relink=False, on_batch=None):
+    """
+    Signs complaints that have no signature and links those filed from
+    `since` (all when None) to earlier near-duplicates, replaying them in
+    filing order through a fresh index, so a parent is always the earliest
+    complaint of its group. With `relink`, existing links are recomputed
+    too. `on_batch(scanned, linked)` is called after each committed batch.
+    Returns (complaints scanned, signatures written, complaints linked).
+    """
+    index = DedupIndex()
+    qn = connection.ops.quote_name
+    table = qn(Complaint._meta.db_table)
+    rows = Complaint.objects.order_by('created_at', 'pk')
+    if since is not None:
+        # Complaints filed in the window before `since` can be parents but are left as they are
+        rows = rows.filter(created_at__gte=since - timedelta(seconds=index.window))
+    scanned = signed = linked = 0
+    last = None
+    while True:
+        batch = rows if last is None else rows.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], pk__gt=last[1]))
+        batch = list(batch.values_list('pk', 'service_type', 'category', 'description', 'created_at', 'parent_id',
+                                       'signature')[:batch_size])
+        if not batch:
+            break
+        updates = []
+        for pk, service_type, category, description, created_at, parent, sig in batch:
+            writable = since is None or created_at >= since
+            fresh = sig is None
+            sig = signature(description) if fresh else from_bytes(sig)
+            scope, at = (service_type, category), created_at.timestamp()
+            new_parent = parent
+            if parent is None or relink:
+                new_parent, _ = index.query(scope, sig, at)
+                if new_parent is None:
+                    index.add(pk, scope, sig, at)
+            if not writable:
+                continue
+            scanned += 1
+            signed += fresh
+            linked += new_parent is not None
+            if fresh or new_parent != parent:
+                updates.append((sig.tobytes(), new_parent, pk))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {table} SET {qn('signature')} = %s, {qn('parent_id')} = %s WHERE {qn('id')} = %s", updates,
+            )
+        last = batch[-1][4], batch[-1][0]
+        if on_batch:
+            on_batch(scanned, linked)
+    return scanned, signed, linked
@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.grievances.dedup import backfill
+
+
+class Command(BaseCommand):
+    help = 'Computes MinHash signatures for complaints and links near-duplicates to the earliest of their group'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Only complaints filed in the last N days (default: all)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--relink', action='store_true', help='Recompute links that already exist')
+
+    def handle(self, *args, **kwargs):
+        since = timezone.now() - timedelta(days=kwargs['days']) if kwargs['days'] else None
+        start = time.perf_counter()
+
+        def progress(scanned, linked):
+            self.stdout.write(f"  {scanned} complaints, {linked} linked, "
+                              f"{scanned / (time.perf_counter() - start):,.0f} complaints/s")
+
+        scanned, signed, linked = backfill(since, batch_size=kwargs['batch_size'], relink=kwargs['relink'],
+                                           on_batch=progress)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{scanned} complaints in {elapsed:.1f}s: {signed} signed, {linked} linked to an earlier near-duplicate."
+        ))
@@ -0,0 +1,150 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+# Languages with a stemming text search configuration; the rest use 'simple'.
+# Configurations missing from the server (hindi needs Postgres 14) fall back too.
+POSTGRES_INSTALL = [
+    """
+    CREATE OR REPLACE FUNCTION complaint_search_config(lang text) RETURNS regconfig AS $$
+    DECLARE
+        name text := CASE lang WHEN 'en' THEN 'english' WHEN 'hi' THEN 'hindi'
+                               WHEN 'ta' THEN 'tamil' WHEN 'ne' THEN 'nepali' ELSE 'simple' END;
+    BEGIN
+        IF EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = name) THEN
+            RETURN name::regconfig;
+        END IF;
+        RETURN 'simple'::regconfig;
+    END
+    $$ LANGUAGE plpgsql STABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION complaint_search_vector(lang text, service_type text, category text, description text)
+    RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector(complaint_search_config(lang),
+                                     coalesce(service_type, '') || ' ' || coalesce(category, '')), 'A')
+            || setweight(to_tsvector(complaint_search_config(lang), coalesce(description, '')), 'B')
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION grievances_complaint_search_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := complaint_search_vector(NEW.language, NEW.service_type, NEW.category, NEW.description);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "ALTER TABLE grievances_complaint ADD COLUMN search_vector tsvector",
+    "UPDATE grievances_complaint SET search_vector = complaint_search_vector(language, service_type, category, description)",
+    """
+    CREATE TRIGGER grievances_complaint_search BEFORE INSERT OR UPDATE OF language, service_type, category, description
+    ON grievances_complaint FOR EACH ROW EXECUTE FUNCTION grievances_complaint_search_update()
+    """,
+    "CREATE INDEX complaint_search_idx ON grievances_complaint USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS grievances_complaint_search ON grievances_complaint",
+    "ALTER TABLE grievances_complaint DROP COLUMN IF EXISTS search_vector",
+    "DROP FUNCTION IF EXISTS grievances_complaint_search_update()",
+    "DROP FUNCTION IF EXISTS complaint_search_vector(text, text, text, text)",
+    "DROP FUNCTION IF EXISTS complaint_search_config(text)",
+]
+
+# unicode61 splits words at combining marks by default, which cuts Indic
+# words apart at every vowel sign; the M* categories keep them whole.
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE grievances_complaint_fts USING fts5(
+        service_type, category, description,
+        content='grievances_complaint', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2 categories ''L* N* Co M*'''
+    )
+    """,
+    """
+    CREATE TRIGGER grievances_complaint_fts_insert AFTER INSERT ON grievances_complaint BEGIN
+        INSERT INTO grievances_complaint_fts (rowid, service_type, category, description)
+        VALUES (new.id, new.service_type, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER grievances_complaint_fts_delete AFTER DELETE ON grievances_complaint BEGIN
+        INSERT INTO grievances_complaint_fts (grievances_complaint_fts, rowid, service_type, category, description)
+        VALUES ('delete', old.id, old.service_type, old.category, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER grievances_complaint_fts_update AFTER UPDATE OF service_type, category, description
+    ON grievances_complaint BEGIN
+        INSERT INTO grievances_complaint_fts (grievances_complaint_fts, rowid, service_type, category, description)
+        VALUES ('delete', old.id, old.service_type, old.category, old.description);
+        INSERT INTO grievances_complaint_fts (rowid, service_type, category, description)
+        VALUES (new.id, new.service_type, new.category, new.description);
+    END
+    """,
+    "INSERT INTO grievances_complaint_fts (grievances_complaint_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS grievances_complaint_fts_insert",
+    "DROP TRIGGER IF EXISTS grievances_complaint_fts_delete",
+    "DROP TRIGGER IF EXISTS grievances_complaint_fts_update",
+    "DROP TABLE IF EXISTS grievances_complaint_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def install_search(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_INSTALL, 'sqlite': SQLITE_INSTALL})
+
+
+def uninstall_search(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_UNINSTALL, 'sqlite': SQLITE_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grievances", "0003_complaint_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="complaint",
+            name="language",
+            field=models.CharField(
+                choices=[
+                    ("en", "English"),
+                    ("hi", "Hindi"),
+                    ("ta", "Tamil"),
+                    ("te", "Telugu"),
+                    ("kn", "Kannada"),
+                    ("ml", "Malayalam"),
+                    ("mr", "Marathi"),
+                    ("bn", "Bengali"),
+                    ("gu", "Gujarati"),
+                    ("pa", "Punjabi"),
+                    ("or", "Odia"),
+                    ("as", "Assamese"),
+                    ("ur", "Urdu"),
+                    ("sa", "Sanskrit"),
+                    ("kok", "Konkani"),
+                    ("mai", "Maithili"),
+                    ("mni", "Manipuri"),
+                    ("ne", "Nepali"),
+                    ("brx", "Bodo"),
+                    ("sat", "Santhali"),
+                    ("ks", "Kashmiri"),
+                    ("doi", "Dogri"),
+                ],
+                default="en",
+                max_length=8,
+            ),
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grievances", "0004_complaint_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="complaint",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="duplicates",
+                to="grievances.complaint",
+            ),
+        ),
+        migrations.AddField(
+            model_name="complaint",
+            name="signature",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
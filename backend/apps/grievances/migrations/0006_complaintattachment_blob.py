@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grievances", "0005_complaint_dedup"),
+        ("uploads", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="complaintattachment",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="complaint_attachments",
+                to="uploads.storedblob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="complaintattachment",
+            name="filename",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="complaintattachment",
+            name="file_path",
+            field=models.FileField(blank=True, upload_to="grievances/attachments/"),
+        ),
+    ]
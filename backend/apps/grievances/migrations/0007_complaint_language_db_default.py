@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:42
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search = import_module("apps.grievances.migrations.0004_complaint_search")
+
+
+def install_fts_triggers(apps, schema_editor):
+    # SQLite rebuilds grievances_complaint to change the column, dropping the FTS triggers with it
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in search.SQLITE_INSTALL:
+            if 'CREATE TRIGGER' in statement:
+                schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grievances", "0006_complaintattachment_blob"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, install_fts_triggers),
+        migrations.AlterField(
+            model_name="complaint",
+            name="language",
+            field=models.CharField(
+                choices=[
+                    ("en", "English"),
+                    ("hi", "Hindi"),
+                    ("ta", "Tamil"),
+                    ("te", "Telugu"),
+                    ("kn", "Kannada"),
+                    ("ml", "Malayalam"),
+                    ("mr", "Marathi"),
+                    ("bn", "Bengali"),
+                    ("gu", "Gujarati"),
+                    ("pa", "Punjabi"),
+                    ("or", "Odia"),
+                    ("as", "Assamese"),
+                    ("ur", "Urdu"),
+                    ("sa", "Sanskrit"),
+                    ("kok", "Konkani"),
+                    ("mai", "Maithili"),
+                    ("mni", "Manipuri"),
+                    ("ne", "Nepali"),
+                    ("brx", "Bodo"),
+                    ("sat", "Santhali"),
+                    ("ks", "Kashmiri"),
+                    ("doi", "Dogri"),
+                ],
+                db_default="en",
+                default="en",
+                max_length=8,
+            ),
+        ),
+        migrations.RunPython(install_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -21,9 +21,19 @@ class Complaint(models.Model):
     description = models.TextField()
     priority = models.CharField(max_length=10, choices=Priority.choices, default=Priority.MEDIUM)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+    language = models.CharField(max_length=8, choices=settings.LANGUAGES, default='en', db_default='en')
+    # Earlier complaint this one near-duplicates, and the MinHash signature of the description (see dedup.py)
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
+    signature = models.BinaryField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='complaint_created_idx'),
+            models.Index(fields=['status'], name='complaint_status_idx'),
+        ]
+
 class ComplaintUpdate(models.Model):
     complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='updates')
     status = models.CharField(max_length=20)
@@ -33,5 +43,9 @@ class ComplaintUpdate(models.Model):
 
 class ComplaintAttachment(models.Model):
     complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='attachments')
-    file_path = models.FileField(upload_to='grievances/attachments/')
+    # Uploaded through apps.uploads: the content is a shared blob. file_path holds files from before.
+    blob = models.ForeignKey('uploads.StoredBlob', on_delete=models.PROTECT, null=True, blank=True,
+                             related_name='complaint_attachments')
+    filename = models.CharField(max_length=255, blank=True)
+    file_path = models.FileField(upload_to='grievances/attachments/', blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,157 @@
+"""
+Ranked full-text search over complaints.
+
+The index covers service_type and category (weighted above the text) and
+description, and is kept up to date by triggers installed by migration
+0004_complaint_search, so raw inserts and bulk updates are indexed too:
+
+* Postgres: a `search_vector` tsvector column (not on the model) with a GIN
+  index, built with the text search configuration of the complaint's
+  language (complaint_search_config(): english, hindi, tamil and nepali
+  have stemmers, every other language of settings.LANGUAGES uses 'simple').
+  The query is parsed with websearch_to_tsquery() for the language filter,
+  or with each configuration in use when there is none, and ranked with
+  ts_rank_cd().
+* SQLite: an external-content FTS5 table, grievances_complaint_fts, with the
+  porter + unicode61 tokenizer (English stemming; other scripts are split
+  on Unicode word boundaries, keeping vowel signs inside their word),
+  ranked with bm25().
+
+Queries take websearch-style input on both: words are ANDed, "quoted
+phrases" match as phrases, -word excludes and OR between terms.
+
+Only the newest COMPLAINT_SEARCH_CANDIDATES matches are ranked: a common
+word matches a large share of millions of complaints. FTS5 walks its
+matches in rowid order, so on SQLite the cap also stops the scan early.
+A GIN bitmap scan on Postgres returns matches in no useful order: every
+match is still read and rechecked, and a top-N sort on id keeps the
+newest, so there the cap bounds the rows ranked and sorted by rank, not
+the index scan.
+
+SQLite drops triggers with their table, so a later migration that makes
+Django rebuild grievances_complaint there must install them again.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Complaint
+
+FTS_TABLE = 'grievances_complaint_fts'
+
+# bm25() weights of the FTS5 columns: service_type, category, description
+FTS_WEIGHTS = (4.0, 4.0, 1.0)
+
+_TERM = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+
+_configs = None
+
+
+def language_codes():
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def _text_search_configs():
+    """The distinct Postgres configurations the LANGUAGES map to, looked up once per process."""
+    global _configs
+    if _configs is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT complaint_search_config(code)::text FROM unnest(%s::text[]) AS code",
+                [language_codes()],
+            )
+            _configs = sorted(row[0] for row in cursor.fetchall())
+    return _configs
+
+
+def fts5_query(text):
+    """A websearch-style query as an FTS5 MATCH expression, with every term quoted."""
+    positive, negative, pending_or = [], [], False
+    for match in _TERM.finditer(text):
+        excluded, phrase, word = match.groups()
+        if word is not None and word.upper() == 'OR':
+            pending_or = bool(positive)
+            continue
+        if word is not None and word.startswith('-') and len(word) > 1:
+            excluded, phrase = '-', word[1:]
+        term = (phrase if phrase is not None else word).replace('"', '').strip()
+        if not any(char.isalnum() for char in term):
+            # Nothing the tokenizer would index: the term could never match
+            continue
+        quoted = f'"{term}"'
+        if excluded:
+            negative.append(quoted)
+        elif pending_or:
+            positive[-1] = f"{positive[-1]} OR {quoted}"
+            pending_or = False
+        else:
+            positive.append(quoted)
+    if not positive:
+        return None
+    expression = ' AND '.join(f"({term})" if ' OR ' in term else term for term in positive)
+    for term in negative:
+        expression = f"({expression}) NOT {term}"
+    return expression
+
+
+def _filters(alias, status=None, priority=None, language=None, user=None):
+    clauses, params = [], []
+    for column, value in (('status', status), ('priority', priority), ('language', language), ('user_id', user)):
+        if value:
+            clauses.append(f"{alias}.{column} = %s")
+            params.append(value)
+    return clauses, params
+
+
+def _search_postgres(text, limit, offset, language=None, **filters):
+    table = Complaint._meta.db_table
+    if language:
+        query_sql, query_params = "websearch_to_tsquery(complaint_search_config(%s), %s)", [language, text]
+    else:
+        configs = _text_search_configs()
+        query_sql = ' || '.join(["websearch_to_tsquery(%s::regconfig, %s)"] * len(configs))
+        query_params = [value for config in configs for value in (config, text)]
+    clauses, params = _filters('c', language=language, **filters)
+    where = ''.join(f" AND {clause}" for clause in clauses)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, rank FROM ("
+            f"SELECT c.id, ts_rank_cd(c.search_vector, q.query) AS rank "
+            f"FROM {table} c, (SELECT {query_sql} AS query) q "
+            f"WHERE c.search_vector @@ q.query{where} ORDER BY c.id DESC LIMIT %s"
+            f") candidates ORDER BY rank DESC, id DESC LIMIT %s OFFSET %s",
+            [*query_params, *params, settings.COMPLAINT_SEARCH_CANDIDATES, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+def _search_sqlite(text, limit, offset, **filters):
+    match = fts5_query(text)
+    if match is None:
+        return []
+    table = Complaint._meta.db_table
+    clauses, params = _filters('c', **filters)
+    where = ''.join(f" AND {clause}" for clause in clauses)
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, rank FROM ("
+            f"SELECT c.id, -bm25({FTS_TABLE}, {weights}) AS rank "
+            f"FROM {FTS_TABLE} JOIN {table} c ON c.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s{where} ORDER BY {FTS_TABLE}.rowid DESC LIMIT %s"
+            f") ORDER BY rank DESC, id DESC LIMIT %s OFFSET %s",
+            [match, *params, settings.COMPLAINT_SEARCH_CANDIDATES, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+def search_complaints(text, limit=20, offset=0, status=None, priority=None, language=None, user=None):
+    """
+    Complaints matching `text`, best first, as a list of (complaint, rank).
+    `user` (a user id) restricts the search to that user's complaints.
+    """
+    search = _search_postgres if connection.vendor == 'postgresql' else _search_sqlite
+    hits = search(text, limit, offset, status=status, priority=priority, language=language, user=user)
+    complaints = Complaint.objects.defer('signature').in_bulk([pk for pk, _ in hits])
+    return [(complaints[pk], rank) for pk, rank in hits if pk in complaints]
@@ -1,13 +1,30 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Complaint, ComplaintUpdate
+from apps.uploads.serializers import BlobReferenceSerializer
+from .models import Complaint, ComplaintAttachment, ComplaintUpdate
 
 class ComplaintSerializer(serializers.ModelSerializer):
     class Meta:
         model = Complaint
-        fields = '__all__'
-        read_only_fields = ['complaint_id', 'status', 'created_at', 'resolved_at']
+        exclude = ['signature']
+        read_only_fields = ['complaint_id', 'status', 'parent', 'created_at', 'resolved_at']
 
 class ComplaintUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ComplaintUpdate
         fields = '__all__'
+
+class ComplaintAttachmentSerializer(BlobReferenceSerializer):
+    class Meta:
+        model = ComplaintAttachment
+        fields = ['id', 'upload_id', 'filename', 'size', 'content_type', 'uploaded_at']
+        read_only_fields = ['filename', 'uploaded_at']
+
+class ComplaintSearchSerializer(serializers.Serializer):
+    """Query parameters of GrievanceSearchView."""
+    q = serializers.CharField(max_length=200)
+    status = serializers.ChoiceField(choices=Complaint.Status.choices, required=False)
+    priority = serializers.ChoiceField(choices=Complaint.Priority.choices, required=False)
+    language = serializers.ChoiceField(choices=settings.LANGUAGES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    offset = serializers.IntegerField(min_value=0, max_value=1000, default=0)
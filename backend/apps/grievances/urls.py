@@ -1,8 +1,15 @@
 from django.urls import path
-from .views import SubmitGrievanceView, GrievanceListView, TrackGrievanceView
+from .views import (
+    SubmitGrievanceView, GrievanceListView, TrackGrievanceView, GrievanceSearchView, GrievanceAttachmentsView,
+    GrievanceAttachmentFileView,
+)
 
 urlpatterns = [
     path('submit/', SubmitGrievanceView.as_view(), name='grievance-submit'),
     path('list/', GrievanceListView.as_view(), name='grievance-list'),
     path('track/<str:complaint_id>/', TrackGrievanceView.as_view(), name='grievance-track'),
+    path('search/', GrievanceSearchView.as_view(), name='grievance-search'),
+    path('attachments/<str:complaint_id>/', GrievanceAttachmentsView.as_view(), name='grievance-attachments'),
+    path('attachments/<str:complaint_id>/<int:pk>/', GrievanceAttachmentFileView.as_view(),
+         name='grievance-attachment-file'),
 ]
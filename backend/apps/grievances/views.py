@@ -1,15 +1,29 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
-from .models import Complaint
-from .serializers import ComplaintSerializer
-import uuid
+from rest_framework.response import Response
+from .dedup import find_parent, index_complaint
+from .models import Complaint, ComplaintAttachment
+from .search import search_complaints
+from .serializers import ComplaintAttachmentSerializer, ComplaintSearchSerializer, ComplaintSerializer
+from apps.uploads.serving import serve_file, stored_file
+from utils.idempotency import IdempotencyMixin
+from utils.ids import new_id
 
-class SubmitGrievanceView(generics.CreateAPIView):
+class SubmitGrievanceView(IdempotencyMixin, generics.CreateAPIView):
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        cid = f"CMP-{uuid.uuid4().hex[:8].upper()}"
-        serializer.save(user=self.request.user, complaint_id=cid)
+        cid = new_id("CMP")
+        language = serializer.validated_data.get('language')
+        if language is None and self.request.user.language_preference in dict(settings.LANGUAGES):
+            language = self.request.user.language_preference
+        data = serializer.validated_data
+        signature, parent = find_parent(data['service_type'], data['category'], data['description'])
+        complaint = serializer.save(user=self.request.user, complaint_id=cid, language=language or 'en',
+                                    signature=signature, parent_id=parent)
+        index_complaint(complaint)
 
 class GrievanceListView(generics.ListAPIView):
     serializer_class = ComplaintSerializer
@@ -23,3 +37,65 @@ class TrackGrievanceView(generics.RetrieveAPIView):
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'complaint_id'
+
+class GrievanceAttachmentsView(generics.ListCreateAPIView):
+    """
+    Files attached to a complaint. A citizen attaches a completed upload
+    (apps.uploads) to their own complaint by its upload_id; staff can list any.
+    """
+    serializer_class = ComplaintAttachmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_complaint(self):
+        complaints = Complaint.objects.all()
+        if self.request.method != 'GET' or self.request.user.role not in ('ADMIN', 'SUPERADMIN'):
+            complaints = complaints.filter(user=self.request.user)
+        return get_object_or_404(complaints, complaint_id=self.kwargs['complaint_id'])
+
+    def get_queryset(self):
+        return ComplaintAttachment.objects.filter(complaint=self.get_complaint()).select_related('blob')
+
+    def perform_create(self, serializer):
+        serializer.save(complaint=self.get_complaint())
+
+class GrievanceAttachmentFileView(generics.GenericAPIView):
+    """
+    The file of one attachment, for the complaint's owner or staff. Access
+    and the file's name come from one query; the bytes are sent by the
+    front proxy or with sendfile (see apps.uploads.serving).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, complaint_id, pk):
+        attachments = ComplaintAttachment.objects.filter(pk=pk, complaint__complaint_id=complaint_id)
+        if request.user.role not in ('ADMIN', 'SUPERADMIN'):
+            attachments = attachments.filter(complaint__user=request.user)
+        stored = stored_file(attachments)
+        if stored is None:
+            return Response({'success': False, 'message': 'Attachment Not Found'}, status=404)
+        return serve_file(request, stored)
+
+class GrievanceSearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search over complaints (see search.py), filtered by
+    status, priority and language. Citizens only search their own.
+    """
+    serializer_class = ComplaintSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+        staff = request.user.role in ('ADMIN', 'SUPERADMIN')
+        hits = search_complaints(
+            options['q'], limit=options['limit'], offset=options['offset'],
+            status=options.get('status'), priority=options.get('priority'), language=options.get('language'),
+            user=None if staff else request.user.pk,
+        )
+        return Response({
+            'results': [{**ComplaintSerializer(complaint).data, 'rank': round(rank, 4)} for complaint, rank in hits],
+            'limit': options['limit'],
+            'offset': options['offset'],
+        })
@@ -8,6 +8,8 @@ class Notification(models.Model):
     notification_type = models.CharField(max_length=50) # ALERT, INFO, BILL
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by scheduled jobs so re-running them never notifies twice, e.g. 'bill-due:<bill_id>:<user_id>:3'
+    dedup_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
 
 class SystemAlert(models.Model):
     alert_type = models.CharField(max_length=50)
@@ -0,0 +1,137 @@
+"""
+SMS dispatch shared by every OTP path.
+
+`send_sms` only enqueues the message (thread pool, Celery or inline, see
+SMS_DISPATCH_MODE) and returns. Delivery walks the gateways configured in
+SMS_GATEWAYS in order, retrying each one a bounded number of times before
+failing over to the next. Gateway clients are built once per process so
+their HTTP connection pools are reused between messages.
+"""
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class SMSGatewayError(Exception):
+    pass
+
+
+class BaseSMSGateway:
+    name = 'base'
+
+    def send(self, to, body):
+        """Sends one message and returns the provider's message id."""
+        raise NotImplementedError
+
+
+class TwilioGateway(BaseSMSGateway):
+    name = 'twilio'
+
+    def __init__(self, account_sid, auth_token, from_number, pool_size=10, timeout=10):
+        from requests.adapters import HTTPAdapter
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        http_client = TwilioHttpClient(pool_connections=True, timeout=timeout)
+        http_client.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.client = Client(account_sid, auth_token, http_client=http_client)
+        self.from_number = from_number
+
+    def send(self, to, body):
+        from twilio.base.exceptions import TwilioException
+
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_number, to=to)
+        except TwilioException as e:
+            raise SMSGatewayError(str(e)) from e
+        return message.sid
+
+
+class ConsoleGateway(BaseSMSGateway):
+    """Development fallback used when no provider credentials are configured."""
+    name = 'console'
+
+    def send(self, to, body):
+        print("==========================================")
+        print(f"[MOCK SMS] To: {to} | {body}")
+        print("==========================================")
+        return 'console'
+
+
+class FakeGateway(BaseSMSGateway):
+    """
+    Local stand-in for load tests: waits `latency_ms` per message (plus up
+    to `jitter_ms`) and fails with probability `failure_rate`.
+    """
+    name = 'fake'
+
+    def __init__(self, latency_ms=100, jitter_ms=0, failure_rate=0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.failure_rate = failure_rate
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        if random.random() < self.failure_rate:
+            raise SMSGatewayError("Injected fake gateway failure")
+        with self._lock:
+            self.sent += 1
+            sid = f"fake-{self.sent}"
+        return sid
+
+
+@lru_cache(maxsize=None)
+def get_gateways():
+    """Builds the configured gateways once per process, in failover order."""
+    gateways = []
+    for config in settings.SMS_GATEWAYS:
+        gateway_class = import_string(config['BACKEND'])
+        gateways.append(gateway_class(**config.get('OPTIONS', {})))
+    return tuple(gateways)
+
+
+def deliver(to, body):
+    """
+    Sends `body` to `to`, retrying each gateway up to SMS_MAX_ATTEMPTS times
+    with exponential backoff before failing over. Returns True on success.
+    """
+    backoff = settings.SMS_RETRY_BACKOFF_SECONDS
+    for gateway in get_gateways():
+        for attempt in range(settings.SMS_MAX_ATTEMPTS):
+            try:
+                sid = gateway.send(to, body)
+                logger.info(f"SMS sent to {to} via {gateway.name}: {sid}")
+                return True
+            except Exception as e:
+                logger.warning(f"SMS to {to} via {gateway.name} failed (attempt {attempt + 1}): {e}")
+                if attempt + 1 < settings.SMS_MAX_ATTEMPTS:
+                    time.sleep(backoff * (2 ** attempt))
+    logger.error(f"Failed to send SMS to {to}: all gateways exhausted.")
+    return False
+
+
+def send_sms(to, body):
+    """Queues an SMS for delivery. Returns True once the message is enqueued."""
+    mode = settings.SMS_DISPATCH_MODE
+    try:
+        if mode == 'celery':
+            from .tasks import send_sms_task
+            send_sms_task.delay(to, body)
+        elif mode == 'thread':
+            from utils.background import submit
+            submit(deliver, to, body)
+        else:
+            return deliver(to, body)
+    except Exception as e:
+        logger.error(f"Failed to enqueue SMS to {to}: {e}")
+        return False
+    return True
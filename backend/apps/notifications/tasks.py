@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .sms import deliver
+
+
+@shared_task(ignore_result=True)
+def send_sms_task(to, body):
+    deliver(to, body)
@@ -0,0 +1,40 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.reconciliation import ReconciliationError, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Reconciles a gateway settlement CSV against Payment, applying status corrections in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with payment_id,transaction_id,amount,status,settlement_reference')
+        parser.add_argument('--date', type=date.fromisoformat, default=None,
+                            help='Settlement date YYYY-MM-DD (default: yesterday)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Lines matched and corrected per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report only; write no corrections or discrepancies')
+
+    def handle(self, *args, **kwargs):
+        settlement_date = kwargs['date'] or date.today() - timedelta(days=1)
+        start = time.perf_counter()
+
+        def progress(run, rate):
+            self.stdout.write(f"  {run.lines} lines, {rate:,.0f} lines/s")
+
+        try:
+            run = reconcile(
+                kwargs['path'], settlement_date,
+                batch_size=kwargs['batch_size'], apply=not kwargs['dry_run'], on_batch=progress,
+            )
+        except (ReconciliationError, OSError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        kinds = ', '.join(f"{count} {kind.lower()}" for kind, count in run.kinds.items() if count) or 'none'
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Dry run' if kwargs['dry_run'] else f'Run {run.pk}'}: {run.lines} lines in {elapsed:.1f}s "
+            f"({run.lines / elapsed:,.0f} lines/s); {run.matched} matched, {run.corrected} corrected, "
+            f"discrepancies: {kinds}."
+        ))
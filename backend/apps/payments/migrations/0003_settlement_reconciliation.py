@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0006_meter_reading_block"),
+        ("payments", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SettlementDiscrepancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("MISSING", "Successful payment not in settlement"),
+                            ("EXTRA", "Settled transaction with no payment"),
+                            ("AMOUNT_MISMATCH", "Amount mismatch"),
+                            ("STATUS_MISMATCH", "Status mismatch"),
+                            ("DUPLICATE", "Duplicate settlement line"),
+                            ("INVALID", "Unreadable settlement line"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("line_number", models.BigIntegerField(blank=True, null=True)),
+                ("payment_id", models.CharField(blank=True, max_length=50)),
+                ("transaction_id", models.CharField(blank=True, max_length=100)),
+                (
+                    "expected_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=12, null=True
+                    ),
+                ),
+                (
+                    "settled_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=12, null=True
+                    ),
+                ),
+                ("payment_status", models.CharField(blank=True, max_length=20)),
+                ("settled_status", models.CharField(blank=True, max_length=20)),
+                ("detail", models.CharField(blank=True, max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SettlementRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("settlement_date", models.DateField()),
+                ("source", models.CharField(max_length=500)),
+                ("lines", models.BigIntegerField(default=0)),
+                ("matched", models.BigIntegerField(default=0)),
+                ("corrected", models.BigIntegerField(default=0)),
+                ("discrepancies", models.BigIntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["timestamp"], name="payment_timestamp_idx"),
+        ),
+        migrations.AddField(
+            model_name="settlementdiscrepancy",
+            name="run",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="discrepancy_set",
+                to="payments.settlementrun",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="settlementdiscrepancy",
+            index=models.Index(fields=["run", "kind"], name="settlement_disc_kind_idx"),
+        ),
+    ]
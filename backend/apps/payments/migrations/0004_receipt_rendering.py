@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0003_settlement_reconciliation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paymentreceipt",
+            name="etag",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="paymentreceipt",
+            name="rendered",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="paymentreceipt",
+            name="rendered_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -24,6 +24,9 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.INITIATED)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['timestamp'], name='payment_timestamp_idx')]
+
     def __str__(self):
         return f"{self.payment_id} - {self.status}"
 
@@ -32,3 +35,44 @@ class PaymentReceipt(models.Model):
     receipt_number = models.CharField(max_length=50, unique=True)
     receipt_data = models.JSONField(help_text="Full receipt details for printing")
     generated_at = models.DateTimeField(auto_now_add=True)
+    # Printable receipt written by apps.payments.receipts; empty until rendered
+    rendered = models.BinaryField(null=True, blank=True, editable=False)
+    etag = models.CharField(max_length=64, blank=True)
+    rendered_at = models.DateTimeField(null=True, blank=True)
+
+class SettlementRun(models.Model):
+    """One reconciliation of a gateway settlement file (see apps.payments.reconciliation)."""
+    settlement_date = models.DateField()
+    source = models.CharField(max_length=500)
+    lines = models.BigIntegerField(default=0)
+    matched = models.BigIntegerField(default=0)
+    corrected = models.BigIntegerField(default=0)
+    discrepancies = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.settlement_date}, {self.lines} lines)"
+
+class SettlementDiscrepancy(models.Model):
+    class Kind(models.TextChoices):
+        MISSING = 'MISSING', 'Successful payment not in settlement'
+        EXTRA = 'EXTRA', 'Settled transaction with no payment'
+        AMOUNT_MISMATCH = 'AMOUNT_MISMATCH', 'Amount mismatch'
+        STATUS_MISMATCH = 'STATUS_MISMATCH', 'Status mismatch'
+        DUPLICATE = 'DUPLICATE', 'Duplicate settlement line'
+        INVALID = 'INVALID', 'Unreadable settlement line'
+
+    run = models.ForeignKey(SettlementRun, on_delete=models.CASCADE, related_name='discrepancy_set')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    line_number = models.BigIntegerField(null=True, blank=True)  # None for MISSING
+    payment_id = models.CharField(max_length=50, blank=True)
+    transaction_id = models.CharField(max_length=100, blank=True)
+    expected_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    settled_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    payment_status = models.CharField(max_length=20, blank=True)
+    settled_status = models.CharField(max_length=20, blank=True)
+    detail = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['run', 'kind'], name='settlement_disc_kind_idx')]
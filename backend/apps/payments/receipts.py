@@ -0,0 +1,165 @@
+"""
+Pre-rendered printable receipts.
+
+When a payment succeeds, render_receipts() is scheduled (after the commit,
+per RECEIPT_RENDER_MODE) to build the full receipt once: payment, bill,
+consumer and line items, laid out as RECEIPT_WIDTH-column plain text for the
+kiosk's thermal printer. The bytes, their ETag and the structured data are
+stored on PaymentReceipt, so ReceiptView serves a receipt with one indexed
+lookup and never formats anything on the request path. A receipt requested
+before the worker got to it is rendered on the spot without being stored,
+leaving the write to the worker.
+
+The text only depends on stored data, so rendering again yields the same
+bytes and ETag.
+"""
+import hashlib
+import logging
+import textwrap
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.billing.accounts import ACCOUNT_MODELS
+from apps.billing.models import BillLineItem
+from .models import PaymentReceipt
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; charset=utf-8'
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def _row(label, value, width):
+    """`label` left and `value` right aligned; the label wraps if both do not fit on one line."""
+    value = str(value)
+    label_width = max(width - len(value) - 1, 1)
+    lines = textwrap.wrap(label, label_width) or ['']
+    lines[-1] = f"{lines[-1]:<{label_width}} {value:>{width - label_width - 1}}"
+    return lines
+
+
+def _field(label, value, width):
+    prefix = f"{label:<11}: "
+    return textwrap.wrap(str(value or '-'), width, initial_indent=prefix, subsequent_indent=' ' * len(prefix))
+
+
+def build_receipt(receipt, account, items):
+    """(receipt_data dict, printable text) for a receipt with its payment and bill loaded."""
+    payment, bill = receipt.payment, receipt.payment.bill
+    paid_at = timezone.localtime(receipt.generated_at)
+    data = {
+        'receipt_number': receipt.receipt_number,
+        'payment_id': payment.payment_id,
+        'transaction_id': payment.transaction_id,
+        'payment_method': payment.payment_method,
+        'amount': _money(payment.amount),
+        'date': paid_at.isoformat(),
+        'bill': {
+            'bill_id': bill.bill_id,
+            'account_type': bill.account_type,
+            'bill_date': bill.bill_date.isoformat(),
+            'due_date': bill.due_date.isoformat(),
+            'amount': _money(bill.amount),
+            'arrears': _money(bill.arrears),
+            'line_items': [
+                {'description': description, 'amount': _money(amount), 'quantity': f"{quantity:.2f}"}
+                for description, amount, quantity in items
+            ],
+        },
+        'consumer': {
+            'consumer_number': bill.consumer_number,
+            'account_holder': account[0] if account else None,
+            'address': account[1] if account else None,
+        },
+    }
+
+    width = settings.RECEIPT_WIDTH
+    rule = '-' * width
+    lines = [settings.RECEIPT_TITLE.center(width).rstrip(), 'PAYMENT RECEIPT'.center(width).rstrip(), rule]
+    lines += _field('Receipt No', receipt.receipt_number, width)
+    lines += _field('Payment ID', payment.payment_id, width)
+    lines += _field('Txn ID', payment.transaction_id, width)
+    lines += _field('Paid on', paid_at.strftime('%d %b %Y %H:%M'), width)
+    lines += _field('Method', payment.get_payment_method_display(), width)
+    lines.append(rule)
+    lines += _field('Consumer', bill.consumer_number, width)
+    lines += _field('Name', data['consumer']['account_holder'], width)
+    lines += _field('Address', data['consumer']['address'], width)
+    lines += _field('Bill', f"{bill.bill_id} ({bill.get_account_type_display()})", width)
+    lines += _field('Bill date', bill.bill_date.strftime('%d %b %Y'), width)
+    lines += _field('Due date', bill.due_date.strftime('%d %b %Y'), width)
+    lines.append(rule)
+    for item in data['bill']['line_items']:
+        label = item['description'] if item['quantity'] == '1.00' else f"{item['description']} x {item['quantity']}"
+        lines += _row(label, item['amount'], width)
+    if items:
+        lines.append(rule)
+    lines += _row('Bill amount', data['bill']['amount'], width)
+    lines += _row('Arrears', data['bill']['arrears'], width)
+    lines += _row('AMOUNT PAID', f"Rs {data['amount']}", width)
+    lines += [rule, 'Thank you.'.center(width).rstrip(), '']
+    return data, '\n'.join(lines)
+
+
+def render_receipts(*payment_pks, save=True):
+    """Renders the receipts of the given payments and, with `save`, stores them. Returns the receipts."""
+    receipts = list(
+        PaymentReceipt.objects.filter(payment_id__in=payment_pks)
+        .select_related('payment', 'payment__bill')
+        .defer('rendered')
+    )
+    if not receipts:
+        return []
+    bill_ids = {receipt.payment.bill_id for receipt in receipts}
+    items = {}
+    for bill_id, description, amount, quantity in (
+        BillLineItem.objects.filter(bill_id__in=bill_ids).order_by('bill_id', 'id')
+        .values_list('bill_id', 'description', 'amount', 'quantity')
+    ):
+        items.setdefault(bill_id, []).append((description, amount, quantity))
+    accounts = {}
+    for account_type, model in ACCOUNT_MODELS.items():
+        consumers = {r.payment.bill.consumer_number for r in receipts if r.payment.bill.account_type == account_type}
+        if consumers:
+            for consumer_number, holder, address in model.objects.filter(consumer_number__in=consumers).values_list(
+                    'consumer_number', 'account_holder', 'address'):
+                accounts[account_type, consumer_number] = (holder, address)
+
+    now = timezone.now()
+    for receipt in receipts:
+        bill = receipt.payment.bill
+        data, text = build_receipt(
+            receipt, accounts.get((bill.account_type, bill.consumer_number)), items.get(bill.bill_id, []),
+        )
+        receipt.receipt_data = data
+        receipt.rendered = text.encode('utf-8')
+        receipt.etag = hashlib.sha256(receipt.rendered).hexdigest()[:32]
+        receipt.rendered_at = now
+    if save:
+        PaymentReceipt.objects.bulk_update(receipts, ['receipt_data', 'rendered', 'etag', 'rendered_at'])
+    return receipts
+
+
+def schedule_render(*payment_pks):
+    """Renders the receipts once the current transaction commits, per RECEIPT_RENDER_MODE."""
+    def dispatch():
+        mode = settings.RECEIPT_RENDER_MODE
+        try:
+            if mode == 'celery':
+                from .tasks import render_receipts_task
+                render_receipts_task.delay(list(payment_pks))
+            elif mode == 'thread':
+                from utils.background import submit
+                submit(render_receipts, *payment_pks)
+            else:
+                render_receipts(*payment_pks)
+        except Exception as e:
+            # ReceiptView still renders it on request, just on every request
+            logger.error(f"Failed to schedule receipt rendering for {len(payment_pks)} payments: {e}")
+
+    transaction.on_commit(dispatch)
@@ -0,0 +1,295 @@
+"""
+Streaming reconciliation of gateway settlement files against Payment.
+
+A settlement file is a CSV with a header row and one settled transaction
+per line:
+
+    payment_id, transaction_id, amount, status, settlement_reference
+
+(transaction_id and settlement_reference may be empty; status is SUCCESS,
+FAILURE or REFUNDED). The file is read lazily in batches of `batch_size`
+lines, so its size does not matter. The payments initiated on the
+settlement date are loaded once, in keyed batches, into a hash index from
+payment_id to (pk, amount in paise, status); lines for other days' payments
+are looked up per batch with one payment_id__in query.
+
+Every line is then either matched, corrected or recorded as a
+SettlementDiscrepancy:
+
+* matched: same amount and status;
+* corrected: the gateway settled an INITIATED payment (SUCCESS/FAILURE) or
+  refunded a SUCCESS one. Corrections are applied per batch in one
+  transaction, re-checking the status under select_for_update so a payment
+  verified meanwhile is left alone; newly successful payments get their bill
+  closed and a receipt, as in transitions.verify_payment;
+* AMOUNT_MISMATCH, STATUS_MISMATCH, EXTRA (no such payment), DUPLICATE and
+  INVALID lines are recorded and never applied.
+
+Successful payments of the day that no line mentioned are recorded as
+MISSING at the end. Memory is bounded by the day's payments plus one batch.
+"""
+import csv
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Payment, PaymentReceipt, SettlementDiscrepancy, SettlementRun
+from .receipts import schedule_render
+from .signals import payment_status_changed
+from .transitions import close_bills, forget_results, new_receipt
+
+Kind = SettlementDiscrepancy.Kind
+
+COLUMNS = ('payment_id', 'transaction_id', 'amount', 'status', 'settlement_reference')
+REQUIRED_COLUMNS = ('payment_id', 'amount', 'status')
+SETTLED_STATUSES = {Payment.Status.SUCCESS, Payment.Status.FAILURE, Payment.Status.REFUNDED}
+
+# (current status, settled status) pairs the settlement file is allowed to apply
+CORRECTIONS = {
+    (Payment.Status.INITIATED, Payment.Status.SUCCESS),
+    (Payment.Status.INITIATED, Payment.Status.FAILURE),
+    (Payment.Status.SUCCESS, Payment.Status.REFUNDED),
+}
+
+Line = namedtuple('Line', ['line_number', 'payment_id', 'transaction_id', 'amount', 'status', 'reference'])
+
+
+class ReconciliationError(Exception):
+    pass
+
+
+def parse_paise(text):
+    """'1234.5' -> 123450, without going through Decimal. Raises ValueError."""
+    whole, _, fraction = text.strip().partition('.')
+    if len(fraction) > 2 or not whole.lstrip('-').isdigit() or (fraction and not fraction.isdigit()):
+        raise ValueError(f"amount: {text!r} is not an amount in rupees")
+    paise = abs(int(whole)) * 100 + int(fraction.ljust(2, '0') or 0)
+    return -paise if whole.startswith('-') else paise
+
+
+def _rupees(paise):
+    return None if paise is None else Decimal(paise).scaleb(-2)
+
+
+def read_settlement(path):
+    """Yields a Line, or (line_number, error) for unreadable lines, per line of a settlement CSV."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise ReconciliationError(f"{path}: missing columns {', '.join(missing)}")
+        index = [header.index(name) if name in header else None for name in COLUMNS]
+        width = max(i for i in index if i is not None) + 1
+        pid, tx, amount, status, reference = index
+
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                yield reader.line_num, f"expected {width} columns, got {len(row)}"
+                continue
+            settled_status = row[status].strip().upper()
+            if settled_status not in SETTLED_STATUSES:
+                yield reader.line_num, f"status: {row[status]!r} is not a settlement status"
+                continue
+            try:
+                paise = parse_paise(row[amount])
+            except ValueError as e:
+                yield reader.line_num, str(e)
+                continue
+            yield Line(
+                reader.line_num,
+                row[pid].strip(),
+                row[tx].strip() if tx is not None else '',
+                paise,
+                settled_status,
+                row[reference].strip() if reference is not None else '',
+            )
+
+
+def load_day_index(day, batch_size=50000):
+    """{payment_id: (pk, amount in paise, status)} for payments initiated on `day`, read in keyed batches."""
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    payments = Payment.objects.filter(timestamp__gte=start, timestamp__lt=start + timedelta(days=1))
+    index = {}
+    last_pk = 0
+    while True:
+        rows = list(
+            payments.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'payment_id', 'amount', 'status')[:batch_size]
+        )
+        for pk, payment_id, amount, status in rows:
+            # Interned so millions of entries share one string per status
+            index[payment_id] = (pk, int(amount * 100), sys.intern(status))
+        if len(rows) < batch_size:
+            return index
+        last_pk = rows[-1][0]
+
+
+def _discrepancy(run, kind, line=None, payment=None, detail=''):
+    return SettlementDiscrepancy(
+        run=run,
+        kind=kind,
+        line_number=line.line_number if line else None,
+        payment_id=line.payment_id if line else payment[0],
+        transaction_id=line.transaction_id if line else '',
+        expected_amount=_rupees(payment[2]) if payment else None,
+        settled_amount=_rupees(line.amount) if line else None,
+        payment_status=payment[3] if payment else '',
+        settled_status=line.status if line else '',
+        detail=detail,
+    )
+
+
+def apply_corrections(corrections):
+    """
+    Applies (pk, expected current status, Line) corrections in one
+    transaction. Returns the pks of the payments corrected; those whose
+    status moved on since they were read are skipped.
+    """
+    if not corrections:
+        return set()
+    wanted = {pk: (expected, line) for pk, expected, line in corrections}
+    with transaction.atomic():
+        payments = list(
+            Payment.objects.select_for_update(of=('self',)).filter(pk__in=wanted).select_related('bill')
+            .only('pk', 'payment_id', 'status', 'amount', 'payment_method', 'timestamp', 'transaction_id',
+                  'gateway_reference', 'bill_id', 'bill__consumer_number', 'bill__account_type')
+        )
+        changed, changes = [], []
+        for payment in payments:
+            expected, line = wanted[payment.pk]
+            if payment.status != expected:
+                continue
+            changes.append({
+                'timestamp': payment.timestamp,
+                'amount': payment.amount,
+                'payment_method': payment.payment_method,
+                'account_type': payment.bill.account_type,
+                'old_status': payment.status,
+                'status': line.status,
+            })
+            payment.status = line.status
+            payment.transaction_id = line.transaction_id or payment.transaction_id
+            payment.gateway_reference = line.reference or payment.gateway_reference
+            changed.append(payment)
+        # One parameterised UPDATE per row through executemany: bulk_update's CASE
+        # expressions cost more to build than the update itself
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {qn(Payment._meta.db_table)} SET {qn('status')} = %s, {qn('transaction_id')} = %s, "
+                f"{qn('gateway_reference')} = %s WHERE {qn('id')} = %s",
+                [(p.status, p.transaction_id, p.gateway_reference, p.pk) for p in changed],
+            )
+
+        payment_status_changed.send(Payment, changes=changes)
+
+        paid = [payment for payment in changed if payment.status == Payment.Status.SUCCESS]
+        if paid:
+            close_bills([p.bill_id for p in paid], sorted({p.bill.consumer_number for p in paid}))
+            PaymentReceipt.objects.bulk_create([new_receipt(p.pk, p.amount) for p in paid], ignore_conflicts=True)
+            schedule_render(*(p.pk for p in paid))
+        transaction.on_commit(lambda: forget_results(*(p.payment_id for p in changed)))
+    return {payment.pk for payment in changed}
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def reconcile(path, settlement_date, batch_size=10000, apply=True, on_batch=None):
+    """
+    Reconciles the settlement file at `path` for `settlement_date`. With
+    `apply=False` nothing is written and the run is not saved. Calls
+    `on_batch(run, lines_per_second)` after every batch and returns the
+    SettlementRun, whose discrepancy counts per kind are in `run.kinds`.
+    """
+    run = SettlementRun(settlement_date=settlement_date, source=str(path))
+    if apply:
+        run.save()
+    run.kinds = dict.fromkeys(Kind.values, 0)
+    index = load_day_index(settlement_date)
+    start = time.perf_counter()
+
+    def flag(discrepancies, *args, **kwargs):
+        discrepancy = _discrepancy(run, *args, **kwargs)
+        run.kinds[discrepancy.kind] += 1
+        discrepancies.append(discrepancy)
+
+    for batch in _batches(read_settlement(path), batch_size):
+        discrepancies, corrections, found, unknown = [], [], [], []
+        for line in batch:
+            if not isinstance(line, Line):
+                flag(discrepancies, Kind.INVALID, Line(line[0], '', '', None, '', ''), detail=line[1])
+            elif line.payment_id not in index:
+                unknown.append(line)
+            elif index[line.payment_id] is None:
+                flag(discrepancies, Kind.DUPLICATE, line)
+            else:
+                found.append((line, index[line.payment_id]))
+                index[line.payment_id] = None
+
+        if unknown:
+            others = {
+                payment_id: (pk, int(amount * 100), status)
+                for pk, payment_id, amount, status in Payment.objects.filter(
+                    payment_id__in=[line.payment_id for line in unknown],
+                ).values_list('pk', 'payment_id', 'amount', 'status')
+            }
+            found.extend((line, others.get(line.payment_id)) for line in unknown)
+
+        for line, entry in found:
+            if entry is None:
+                flag(discrepancies, Kind.EXTRA, line)
+                continue
+            payment = (line.payment_id, *entry)
+            pk, amount, status = entry
+            if amount != line.amount:
+                flag(discrepancies, Kind.AMOUNT_MISMATCH, line, payment)
+            elif status == line.status:
+                run.matched += 1
+            elif (status, line.status) in CORRECTIONS:
+                corrections.append((pk, status, line))
+            else:
+                flag(discrepancies, Kind.STATUS_MISMATCH, line, payment)
+
+        applied = apply_corrections(corrections) if apply else {pk for pk, _, _ in corrections}
+        run.corrected += len(applied)
+        for pk, status, line in corrections:
+            if pk not in applied:
+                flag(discrepancies, Kind.STATUS_MISMATCH, line, (line.payment_id, pk, line.amount, status),
+                     detail='Payment status changed during reconciliation')
+        run.lines += len(batch)
+        run.discrepancies = sum(run.kinds.values())
+        if apply:
+            SettlementDiscrepancy.objects.bulk_create(discrepancies)
+            run.save(update_fields=['lines', 'matched', 'corrected', 'discrepancies'])
+        if on_batch:
+            on_batch(run, run.lines / (time.perf_counter() - start))
+
+    missing = (
+        (payment_id, *entry) for payment_id, entry in index.items()
+        if entry is not None and entry[2] == Payment.Status.SUCCESS
+    )
+    for batch in _batches(missing, batch_size):
+        discrepancies = []
+        for payment in batch:
+            flag(discrepancies, Kind.MISSING, payment=payment)
+        if apply:
+            SettlementDiscrepancy.objects.bulk_create(discrepancies)
+
+    run.discrepancies = sum(run.kinds.values())
+    run.finished_at = timezone.now()
+    if apply:
+        run.save(update_fields=['discrepancies', 'finished_at'])
+    return run
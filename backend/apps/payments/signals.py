@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent inside the transaction when payments change status through conditional
+# or bulk updates (transitions.verify_payment, settlement corrections), which
+# bypass post_save. `changes` is a list of dicts with the payment's timestamp,
+# amount, payment_method, account_type (of its bill), old_status and status.
+payment_status_changed = Signal()
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .receipts import render_receipts
+
+
+@shared_task(ignore_result=True)
+def render_receipts_task(payment_pks):
+    render_receipts(*payment_pks)
@@ -0,0 +1,137 @@
+"""
+Payment state transitions that are safe under concurrent callbacks.
+
+Gateway callbacks and kiosk polls may report the same outcome for the same
+payment several times, concurrently. Each transition is one short
+transaction that starts with a conditional UPDATE (`... WHERE status =
+'INITIATED'`), so exactly one caller wins. Only the winner closes the bill
+and creates the receipt. Everyone else gets the stored result:
+
+* same outcome and transaction id as what was recorded: a duplicate, answered
+  with the same result (served from the cache once known, without queries);
+* anything else: a conflict, which the caller reports as 409.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.billing.accounts import invalidate_household, owners_of
+from apps.billing.cache import invalidate_bills
+from apps.billing.models import Bill
+from utils.ids import new_id
+from .models import Payment, PaymentReceipt
+from .receipts import schedule_render
+from .signals import payment_status_changed
+
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'
+CONFLICT = 'conflict'
+NOT_FOUND = 'not_found'
+
+# Target states a gateway may report for a payment that is still INITIATED
+FINAL_STATES = (Payment.Status.SUCCESS, Payment.Status.FAILURE)
+
+Transition = namedtuple('Transition', ['outcome', 'payment_id', 'status', 'transaction_id', 'receipt_number'])
+
+
+def _result_key(payment_id):
+    return f"payment-result:{payment_id}"
+
+
+def _remember(result):
+    cache.set(_result_key(result.payment_id), tuple(result), settings.PAYMENT_RESULT_TTL)
+
+
+def forget_results(*payment_ids):
+    """Drops remembered outcomes, for payments whose status is changed outside verify_payment."""
+    cache.delete_many([_result_key(payment_id) for payment_id in payment_ids])
+
+
+def new_receipt(payment_pk, amount):
+    """An unsaved receipt for a payment that just succeeded; schedule_render() fills in the rest."""
+    return PaymentReceipt(
+        payment_id=payment_pk,
+        receipt_number=new_id("REC"),
+        receipt_data={"amount": str(amount), "date": str(timezone.now())},
+    )
+
+
+def _settled(status, transaction_id, recorded):
+    """Classifies a callback for a payment that already left INITIATED."""
+    outcome = DUPLICATE if (recorded.status, recorded.transaction_id) == (status, transaction_id) else CONFLICT
+    return recorded._replace(outcome=outcome)
+
+
+def _recorded(payment_id):
+    row = (
+        Payment.objects.filter(payment_id=payment_id)
+        .values_list('status', 'transaction_id', 'receipt__receipt_number').first()
+    )
+    if row is None:
+        return None
+    return Transition(None, payment_id, *row)
+
+
+def close_bills(bill_ids, consumer_numbers):
+    """Marks the bills PAID and drops the cached views of them once the transaction commits."""
+    Bill.objects.filter(pk__in=bill_ids).exclude(status=Bill.Status.PAID).update(status=Bill.Status.PAID)
+
+    def invalidate():
+        invalidate_bills(*consumer_numbers)
+        invalidate_household(*owners_of(consumer_numbers))
+
+    transaction.on_commit(invalidate)
+
+
+def verify_payment(payment_id, status, transaction_id):
+    """
+    Records the gateway's final `status` for a payment. Returns a Transition
+    whose outcome is APPLIED, DUPLICATE, CONFLICT or NOT_FOUND.
+    """
+    if status not in FINAL_STATES:
+        raise ValueError(f"Cannot verify a payment as {status}")
+
+    cached = cache.get(_result_key(payment_id))
+    if cached is not None:
+        return _settled(status, transaction_id, Transition(*cached))
+
+    payment = (
+        Payment.objects.filter(payment_id=payment_id)
+        .values('id', 'status', 'amount', 'payment_method', 'timestamp', 'bill_id', 'bill__consumer_number',
+                'bill__account_type').first()
+    )
+    if payment is None:
+        return Transition(NOT_FOUND, payment_id, None, None, None)
+
+    if payment['status'] == Payment.Status.INITIATED:
+        receipt_number = None
+        with transaction.atomic():
+            won = Payment.objects.filter(payment_id=payment_id, status=Payment.Status.INITIATED).update(
+                status=status, transaction_id=transaction_id,
+            )
+            if won:
+                payment_status_changed.send(Payment, changes=[{
+                    'timestamp': payment['timestamp'],
+                    'amount': payment['amount'],
+                    'payment_method': payment['payment_method'],
+                    'account_type': payment['bill__account_type'],
+                    'old_status': Payment.Status.INITIATED,
+                    'status': status,
+                }])
+            if won and status == Payment.Status.SUCCESS:
+                close_bills([payment['bill_id']], [payment['bill__consumer_number']])
+                receipt = new_receipt(payment['id'], payment['amount'])
+                receipt.save()
+                receipt_number = receipt.receipt_number
+                schedule_render(payment['id'])
+        if won:
+            result = Transition(APPLIED, payment_id, status, transaction_id, receipt_number)
+            _remember(result)
+            return result
+
+    recorded = _recorded(payment_id)
+    _remember(recorded)
+    return _settled(status, transaction_id, recorded)
@@ -1,18 +1,21 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from .models import Payment, PaymentReceipt
-from apps.billing.models import Bill
-from .serializers import PaymentSerializer, PaymentInitiateSerializer, PaymentVerifySerializer
-from django.utils import timezone
-import uuid
+from .receipts import CONTENT_TYPE as RECEIPT_CONTENT_TYPE, render_receipts
+from .serializers import PaymentInitiateSerializer, PaymentVerifySerializer
+from .transitions import CONFLICT, NOT_FOUND, verify_payment
+from utils.idempotency import IdempotencyMixin
+from utils.ids import new_id
 
-class InitiatePaymentView(generics.CreateAPIView):
+class InitiatePaymentView(IdempotencyMixin, generics.CreateAPIView):
     serializer_class = PaymentInitiateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
         # Generate ID
-        pid = f"PAY-{uuid.uuid4().hex[:8].upper()}"
+        pid = new_id("PAY")
         serializer.save(user=self.request.user, payment_id=pid, status=Payment.Status.INITIATED)
 
 class VerifyPaymentView(generics.GenericAPIView):
@@ -21,36 +24,46 @@ class VerifyPaymentView(generics.GenericAPIView):
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
-            pid = serializer.validated_data['payment_id']
-            status_val = serializer.validated_data['status']
-            tx_id = serializer.validated_data['transaction_id']
-
-            try:
-                payment = Payment.objects.get(payment_id=pid)
-                payment.status = status_val
-                payment.transaction_id = tx_id
-                payment.save()
-
-                if status_val == 'SUCCESS':
-                    # Close Bill
-                     payment.bill.status = Bill.Status.PAID
-                     payment.bill.save()
-                     
-                     # Generate Receipt
-                     PaymentReceipt.objects.create(
-                         payment=payment,
-                         receipt_number=f"REC-{uuid.uuid4().hex[:8].upper()}",
-                         receipt_data={"amount": str(payment.amount), "date": str(timezone.now())}
-                     )
-
-                return Response({'success': True, 'status': payment.status})
-            except Payment.DoesNotExist:
-                return Response({'success': False, 'message': 'Payment Not Found'}, status=404)
-        return Response(serializer.errors, status=400)
-
-class ReceiptView(generics.RetrieveAPIView):
-    queryset = Payment.objects.all()
-    serializer_class = PaymentSerializer
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        result = verify_payment(
+            serializer.validated_data['payment_id'],
+            serializer.validated_data['status'],
+            serializer.validated_data['transaction_id'],
+        )
+        if result.outcome == NOT_FOUND:
+            return Response({'success': False, 'message': 'Payment Not Found'}, status=404)
+        if result.outcome == CONFLICT:
+            return Response({
+                'success': False,
+                'message': 'Payment was already verified with a different outcome',
+                'status': result.status,
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({'success': True, 'status': result.status, 'receipt_number': result.receipt_number})
+
+class ReceiptView(generics.GenericAPIView):
+    """The printable receipt of a successful payment, rendered ahead of time (see receipts.py)."""
     permission_classes = [permissions.IsAuthenticated]
-    lookup_field = 'payment_id'
+
+    def get(self, request, payment_id):
+        receipts = PaymentReceipt.objects.filter(payment__payment_id=payment_id)
+        if request.user.role not in ('ADMIN', 'SUPERADMIN'):
+            receipts = receipts.filter(payment__user=request.user)
+        row = receipts.values_list('payment_id', 'rendered', 'etag').first()
+        if row is None:
+            return Response({'success': False, 'message': 'Receipt Not Found'}, status=404)
+        payment_pk, rendered, etag = row
+        if rendered is None:
+            # Not rendered yet: build it without writing, the scheduled render stores it
+            receipt = render_receipts(payment_pk, save=False)[0]
+            rendered, etag = receipt.rendered, receipt.etag
+
+        etag = quote_etag(etag)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(bytes(rendered), content_type=RECEIPT_CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -20,5 +20,9 @@ class ServiceRequest(models.Model):
 class RequestDocument(models.Model):
     service_request = models.ForeignKey(ServiceRequest, on_delete=models.CASCADE, related_name='documents')
     document_type = models.CharField(max_length=50) # e.g. ID Proof, Property Deed
-    file_path = models.FileField(upload_to='service_requests/documents/')
+    # Uploaded through apps.uploads: the content is a shared blob. file_path holds files from before.
+    blob = models.ForeignKey('uploads.StoredBlob', on_delete=models.PROTECT, null=True, blank=True,
+                             related_name='request_documents')
+    filename = models.CharField(max_length=255, blank=True)
+    file_path = models.FileField(upload_to='service_requests/documents/', blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
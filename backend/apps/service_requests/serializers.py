@@ -1,8 +1,15 @@
 from rest_framework import serializers
-from .models import ServiceRequest
+from apps.uploads.serializers import BlobReferenceSerializer
+from .models import RequestDocument, ServiceRequest
 
 class ServiceRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceRequest
         fields = '__all__'
         read_only_fields = ['request_id', 'status', 'created_at']
+
+class RequestDocumentSerializer(BlobReferenceSerializer):
+    class Meta:
+        model = RequestDocument
+        fields = ['id', 'document_type', 'upload_id', 'filename', 'size', 'content_type', 'uploaded_at']
+        read_only_fields = ['filename', 'uploaded_at']
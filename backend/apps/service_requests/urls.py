@@ -1,8 +1,14 @@
 from django.urls import path
-from .views import SubmitServiceRequestView, ServiceRequestListView, ServiceStatusView
+from .views import (
+    SubmitServiceRequestView, ServiceRequestListView, ServiceStatusView, ServiceRequestDocumentsView,
+    ServiceRequestDocumentFileView,
+)
 
 urlpatterns = [
     path('request/', SubmitServiceRequestView.as_view(), name='service-request-submit'),
     path('list/', ServiceRequestListView.as_view(), name='service-request-list'),
     path('status/<str:request_id>/', ServiceStatusView.as_view(), name='service-request-status'),
+    path('documents/<str:request_id>/', ServiceRequestDocumentsView.as_view(), name='service-request-documents'),
+    path('documents/<str:request_id>/<int:pk>/', ServiceRequestDocumentFileView.as_view(),
+         name='service-request-document-file'),
 ]
@@ -1,14 +1,18 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
-from .models import ServiceRequest
-from .serializers import ServiceRequestSerializer
-import uuid
+from rest_framework.response import Response
+from .models import RequestDocument, ServiceRequest
+from .serializers import RequestDocumentSerializer, ServiceRequestSerializer
+from apps.uploads.serving import serve_file, stored_file
+from utils.idempotency import IdempotencyMixin
+from utils.ids import new_id
 
-class SubmitServiceRequestView(generics.CreateAPIView):
+class SubmitServiceRequestView(IdempotencyMixin, generics.CreateAPIView):
     serializer_class = ServiceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        rid = f"SR-{uuid.uuid4().hex[:8].upper()}"
+        rid = new_id("SR")
         serializer.save(user=self.request.user, request_id=rid)
 
 class ServiceRequestListView(generics.ListAPIView):
@@ -23,3 +27,41 @@ class ServiceStatusView(generics.RetrieveAPIView):
     serializer_class = ServiceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'request_id'
+
+class ServiceRequestDocumentsView(generics.ListCreateAPIView):
+    """
+    Supporting documents of a service request. A citizen attaches a completed
+    upload (apps.uploads) to their own request by its upload_id; staff can list any.
+    """
+    serializer_class = RequestDocumentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_service_request(self):
+        requests = ServiceRequest.objects.all()
+        if self.request.method != 'GET' or self.request.user.role not in ('ADMIN', 'SUPERADMIN'):
+            requests = requests.filter(user=self.request.user)
+        return get_object_or_404(requests, request_id=self.kwargs['request_id'])
+
+    def get_queryset(self):
+        return RequestDocument.objects.filter(service_request=self.get_service_request()).select_related('blob')
+
+    def perform_create(self, serializer):
+        serializer.save(service_request=self.get_service_request())
+
+class ServiceRequestDocumentFileView(generics.GenericAPIView):
+    """
+    The file of one document, for the request's owner or staff. Access and
+    the file's name come from one query; the bytes are sent by the front
+    proxy or with sendfile (see apps.uploads.serving).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, request_id, pk):
+        documents = RequestDocument.objects.filter(pk=pk, service_request__request_id=request_id)
+        if request.user.role not in ('ADMIN', 'SUPERADMIN'):
+            documents = documents.filter(service_request__user=request.user)
+        stored = stored_file(documents)
+        if stored is None:
+            return Response({'success': False, 'message': 'Document Not Found'}, status=404)
+        return serve_file(request, stored)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.uploads.storage import purge_uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired upload sessions with their partial files, and blobs nothing references'
+
+    def handle(self, *args, **kwargs):
+        sessions, blobs = purge_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {sessions} expired upload sessions and {blobs} unreferenced blobs."))
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class StoredBlob(models.Model):
+    """
+    One stored file, addressed by its content (see storage.py). Attachments
+    and documents reference blobs, so a file uploaded many times is on disk
+    once.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100)
+    file = models.FileField(upload_to='blobs/', max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes)"
+
+
+class UploadSession(models.Model):
+    """A chunked, resumable upload of one file, received into a partial file until it completes."""
+
+    class Status(models.TextChoices):
+        ACTIVE = 'ACTIVE', _('Active')
+        COMPLETE = 'COMPLETE', _('Complete')
+
+    upload_id = models.CharField(max_length=50, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
+    blob = models.ForeignKey(StoredBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['expires_at'], name='upload_session_expires_idx')]
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index):
+        """Bytes chunk `index` must have: chunk_size for all but the last."""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+
+class UploadChunk(models.Model):
+    """A chunk received for a session, with the SHA-256 computed while it was written."""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['session', 'index'], name='upload_chunk_unique')]
@@ -0,0 +1,55 @@
+from django.conf import settings
+from rest_framework import serializers
+from .models import UploadSession
+from .storage import missing_chunks
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.ChoiceField(choices=[(value, value) for value in settings.UPLOAD_CONTENT_TYPES])
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, size):
+        if size > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Files can be at most {settings.UPLOAD_MAX_SIZE} bytes")
+        return size
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_count = serializers.IntegerField(read_only=True)
+    missing = serializers.SerializerMethodField()
+    digest = serializers.CharField(source='blob.digest', read_only=True, default=None)
+
+    class Meta:
+        model = UploadSession
+        fields = ['upload_id', 'filename', 'content_type', 'size', 'chunk_size', 'chunk_count', 'status', 'missing',
+                  'digest', 'expires_at']
+
+    def get_missing(self, session):
+        return missing_chunks(session)
+
+class CompletedUploadField(serializers.CharField):
+    """The upload_id of one of the requesting user's completed uploads, resolved to its UploadSession."""
+
+    def to_internal_value(self, data):
+        upload_id = super().to_internal_value(data)
+        session = (
+            UploadSession.objects.select_related('blob')
+            .filter(upload_id=upload_id, user=self.context['request'].user, status=UploadSession.Status.COMPLETE)
+            .first()
+        )
+        if session is None or session.blob is None:
+            raise serializers.ValidationError("No completed upload with this id")
+        return session
+
+class BlobReferenceSerializer(serializers.ModelSerializer):
+    """
+    Base for models that reference a StoredBlob as `blob` with its original
+    `filename`: written with an upload_id, read back with the blob's size and
+    content type.
+    """
+    upload_id = CompletedUploadField(write_only=True)
+    size = serializers.IntegerField(source='blob.size', read_only=True, default=None)
+    content_type = serializers.CharField(source='blob.content_type', read_only=True, default=None)
+
+    def create(self, validated_data):
+        session = validated_data.pop('upload_id')
+        return super().create({**validated_data, 'blob': session.blob, 'filename': session.filename})
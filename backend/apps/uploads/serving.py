@@ -0,0 +1,146 @@
+"""
+Serving attachments and documents to the users allowed to see them.
+
+A view checks access and looks up the file in one query (stored_file()),
+then serve_file() hands the bytes over without the worker touching them:
+
+* MEDIA_ACCEL_REDIRECT = 'nginx': an empty response with X-Accel-Redirect
+  to MEDIA_ACCEL_PREFIX + the file's name. nginx serves it (Range, sendfile
+  and slow clients included) from an internal location, e.g.
+
+      location /protected-media/ { internal; alias /app/backend/media/; }
+
+  and the worker is free as soon as the headers are built.
+* MEDIA_ACCEL_REDIRECT = 'sendfile': X-Sendfile with the absolute path, for
+  Apache's mod_xsendfile or lighttpd.
+* Unset: a FileResponse over the open file. gunicorn passes it to
+  os.sendfile(), so the kernel copies from the page cache to the socket; a
+  single "bytes=" Range is answered with 206 by seeking the file and
+  limiting the response length, which sendfile honours. Other servers
+  iterate it in READ_SIZE blocks.
+
+Blobs never change (they are named by their digest), so the digest is a
+strong ETag and If-None-Match / If-Range work without reading the file.
+Files from storages without local paths are redirected to their URL.
+"""
+import mimetypes
+import os
+import re
+from collections import namedtuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+from .storage import READ_SIZE
+
+StoredFile = namedtuple('StoredFile', 'name digest content_type filename')
+
+# Columns read by stored_file() from any model with `blob`, `filename` and the old `file_path`
+FIELDS = ('blob__file', 'blob__digest', 'blob__content_type', 'filename', 'file_path')
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _FileRange:
+    """The open file limited to `length` bytes from its current position; keeps fileno() for sendfile."""
+
+    def __init__(self, file, length):
+        self.file, self.remaining = file, length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def stored_file(queryset):
+    """The StoredFile of the first row of an attachment or document queryset, or None."""
+    row = queryset.values_list(*FIELDS).first()
+    if row is None:
+        return None
+    blob_name, digest, content_type, filename, legacy_name = row
+    if blob_name:
+        return StoredFile(blob_name, digest, content_type, filename or os.path.basename(blob_name))
+    if legacy_name:
+        content_type = mimetypes.guess_type(legacy_name)[0] or 'application/octet-stream'
+        return StoredFile(legacy_name, None, content_type, os.path.basename(legacy_name))
+    return None
+
+
+def _byte_range(header, size):
+    """(start, end inclusive) of a single-range Range header, None to send it all, or False if unsatisfiable."""
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        # Absent, malformed or several ranges: a full 200 is always a valid answer
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_file(request, stored):
+    """The response for `stored`; the transfer goes to the front proxy when MEDIA_ACCEL_REDIRECT is set."""
+    etag = quote_etag(stored.digest) if stored.digest else None
+    if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    try:
+        path = default_storage.path(stored.name)
+    except NotImplementedError:
+        return HttpResponseRedirect(default_storage.url(stored.name))
+
+    accel = settings.MEDIA_ACCEL_REDIRECT
+    if accel:
+        response = HttpResponse(content_type=stored.content_type)
+        if accel == 'nginx':
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + stored.name)
+        else:
+            response['X-Sendfile'] = path
+    else:
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return HttpResponse(status=404)
+        size = os.fstat(file.fileno()).st_size
+        byte_range = _byte_range(request.headers.get('Range'), size)
+        if_range = request.headers.get('If-Range')
+        if byte_range and if_range is not None and if_range != etag:
+            byte_range = None
+        if byte_range is False:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+        start, end = byte_range or (0, size - 1)
+        file.seek(start)
+        response = FileResponse(_FileRange(file, end - start + 1), content_type=stored.content_type,
+                                status=206 if byte_range else 200)
+        response.block_size = READ_SIZE
+        response['Content-Length'] = end - start + 1
+        if byte_range:
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(False, stored.filename)
+    response['Cache-Control'] = 'private, max-age=86400' if etag else 'private, no-cache'
+    if etag:
+        response['ETag'] = etag
+    return response
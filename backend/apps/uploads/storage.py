@@ -0,0 +1,220 @@
+"""
+Chunked, resumable uploads into content-addressed storage.
+
+A client opens an UploadSession for a file of known size and PUTs it in
+chunks of UPLOAD_CHUNK_SIZE bytes (the last one shorter), in any order and
+through any worker. A chunk lost to a dropped link is sent again on its
+own, and the session lists the chunks still missing. Each chunk is streamed
+from the request to a temporary file while its SHA-256 is computed, then
+copied into its place in a partial file under UPLOAD_PARTIAL_DIR, so a
+request holds a worker for one chunk's transfer and READ_SIZE bytes of
+memory, never the whole file, and chunks of one upload arrive in parallel.
+A client that sends the chunk's SHA-256 (hex) in the Upload-Chunk-SHA256
+header has a corrupted chunk rejected.
+
+A file's content address is the SHA-256 of its chunks' SHA-256 digests
+concatenated in order (the scheme of Dropbox's content_hash). It comes from
+the chunk digests without reading the file again, and since the server
+fixes the chunk boundaries the same bytes always get the same address;
+changing UPLOAD_CHUNK_SIZE once blobs are stored only stops new uploads
+from matching them. On completion the partial file is moved to
+blobs/<2 hex>/<digest>, or deleted if a StoredBlob with that digest exists
+already and the session gets that blob.
+
+purge_uploads() removes expired sessions with their partial files and blobs
+nothing references any more.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError, Q
+from django.utils import timezone
+
+from utils.ids import new_id
+from .models import StoredBlob, UploadChunk, UploadSession
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class _PartialFile(File):
+    """A finished partial file; FileSystemStorage moves it into place instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.name
+
+
+def partial_path(session):
+    return os.path.join(settings.UPLOAD_PARTIAL_DIR, session.upload_id)
+
+
+def content_digest(chunk_digests):
+    """The content address of a file from its chunks' SHA-256 hex digests, in order."""
+    return hashlib.sha256(b''.join(bytes.fromhex(digest) for digest in chunk_digests)).hexdigest()
+
+
+def open_session(user, filename, content_type, size):
+    session = UploadSession.objects.create(
+        upload_id=new_id("UPL"), user=user, filename=filename, content_type=content_type, size=size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        expires_at=timezone.now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    )
+    os.makedirs(settings.UPLOAD_PARTIAL_DIR, exist_ok=True)
+    with open(partial_path(session), 'wb') as partial:
+        # Sparse on most filesystems: chunks fill it in whatever order they arrive
+        partial.truncate(size)
+    return session
+
+
+def write_chunk(session, index, stream, expected_sha256=None):
+    """
+    Copies chunk `index` from `stream` into the partial file, hashing it on
+    the way, and records it. Returns its SHA-256; raises UploadError if the
+    body is short or does not match `expected_sha256`, leaving any earlier
+    copy of the chunk in place.
+
+    The body is received into a temporary file next to the partial one with
+    no lock or transaction held, however slow the client; only copying it
+    into place and recording it runs with the session locked, so complete()
+    and purge_uploads() never see a chunk half written.
+    """
+    if session.status != UploadSession.Status.ACTIVE:
+        raise UploadError("Upload is already complete")
+    if not 0 <= index < session.chunk_count:
+        raise UploadError(f"Chunk index must be between 0 and {session.chunk_count - 1}")
+    remaining = session.chunk_length(index)
+    sha256 = hashlib.sha256()
+    with tempfile.TemporaryFile(dir=settings.UPLOAD_PARTIAL_DIR, prefix=f"{session.upload_id}.{index}.") as chunk:
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            sha256.update(data)
+            chunk.write(data)
+            remaining -= len(data)
+        digest = sha256.hexdigest()
+        if remaining:
+            raise UploadError(f"Chunk {index} ended {remaining} bytes short")
+        if expected_sha256 and expected_sha256.lower() != digest:
+            raise UploadError(f"Chunk {index} does not match its SHA-256")
+
+        chunk.seek(0)
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != UploadSession.Status.ACTIVE:
+                raise UploadError("Upload is already complete")
+            try:
+                partial = open(partial_path(session), 'r+b')
+            except FileNotFoundError:
+                raise UploadError("Upload has expired, start it again") from None
+            with partial:
+                partial.seek(index * session.chunk_size)
+                shutil.copyfileobj(chunk, partial, READ_SIZE)
+            UploadChunk.objects.update_or_create(session=session, index=index, defaults={'sha256': digest})
+    return digest
+
+
+def missing_chunks(session):
+    if session.status != UploadSession.Status.ACTIVE:
+        return []
+    received = set(UploadChunk.objects.filter(session=session).values_list('index', flat=True))
+    return [index for index in range(session.chunk_count) if index not in received]
+
+
+def complete(session):
+    """
+    Stores the finished upload as a blob, or points the session at the blob
+    that already has its content. Returns (blob, deduplicated). Completing a
+    completed session returns its blob again.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().select_related('blob').get(pk=session.pk)
+        if session.status == UploadSession.Status.COMPLETE:
+            return session.blob, False
+        digests = list(UploadChunk.objects.filter(session=session).order_by('index').values_list('sha256', flat=True))
+        if len(digests) != session.chunk_count:
+            raise UploadError(f"{session.chunk_count - len(digests)} chunks have not been received")
+        digest = content_digest(digests)
+        path = partial_path(session)
+        # Locked so that purge_uploads() cannot delete it while this session takes it over
+        blob = StoredBlob.objects.select_for_update().filter(digest=digest).first()
+        deduplicated = blob is not None
+        if blob is None:
+            try:
+                partial = open(path, 'rb')
+            except FileNotFoundError:
+                raise UploadError("Upload has expired, start it again") from None
+            with partial:
+                name = default_storage.save(f"blobs/{digest[:2]}/{digest}", _PartialFile(partial, name=path))
+            try:
+                with transaction.atomic():
+                    blob = StoredBlob.objects.create(digest=digest, size=session.size,
+                                                     content_type=session.content_type, file=name)
+            except IntegrityError:
+                # Another session stored the same content first
+                default_storage.delete(name)
+                blob, deduplicated = StoredBlob.objects.get(digest=digest), True
+        if os.path.exists(path):
+            os.remove(path)
+        session.status = UploadSession.Status.COMPLETE
+        session.blob = blob
+        session.save(update_fields=['status', 'blob'])
+        UploadChunk.objects.filter(session=session).delete()
+    return blob, deduplicated
+
+
+def _unreferenced_blobs():
+    """Blobs no attachment, document or session points at, whichever models those are."""
+    condition = Q()
+    for relation in StoredBlob._meta.related_objects:
+        condition &= Q(**{f"{relation.name}__isnull": True})
+    return StoredBlob.objects.filter(condition)
+
+
+def purge_uploads(now=None, batch_size=500):
+    """Deletes expired sessions (and partial files) and unreferenced blobs. Returns (sessions, blobs)."""
+    now = now or timezone.now()
+    sessions = 0
+    while True:
+        with transaction.atomic():
+            # A session with a chunk being copied in is locked: it is left for the next purge
+            expired = list(
+                UploadSession.objects.select_for_update(skip_locked=True).filter(expires_at__lt=now)
+                .only('pk', 'upload_id')[:batch_size]
+            )
+            if not expired:
+                break
+            for session in expired:
+                path = partial_path(session)
+                if os.path.exists(path):
+                    os.remove(path)
+            UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+        sessions += len(expired)
+
+    blobs = 0
+    cutoff = now - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    for pk in _unreferenced_blobs().filter(created_at__lt=cutoff).values_list('pk', flat=True).iterator():
+        # The row goes first: a file left without a row only wastes space, a row without its file breaks downloads
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update(skip_locked=True).filter(pk=pk).first()
+            if blob is None or not _unreferenced_blobs().filter(pk=pk).exists():
+                # Being taken over by complete(), or attached since it was selected
+                continue
+            name = blob.file.name
+            try:
+                blob.delete()
+            except ProtectedError:
+                continue
+        default_storage.delete(name)
+        blobs += 1
+    return sessions, blobs
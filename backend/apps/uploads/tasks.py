@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .storage import purge_uploads
+
+
+@shared_task(ignore_result=True)
+def purge_expired_uploads():
+    purge_uploads()
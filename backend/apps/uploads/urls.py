@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import CompleteUploadView, CreateUploadSessionView, UploadChunkView, UploadSessionView
+
+urlpatterns = [
+    path('sessions/', CreateUploadSessionView.as_view(), name='upload-session-create'),
+    path('sessions/<str:upload_id>/', UploadSessionView.as_view(), name='upload-session'),
+    path('sessions/<str:upload_id>/chunks/<int:index>/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('sessions/<str:upload_id>/complete/', CompleteUploadView.as_view(), name='upload-complete'),
+]
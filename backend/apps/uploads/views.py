@@ -0,0 +1,68 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from .models import UploadSession
+from .serializers import UploadSessionCreateSerializer, UploadSessionSerializer
+from .storage import UploadError, complete, open_session, write_chunk
+from utils.idempotency import IdempotencyMixin
+
+CHUNK_SHA256_HEADER = 'Upload-Chunk-SHA256'
+
+class UploadSessionMixin:
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_session(self, upload_id):
+        return get_object_or_404(UploadSession.objects.select_related('blob'), upload_id=upload_id,
+                                 user=self.request.user)
+
+class CreateUploadSessionView(IdempotencyMixin, generics.GenericAPIView):
+    """Opens a chunked upload (see storage.py); the response says how to split the file."""
+    serializer_class = UploadSessionCreateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'uploads'
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = open_session(request.user, **serializer.validated_data)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+class UploadSessionView(UploadSessionMixin, generics.GenericAPIView):
+    """Progress of an upload: the chunks still missing are the ones to send after a dropped link."""
+
+    def get(self, request, upload_id):
+        return Response(UploadSessionSerializer(self.get_session(upload_id)).data)
+
+class UploadChunkView(UploadSessionMixin, generics.GenericAPIView):
+    """
+    PUT one chunk as the raw request body. The body is streamed to disk, not
+    parsed, so it must be exactly the chunk's length.
+    """
+
+    def put(self, request, upload_id, index):
+        session = self.get_session(upload_id)
+        if not 0 <= index < session.chunk_count:
+            return Response({'success': False, 'message': 'Chunk index out of range'}, status=400)
+        length = session.chunk_length(index)
+        if request.META.get('CONTENT_LENGTH') != str(length):
+            return Response({'success': False, 'message': f"Chunk {index} must be exactly {length} bytes"},
+                            status=400)
+        try:
+            digest = write_chunk(session, index, request.stream, request.headers.get(CHUNK_SHA256_HEADER))
+        except UploadError as exc:
+            return Response({'success': False, 'message': str(exc)}, status=400)
+        return Response({'success': True, 'index': index, 'sha256': digest})
+
+class CompleteUploadView(UploadSessionMixin, generics.GenericAPIView):
+    """Turns a fully received upload into a blob; safe to retry."""
+
+    def post(self, request, upload_id):
+        session = self.get_session(upload_id)
+        try:
+            blob, deduplicated = complete(session)
+        except UploadError as exc:
+            return Response({'success': False, 'message': str(exc)}, status=400)
+        session.refresh_from_db()
+        return Response({**UploadSessionSerializer(session).data, 'deduplicated': deduplicated})
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class UserManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user_management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
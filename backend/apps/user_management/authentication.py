@@ -0,0 +1,69 @@
+"""
+JWT authentication that hydrates request.user from a short-lived cache.
+
+The kiosk UI makes many calls per session, and the stock JWTAuthentication
+loads CustomUser from the database on every one of them. Here the fields the
+API needs on the hot path are cached per user id and token issue time
+(AUTH_USER_CACHE_TTL seconds), and the rest of the model is left deferred,
+so anything else is still loaded on access and save() only writes the
+cached fields. The entry is dropped whenever the user row is saved or
+deleted (see signals.py). Tokens carrying a kiosk session id (`sid`) also
+record a session heartbeat.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from utils.metrics import HitRatio
+from .sessions import get_activity_tracker
+
+SNAPSHOT_FIELDS = ('id', 'role', 'phone', 'consumer_number', 'language_preference', 'is_active')
+
+# Tokens issued per user that keep a snapshot at the same time (kiosk + mobile, ...)
+MAX_TOKENS_PER_USER = 4
+
+user_cache_stats = HitRatio('auth.jwt_user_cache')
+
+
+def _cache_key(user_id):
+    return f"jwt-user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and result[1].get('sid'):
+            get_activity_tracker().touch(result[1]['sid'])
+        return result
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is not part of the snapshot
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _cache_key(user_id)
+        issued_at = str(validated_token.get('iat'))
+        snapshots = cache.get(key) or {}
+        snapshot = snapshots.get(issued_at)
+        if snapshot is not None:
+            user_cache_stats.hit()
+            return self.user_model.from_db('default', SNAPSHOT_FIELDS, [snapshot[f] for f in SNAPSHOT_FIELDS])
+
+        user_cache_stats.miss()
+        user = super().get_user(validated_token)
+        snapshots = dict(list(snapshots.items())[-(MAX_TOKENS_PER_USER - 1):])
+        snapshots[issued_at] = {f: getattr(user, f) for f in SNAPSHOT_FIELDS}
+        cache.set(key, snapshots, settings.AUTH_USER_CACHE_TTL)
+        return user
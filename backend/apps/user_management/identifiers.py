@@ -0,0 +1,167 @@
+"""
+Login identifier resolution.
+
+Users log in with their phone number or any consumer number: their own
+primary one or that of an electricity, gas or water account. Every such
+value is kept normalized in LoginIdentifier, so resolving a login is a
+single probe of its identifier index joined to the user row. Signals keep
+the index in sync (see signals.py); rebuild_login_identifiers() backfills
+it.
+
+Every source gets its own row, unique per (identifier, user, source): a
+user's consumer number is usually also the number of one of their
+accounts, and each row must outlive the other being removed. Phone and
+consumer numbers are unique per table, so two users can only share an
+identifier across tables; the login goes to the first user that claimed
+it.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.apps import apps as django_apps
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import LoginIdentifier
+
+User = get_user_model()
+
+USER_SOURCES = (LoginIdentifier.Source.PHONE, LoginIdentifier.Source.CONSUMER_NUMBER)
+
+# billing models whose consumer numbers are login identifiers
+ACCOUNT_SOURCES = (
+    ('ElectricityAccount', LoginIdentifier.Source.ELECTRICITY),
+    ('GasAccount', LoginIdentifier.Source.GAS),
+    ('WaterAccount', LoginIdentifier.Source.WATER),
+)
+
+UNIQUE_FIELDS = ['identifier', 'user', 'source']
+
+
+def normalize_identifier(value):
+    """Strips whitespace and separators and upper-cases, so '12-34 ab' == '1234AB'."""
+    return ''.join(ch for ch in str(value) if ch not in ' -\t').upper()
+
+
+def resolve_login_user(identifier):
+    """Returns the user owning `identifier` (phone or any consumer number), or None."""
+    return (
+        User.objects.filter(login_identifiers__identifier=normalize_identifier(identifier))
+        .order_by('login_identifiers__pk').first()
+    )
+
+
+def account_source(account):
+    return dict(ACCOUNT_SOURCES)[type(account).__name__]
+
+
+def sync_user_identifiers(user):
+    """Brings the user's phone / consumer_number entries in line with the row."""
+    wanted = {(normalize_identifier(user.phone), LoginIdentifier.Source.PHONE)} if user.phone else set()
+    if user.consumer_number:
+        wanted.add((normalize_identifier(user.consumer_number), LoginIdentifier.Source.CONSUMER_NUMBER))
+
+    existing = set(
+        LoginIdentifier.objects.filter(user=user, source__in=USER_SOURCES).values_list('identifier', 'source')
+    )
+    if existing == wanted:
+        return
+    with transaction.atomic():
+        stale = existing - wanted
+        for identifier, source in stale:
+            LoginIdentifier.objects.filter(user=user, identifier=identifier, source=source).delete()
+        LoginIdentifier.objects.bulk_create(
+            [LoginIdentifier(identifier=i, user=user, source=s) for i, s in wanted - existing],
+            ignore_conflicts=True,
+        )
+
+
+def sync_account_identifier(account):
+    source = account_source(account)
+    with transaction.atomic():
+        LoginIdentifier.objects.filter(source=source, object_id=account.pk).delete()
+        LoginIdentifier.objects.bulk_create([LoginIdentifier(
+            identifier=normalize_identifier(account.consumer_number),
+            user_id=account.user_id, source=source, object_id=account.pk,
+        )], ignore_conflicts=True)
+
+
+def remove_account_identifier(account):
+    LoginIdentifier.objects.filter(source=account_source(account), object_id=account.pk).delete()
+
+
+def identifier_rows(users, accounts, chunk_size=10000):
+    """
+    (identifier, user_id, source, object_id) of every entry the index should
+    hold for `users` and `accounts` ((account queryset, source) pairs). Only
+    reads the querysets it is given, so migrations can pass historical
+    models.
+    """
+    for pk, phone, consumer_number in (
+        users.order_by('pk').values_list('pk', 'phone', 'consumer_number').iterator(chunk_size=chunk_size)
+    ):
+        if phone:
+            yield normalize_identifier(phone), pk, LoginIdentifier.Source.PHONE, None
+        if consumer_number:
+            yield normalize_identifier(consumer_number), pk, LoginIdentifier.Source.CONSUMER_NUMBER, None
+    for queryset, source in accounts:
+        for pk, user_id, consumer_number in (
+            queryset.order_by('pk').values_list('pk', 'user_id', 'consumer_number').iterator(chunk_size=chunk_size)
+        ):
+            yield normalize_identifier(consumer_number), user_id, source, pk
+
+
+def _accounts(ids=None):
+    """(queryset, source) per account model, limited to `ids` ({source: pks}) when given."""
+    accounts = []
+    for name, source in ACCOUNT_SOURCES:
+        queryset = django_apps.get_model('billing', name).objects.all()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids.get(source, ()))
+        accounts.append((queryset, source))
+    return accounts
+
+
+def _delete_stale(batch_size):
+    """Deletes the entries whose user field or account no longer has their value. Returns how many."""
+    deleted, last_pk = 0, 0
+    while True:
+        batch = list(
+            LoginIdentifier.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'identifier', 'user_id', 'source', 'object_id')[:batch_size]
+        )
+        if not batch:
+            return deleted
+        last_pk = batch[-1][0]
+        user_ids = {user_id for _, _, user_id, source, _ in batch if source in USER_SOURCES}
+        account_ids = defaultdict(set)
+        for _, _, _, source, object_id in batch:
+            if source not in USER_SOURCES:
+                account_ids[source].add(object_id)
+        current = set(identifier_rows(User.objects.filter(pk__in=user_ids), _accounts(account_ids)))
+        stale = [pk for pk, *row in batch if tuple(row) not in current]
+        if stale:
+            deleted += LoginIdentifier.objects.filter(pk__in=stale).delete()[0]
+
+
+def rebuild_login_identifiers(batch_size=10000, stdout=None):
+    """
+    Rebuilds the whole index from users and accounts in batches of
+    `batch_size` rows, upserting into the live table so logins keep
+    resolving throughout, then sweeps out entries nothing backs any more.
+    Returns the number of identifiers written.
+    """
+    rows = identifier_rows(User.objects.all(), _accounts(), chunk_size=batch_size)
+    written = 0
+    while batch := list(islice(rows, batch_size)):
+        LoginIdentifier.objects.bulk_create(
+            [LoginIdentifier(identifier=i, user_id=u, source=s, object_id=o) for i, u, s, o in batch],
+            update_conflicts=True, unique_fields=UNIQUE_FIELDS, update_fields=['object_id'],
+        )
+        written += len(batch)
+        if stdout:
+            stdout.write(f"  {written} identifiers indexed")
+    deleted = _delete_stale(batch_size)
+    if stdout:
+        stdout.write(f"  {deleted} stale identifiers removed")
+    return written
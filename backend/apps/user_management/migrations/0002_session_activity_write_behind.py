@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_management", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="usersession",
+            name="last_activity",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="usersession",
+            index=models.Index(
+                fields=["logout_time", "last_activity"], name="session_idle_idx"
+            ),
+        ),
+    ]
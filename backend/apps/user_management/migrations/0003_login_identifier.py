@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize(value):
+    return "".join(ch for ch in str(value) if ch not in " -\t").upper()
+
+
+def backfill_identifiers(apps, schema_editor):
+    CustomUser = apps.get_model("user_management", "CustomUser")
+    LoginIdentifier = apps.get_model("user_management", "LoginIdentifier")
+    rows = []
+
+    def flush():
+        LoginIdentifier.objects.bulk_create(rows, ignore_conflicts=True)
+        rows.clear()
+
+    for pk, phone, consumer_number in CustomUser.objects.values_list("pk", "phone", "consumer_number").iterator():
+        if phone:
+            rows.append(LoginIdentifier(identifier=normalize(phone), user_id=pk, source="PHONE"))
+        if consumer_number:
+            rows.append(LoginIdentifier(identifier=normalize(consumer_number), user_id=pk, source="CONSUMER"))
+        if len(rows) >= 5000:
+            flush()
+
+    for model_name, source in [
+        ("ElectricityAccount", "ELECTRICITY"),
+        ("GasAccount", "GAS"),
+        ("WaterAccount", "WATER"),
+    ]:
+        model = apps.get_model("billing", model_name)
+        for pk, user_id, consumer_number in model.objects.values_list("pk", "user_id", "consumer_number").iterator():
+            rows.append(
+                LoginIdentifier(identifier=normalize(consumer_number), user_id=user_id, source=source, object_id=pk)
+            )
+            if len(rows) >= 5000:
+                flush()
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_management", "0002_session_activity_write_behind"),
+        ("billing", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoginIdentifier",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("identifier", models.CharField(max_length=50, unique=True)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("PHONE", "Phone"),
+                            ("CONSUMER", "Consumer Number"),
+                            ("ELECTRICITY", "Electricity Account"),
+                            ("GAS", "Gas Account"),
+                            ("WATER", "Water Account"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Account id for account sources",
+                        null=True,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="login_identifiers",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["source", "object_id"], name="login_ident_source_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_identifiers, migrations.RunPython.noop),
+    ]
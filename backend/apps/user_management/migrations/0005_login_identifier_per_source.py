@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:53
+
+from itertools import islice
+
+from django.db import migrations, models
+
+from apps.user_management.identifiers import ACCOUNT_SOURCES, identifier_rows
+
+
+def backfill_identifiers(apps, schema_editor):
+    # Adds back the rows the old unique identifier had dropped
+    User = apps.get_model("user_management", "CustomUser")
+    LoginIdentifier = apps.get_model("user_management", "LoginIdentifier")
+    accounts = [(apps.get_model("billing", name).objects.all(), source) for name, source in ACCOUNT_SOURCES]
+    rows = identifier_rows(User.objects.all(), accounts)
+    while batch := list(islice(rows, 5000)):
+        LoginIdentifier.objects.bulk_create(
+            [LoginIdentifier(identifier=i, user_id=u, source=s, object_id=o) for i, u, s, o in batch],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_management", "0004_user_created_index"),
+        ("billing", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="loginidentifier",
+            name="identifier",
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name="loginidentifier",
+            constraint=models.UniqueConstraint(
+                fields=("identifier", "user", "source"), name="login_identifier_unique"
+            ),
+        ),
+        migrations.RunPython(backfill_identifiers, migrations.RunPython.noop),
+    ]
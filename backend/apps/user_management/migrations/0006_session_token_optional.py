@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_management", "0005_login_identifier_per_source"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="usersession",
+            name="token",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="JTI or truncated token",
+                max_length=500,
+            ),
+        ),
+    ]
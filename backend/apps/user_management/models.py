@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from django.utils import timezone
 
 class CustomUser(AbstractUser):
     class Role(models.TextChoices):
@@ -22,6 +23,7 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = _('User')
         verbose_name_plural = _('Users')
+        indexes = [models.Index(fields=['created_at'], name='user_created_idx')]
 
     def __str__(self):
         return f"{self.username} ({self.role})"
@@ -44,12 +46,49 @@ class OTPVerification(models.Model):
 
 class UserSession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='kiosk_sessions')
-    token = models.CharField(max_length=500, help_text=_("JTI or truncated token"))
+    # Sessions are found through the `sid` claim of their tokens; only logins from before it have a JTI here
+    token = models.CharField(max_length=500, blank=True, default='', help_text=_("JTI or truncated token"))
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     device_info = models.TextField(blank=True)
-    last_activity = models.DateTimeField(auto_now=True)
+    # Written in batches by sessions.SessionActivityTracker, not on every save
+    last_activity = models.DateTimeField(default=timezone.now)
     logout_time = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['logout_time', 'last_activity'], name='session_idle_idx'),
+        ]
+
     def __str__(self):
         return f"Session for {self.user.username} at {self.created_at}"
+
+class LoginIdentifier(models.Model):
+    """
+    Normalized login identifiers (phone, consumer numbers of the user and of
+    every utility account) mapped to their user, so login resolves with one
+    index probe. Maintained by signals, see identifiers.py.
+    """
+    class Source(models.TextChoices):
+        PHONE = 'PHONE', _('Phone')
+        CONSUMER_NUMBER = 'CONSUMER', _('Consumer Number')
+        ELECTRICITY = 'ELECTRICITY', _('Electricity Account')
+        GAS = 'GAS', _('Gas Account')
+        WATER = 'WATER', _('Water Account')
+
+    identifier = models.CharField(max_length=50)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='login_identifiers')
+    source = models.CharField(max_length=20, choices=Source.choices)
+    object_id = models.BigIntegerField(null=True, blank=True, help_text=_("Account id for account sources"))
+
+    class Meta:
+        constraints = [
+            # Leads with identifier, so it is also the index logins probe
+            models.UniqueConstraint(fields=['identifier', 'user', 'source'], name='login_identifier_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'object_id'], name='login_ident_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.identifier} -> {self.user_id} ({self.source})"
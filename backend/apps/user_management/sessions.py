@@ -0,0 +1,163 @@
+"""
+Kiosk session bookkeeping with write-behind activity tracking.
+
+Authenticated requests only record a heartbeat for their session in a
+shared buffer (Redis hash, or process memory in development). The buffer is
+flushed to UserSession.last_activity in one batched UPDATE at most every
+SESSION_ACTIVITY_FLUSH_SECONDS, so an active session costs one write per
+flush interval instead of one per request. Idle-timeout and logout read the
+merged view of the buffer and the table.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.authentication.tokens import FilteredRefreshToken
+from utils.background import submit
+from .models import UserSession
+
+
+class InMemoryActivityBuffer:
+    """Process-local stand-in for tests and single-process development."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def record(self, session_id, ts):
+        with self._lock:
+            self._pending[session_id] = max(ts, self._pending.get(session_id, 0))
+
+    def get_many(self, session_ids):
+        with self._lock:
+            return {sid: self._pending[sid] for sid in session_ids if sid in self._pending}
+
+    def pop(self, session_id):
+        with self._lock:
+            return self._pending.pop(session_id, None)
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+
+class RedisActivityBuffer:
+    key = 'session-activity'
+
+    def __init__(self, client=None):
+        if client is None:
+            from utils.redis_client import get_redis
+            client = get_redis()
+        self.client = client
+
+    def record(self, session_id, ts):
+        self.client.hset(self.key, session_id, ts)
+
+    def get_many(self, session_ids):
+        session_ids = list(session_ids)
+        if not session_ids:
+            return {}
+        values = self.client.hmget(self.key, session_ids)
+        return {sid: float(v) for sid, v in zip(session_ids, values) if v is not None}
+
+    def pop(self, session_id):
+        pipe = self.client.pipeline()
+        pipe.hget(self.key, session_id)
+        pipe.hdel(self.key, session_id)
+        value, _ = pipe.execute()
+        return float(value) if value is not None else None
+
+    def drain(self):
+        pipe = self.client.pipeline()
+        pipe.hgetall(self.key)
+        pipe.delete(self.key)
+        pending, _ = pipe.execute()
+        return {int(sid): float(ts) for sid, ts in pending.items()}
+
+
+def _as_datetime(ts):
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+
+
+class SessionActivityTracker:
+    flush_lock_key = 'session-activity:flush-lock'
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def touch(self, session_id):
+        """Records a heartbeat and, once per interval, schedules a flush off the request thread."""
+        self.buffer.record(int(session_id), time.time())
+        # cache.add is atomic, so one worker per interval wins the flush
+        if cache.add(self.flush_lock_key, 1, settings.SESSION_ACTIVITY_FLUSH_SECONDS):
+            submit(self.flush)
+
+    def flush(self):
+        """Writes all buffered heartbeats in batched bulk updates. Returns the row count."""
+        pending = self.buffer.drain()
+        sessions = [UserSession(pk=sid, last_activity=_as_datetime(ts)) for sid, ts in pending.items()]
+        UserSession.objects.bulk_update(sessions, ['last_activity'], batch_size=500)
+        return len(sessions)
+
+    def last_activity(self, session):
+        """Latest activity for `session`, including heartbeats not yet flushed."""
+        buffered = self.buffer.get_many([session.pk]).get(session.pk)
+        if buffered is None:
+            return session.last_activity
+        return max(session.last_activity, _as_datetime(buffered))
+
+    def end_session(self, session_id):
+        """Logs a session out, writing its pending heartbeat in the same UPDATE."""
+        fields = {'logout_time': timezone.now()}
+        buffered = self.buffer.pop(int(session_id))
+        if buffered is not None:
+            fields['last_activity'] = _as_datetime(buffered)
+        return UserSession.objects.filter(pk=session_id, logout_time__isnull=True).update(**fields)
+
+    def expire_idle_sessions(self, idle_seconds=None, chunk_size=1000):
+        """
+        Logs out sessions idle for longer than `idle_seconds`. Sessions whose
+        flushed last_activity looks stale but that have a recent buffered
+        heartbeat are kept. Returns the number of sessions closed.
+        """
+        idle_seconds = idle_seconds or settings.KIOSK_IDLE_TIMEOUT_SECONDS
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=idle_seconds)
+        stale = UserSession.objects.filter(logout_time__isnull=True, last_activity__lt=cutoff)
+        closed = 0
+        last_id = 0
+        while True:
+            ids = list(stale.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return closed
+            last_id = ids[-1]
+            active = {sid for sid, ts in self.buffer.get_many(ids).items() if _as_datetime(ts) >= cutoff}
+            expired = [sid for sid in ids if sid not in active]
+            closed += UserSession.objects.filter(pk__in=expired, logout_time__isnull=True).update(logout_time=now)
+
+
+@lru_cache(maxsize=None)
+def get_activity_tracker():
+    return SessionActivityTracker(import_string(settings.SESSION_ACTIVITY_BACKEND)())
+
+
+def start_session(user, request):
+    """
+    Opens a UserSession for a fresh login and returns the login's refresh
+    token, with the session id as `sid` (and so in every access token and
+    rotated refresh token derived from it). The claim is set before the
+    token is recorded as outstanding.
+    """
+    session = UserSession.objects.create(
+        user=user,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        device_info=request.META.get('HTTP_USER_AGENT', '')[:500],
+    )
+    return FilteredRefreshToken.for_user(user, sid=session.pk)
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.billing.models import ElectricityAccount, GasAccount, WaterAccount
+from .authentication import invalidate_cached_user
+from .identifiers import remove_account_identifier, sync_account_identifier, sync_user_identifiers
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def index_user_identifiers(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_user_identifiers(instance)
+
+
+@receiver(post_save, sender=ElectricityAccount)
+@receiver(post_save, sender=GasAccount)
+@receiver(post_save, sender=WaterAccount)
+def index_account_identifier(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_account_identifier(instance)
+
+
+@receiver(post_delete, sender=ElectricityAccount)
+@receiver(post_delete, sender=GasAccount)
+@receiver(post_delete, sender=WaterAccount)
+def unindex_account_identifier(sender, instance, **kwargs):
+    remove_account_identifier(instance)
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from .sessions import get_activity_tracker
+
+
+@shared_task(ignore_result=True)
+def flush_session_activity():
+    get_activity_tracker().flush()
+
+
+@shared_task(ignore_result=True)
+def expire_idle_sessions():
+    get_activity_tracker().expire_idle_sessions()
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import UserProfileView, UserPreferencesView, UserCreateAPIView, SendLoginOTPView, VerifyLoginOTPView
+from .views import UserProfileView, UserPreferencesView, UserCreateAPIView, SendLoginOTPView, VerifyLoginOTPView, LogoutView
 
 urlpatterns = [
     path('profile/', UserProfileView.as_view(), name='user-profile'),
@@ -7,5 +7,6 @@ urlpatterns = [
     path('create-user/', UserCreateAPIView.as_view(), name='user-create'),
     path('login/send-otp/', SendLoginOTPView.as_view(), name='send-login-otp'),
     path('login/verify-otp/', VerifyLoginOTPView.as_view(), name='verify-login-otp'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     # 'accounts/' would likely link to the billing apps, implemented there or aggregated here.
 ]
@@ -6,8 +6,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from utils.otp_service import OTPService
-from django.db.models import Q
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from apps.authentication.tokens import FilteredRefreshToken
+from .sessions import start_session, get_activity_tracker
+from .identifiers import resolve_login_user
 
 User = get_user_model()
 
@@ -16,14 +19,15 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user is a cached partial snapshot; load the full row here
+        return User.objects.get(pk=self.request.user.pk)
 
 class UserPreferencesView(generics.UpdateAPIView):
     serializer_class = UserPreferenceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
 class UserCreateAPIView(generics.CreateAPIView):
     serializer_class = UserCreateSerializer
@@ -37,10 +41,8 @@ class SendLoginOTPView(APIView):
         if serializer.is_valid():
             identifier = serializer.validated_data['identifier']
             
-            # Find user by phone OR consumer number
-            user = User.objects.filter(
-                Q(phone=identifier) | Q(consumer_number=identifier)
-            ).first()
+            # Find user by phone OR any consumer number (one index probe)
+            user = resolve_login_user(identifier)
 
             if not user:
                 return Response({
@@ -72,9 +74,7 @@ class VerifyLoginOTPView(APIView):
             identifier = serializer.validated_data['identifier']
             otp = serializer.validated_data['otp']
 
-            user = User.objects.filter(
-                Q(phone=identifier) | Q(consumer_number=identifier)
-            ).first()
+            user = resolve_login_user(identifier)
 
             if not user:
                 return Response({
@@ -84,7 +84,7 @@ class VerifyLoginOTPView(APIView):
 
             if OTPService.verify_otp(user, otp):
                 # Generate JWT
-                refresh = RefreshToken.for_user(user)
+                refresh = start_session(user, request)
                 return Response({
                     "status": True,
                     "message": "Login Successful",
@@ -106,4 +106,23 @@ class VerifyLoginOTPView(APIView):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class LogoutView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        # End the kiosk session carried by the access token
+        sid = request.auth.get('sid') if request.auth else None
+        if sid:
+            get_activity_tracker().end_session(sid)
 
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                FilteredRefreshToken(refresh).blacklist()
+            except TokenError:
+                pass
+
+        return Response({
+            "status": True,
+            "message": "Logged out successfully."
+        }, status=status.HTTP_200_OK)
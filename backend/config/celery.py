@@ -0,0 +1,12 @@
+import os
+
+from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+app = Celery('suvidha')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
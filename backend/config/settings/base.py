@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from django.utils.translation import gettext_lazy as _
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
     'apps.content',
     'apps.admin_dashboard',
     'apps.audit',
+    'apps.uploads',
 ]
 
 MIDDLEWARE = [
@@ -174,7 +176,7 @@ AUTH_USER_MODEL = 'user_management.CustomUser'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.user_management.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -192,6 +194,113 @@ REST_FRAMEWORK = {
     }
 }
 
+# Cached user snapshot lifetime for CachedJWTAuthentication (seconds)
+AUTH_USER_CACHE_TTL = 60
+
+# Serialized bills per consumer number for FetchBillView (seconds)
+BILL_CACHE_TTL = 300
+# Per-user household bill summary (see apps.billing.accounts)
+HOUSEHOLD_SUMMARY_TTL = 120
+
+# Upstream billing system (see apps.billing.upstream); unset serves the local Bill table only
+BILL_UPSTREAM = None
+if os.environ.get('BILL_UPSTREAM_URL'):
+    BILL_UPSTREAM = {
+        'BACKEND': 'apps.billing.upstream.HTTPBillSource',
+        'OPTIONS': {
+            'base_url': os.environ['BILL_UPSTREAM_URL'],
+            'api_key': os.environ.get('BILL_UPSTREAM_API_KEY'),
+            'connect_timeout': float(os.environ.get('BILL_UPSTREAM_CONNECT_TIMEOUT', 1.0)),
+            'read_timeout': float(os.environ.get('BILL_UPSTREAM_READ_TIMEOUT', 3.0)),
+        },
+    }
+BILL_UPSTREAM_MAX_AGE = 300  # seconds before local bills are refreshed in the background
+BILL_UPSTREAM_SYNC_MARKER_TTL = 24 * 3600
+BILL_UPSTREAM_BREAKER = {'failure_threshold': 5, 'reset_timeout': 30}
+
+# Electricity slab tariffs per connection type (see apps.billing.tariffs). Slabs are
+# (upper bound in units, rate per unit); None is the open-ended top slab.
+ELECTRICITY_TARIFFS = {
+    'RESIDENTIAL': {
+        'slabs': [(100, '3.50'), (300, '5.25'), (None, '7.10')],
+        'fixed_charge': '60.00',
+        'duty_rate': '0.05',
+    },
+    'COMMERCIAL': {
+        'slabs': [(200, '7.50'), (None, '9.25')],
+        'fixed_charge': '250.00',
+        'duty_rate': '0.10',
+    },
+    'INDUSTRIAL': {
+        'slabs': [(1000, '6.80'), (5000, '7.40'), (None, '8.10')],
+        'fixed_charge': '1500.00',
+        'duty_rate': '0.12',
+    },
+}
+BILL_DUE_DAYS = 15
+
+# Robust z-score above which a day/month of meter consumption is flagged (see apps.billing.meter_store)
+METER_ANOMALY_THRESHOLD = 3.5
+# Least MAD used for that score, as a fraction of the median bucket
+METER_ANOMALY_MIN_SPREAD = 0.1
+
+# Days before the due date on which "bill due" notifications are created
+BILL_REMINDER_DAYS = (3, 1)
+
+# How long the outcome of a verified payment is kept for duplicate callbacks (seconds)
+PAYMENT_RESULT_TTL = 24 * 3600
+
+# Days of hourly/daily dashboard counters recomputed by the hourly reconciliation
+# (see apps.admin_dashboard.rollups)
+KPI_ROLLUP_RECONCILE_DAYS = 2
+
+# Complaint full-text search ranks only this many of the newest matches (see apps.grievances.search)
+COMPLAINT_SEARCH_CANDIDATES = 5000
+
+# Near-duplicate complaints (see apps.grievances.dedup): estimated Jaccard similarity of the
+# descriptions' 5-character shingles above which a complaint is linked to an earlier one in
+# the same service type and category filed within the window
+COMPLAINT_DEDUP_THRESHOLD = 0.6
+COMPLAINT_DEDUP_WINDOW_HOURS = 24
+COMPLAINT_DEDUP_SYNC_SECONDS = 1.0  # how often a process picks up complaints filed by others
+
+# Chunked uploads into content-addressed storage (see apps.uploads.storage)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # part of every stored file's address: do not change once files are stored
+UPLOAD_MAX_SIZE = 25 * 1024 * 1024
+UPLOAD_CONTENT_TYPES = ('application/pdf', 'image/jpeg', 'image/png')
+UPLOAD_SESSION_TTL_HOURS = 24
+UPLOAD_PARTIAL_DIR = MEDIA_ROOT / 'partial'  # on MEDIA_ROOT's filesystem, so finished files are moved, not copied
+
+# Attachment and document downloads (see apps.uploads.serving): 'nginx' hands the transfer to
+# nginx with X-Accel-Redirect, 'sendfile' to Apache/lighttpd with X-Sendfile; unset, the worker
+# sends the file itself (with os.sendfile under gunicorn)
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'  # nginx internal location aliased to MEDIA_ROOT
+
+# Printable receipts (see apps.payments.receipts)
+RECEIPT_RENDER_MODE = os.environ.get('RECEIPT_RENDER_MODE', 'thread')  # 'thread', 'celery' or 'sync'
+RECEIPT_WIDTH = 40  # characters per line on the kiosk printer
+RECEIPT_TITLE = 'SUVIDHA CIVIC SERVICES KIOSK'
+
+# Idempotency-Key handling for retried POSTs (see utils.idempotency), in seconds
+IDEMPOTENCY_TTL = 24 * 3600  # how long a completed response is replayed
+IDEMPOTENCY_LOCK_TTL = 60  # claim expiry if the first attempt dies mid-request
+IDEMPOTENCY_WAIT = 10  # how long a duplicate waits for the first attempt
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+# Business ids such as PAY-0ASZ3V8J40001 (see utils.ids)
+ID_EPOCH = '2024-01-01'  # never change once ids have been issued
+# Unique per process (0-1023); leased from the shared cache when unset
+ID_WORKER_ID = int(os.environ['ID_WORKER_ID']) if os.environ.get('ID_WORKER_ID') else None
+ID_WORKER_LEASE_TTL = 3600
+
+# Kiosk session activity (see apps.user_management.sessions)
+SESSION_ACTIVITY_BACKEND = os.environ.get(
+    'SESSION_ACTIVITY_BACKEND', 'apps.user_management.sessions.RedisActivityBuffer'
+)
+SESSION_ACTIVITY_FLUSH_SECONDS = 60
+KIOSK_IDLE_TIMEOUT_SECONDS = 300
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=10),
@@ -204,17 +313,62 @@ SIMPLE_JWT = {
     'SIGNING_KEY': os.environ.get('JWT_SECRET_KEY', SECRET_KEY),
 }
 
+# Refresh-token revocation filter (see apps.authentication.revocation)
+REVOCATION_FILTER_CAPACITY = 1_000_000
+REVOCATION_FILTER_ERROR_RATE = 0.001
+REVOCATION_FILTER_SYNC_SECONDS = 1
+REVOCATION_FILTER_REBUILD_SECONDS = 3600
+REVOCATION_FILTER_LOOKBACK_ROWS = 200
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
 
 # Redis and Celery
-CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+}
+
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'flush-session-activity': {
+        'task': 'apps.user_management.tasks.flush_session_activity',
+        'schedule': 60.0,
+    },
+    'expire-idle-sessions': {
+        'task': 'apps.user_management.tasks.expire_idle_sessions',
+        'schedule': 60.0,
+    },
+    'prune-outstanding-tokens': {
+        'task': 'apps.authentication.tasks.prune_outstanding_tokens',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'mark-overdue-bills': {
+        'task': 'apps.billing.tasks.mark_overdue_bills',
+        'schedule': crontab(hour=0, minute=15),
+    },
+    'create-due-reminders': {
+        'task': 'apps.billing.tasks.create_due_reminders',
+        'schedule': crontab(hour=8, minute=0),
+    },
+    'reconcile-kpi-rollups': {
+        'task': 'apps.admin_dashboard.tasks.reconcile_kpi_rollups',
+        'schedule': crontab(minute=5),
+    },
+    'purge-expired-uploads': {
+        'task': 'apps.uploads.tasks.purge_expired_uploads',
+        'schedule': crontab(hour=2, minute=30),
+    },
+}
 
 # Logging
 LOGGING = {
@@ -243,5 +397,39 @@ TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
 TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER', '')
 
+# SMS dispatch (see apps.notifications.sms)
+# Gateways are tried in order; add more entries to fail over to another provider.
+if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER:
+    SMS_GATEWAYS = [{
+        'BACKEND': 'apps.notifications.sms.TwilioGateway',
+        'OPTIONS': {
+            'account_sid': TWILIO_ACCOUNT_SID,
+            'auth_token': TWILIO_AUTH_TOKEN,
+            'from_number': TWILIO_PHONE_NUMBER,
+        },
+    }]
+else:
+    SMS_GATEWAYS = [{'BACKEND': 'apps.notifications.sms.ConsoleGateway'}]
+
+SMS_DISPATCH_MODE = os.environ.get('SMS_DISPATCH_MODE', 'thread')  # 'thread', 'celery' or 'sync'
+SMS_MAX_ATTEMPTS = 3
+SMS_RETRY_BACKOFF_SECONDS = 0.5
+BACKGROUND_THREAD_POOL_SIZE = 8
+
 # OTP Configuration
 OTP_EXPIRY_MINUTES = 5
+
+# Live OTP codes (see apps.authentication.otp_store). 'database' keeps one row per code.
+OTP_STORE_BACKEND = os.environ.get('OTP_STORE_BACKEND', 'apps.authentication.otp_store.RedisOTPStore')
+# Audit rows in PhoneOTP / OTPVerification: 'async', 'sync' or 'off'
+OTP_AUDIT_TRAIL = os.environ.get('OTP_AUDIT_TRAIL', 'async')
+
+# OTP send rate limiting (see apps.authentication.ratelimit).
+# Each rule is (window_seconds, max_requests, message).
+OTP_RATE_LIMITER_BACKEND = os.environ.get(
+    'OTP_RATE_LIMITER_BACKEND', 'apps.authentication.ratelimit.RedisRateLimiter'
+)
+OTP_RATE_LIMIT_RULES = [
+    (60, 1, "Please wait 60 seconds before requesting a new OTP."),
+    (600, 3, "Too many attempts. Please try again after 10 minutes."),
+]
@@ -1,3 +1,5 @@
+import os
+
 from .base import *
 
 DEBUG = True
@@ -11,3 +13,21 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 # Email backend for development (console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Without a Redis server, fall back to in-process stand-ins
+if not os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+    OTP_RATE_LIMITER_BACKEND = os.environ.get(
+        'OTP_RATE_LIMITER_BACKEND', 'apps.authentication.ratelimit.InMemoryRateLimiter'
+    )
+    OTP_STORE_BACKEND = os.environ.get(
+        'OTP_STORE_BACKEND', 'apps.authentication.otp_store.InMemoryOTPStore'
+    )
+    SESSION_ACTIVITY_BACKEND = os.environ.get(
+        'SESSION_ACTIVITY_BACKEND', 'apps.user_management.sessions.InMemoryActivityBuffer'
+    )
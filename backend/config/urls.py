@@ -32,6 +32,7 @@ urlpatterns = [
     path('api/v1/notifications/', include('apps.notifications.urls')),
     path('api/v1/content/', include('apps.content.urls')),
     path('api/v1/admin/', include('apps.admin_dashboard.urls')),
+    path('api/v1/uploads/', include('apps.uploads.urls')),
 
     # Documentation
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -42,6 +43,7 @@ urlpatterns = [
     path('api/health/', lambda request: __import__('django.http').JsonResponse({"status": "ok"}), name='health_check'),
 ]
 
+# Media is not mounted: attachments and documents are only served through their views
+# after an access check (see apps.uploads.serving)
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
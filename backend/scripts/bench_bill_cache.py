@@ -0,0 +1,88 @@
+"""
+Bill lookup: query + serialize on every call vs the per-consumer bill cache.
+
+    python scripts/bench_bill_cache.py --consumers 20000 --lookups 20000
+    python scripts/bench_bill_cache.py --repeat 5
+
+Lookups pick consumers at random, each consumer being looked up `--repeat`
+times on average (a citizen re-checking a bill before paying). Also checks
+that marking a bill PAID invalidates the cached entry.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from apps.billing.cache import bill_cache_stats, get_bills
+from apps.billing.models import Bill
+from apps.billing.serializers import BillSerializer
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+
+def seed(consumers, bills_per_consumer, batch_size=20000):
+    today = date.today()
+    rows = []
+    for c in range(consumers):
+        for b in range(bills_per_consumer):
+            rows.append(Bill(
+                bill_id=f"B{c:08d}-{b:02d}", account_type=Bill.AccountType.ELECTRICITY,
+                consumer_number=f"EL{c:08d}", bill_date=today - timedelta(days=30 * b),
+                due_date=today - timedelta(days=30 * b - 15), amount=1000 + b, status=Bill.Status.PENDING,
+            ))
+            if len(rows) >= batch_size:
+                Bill.objects.bulk_create(rows)
+                rows = []
+    Bill.objects.bulk_create(rows)
+
+
+def uncached(consumer_number):
+    queryset = Bill.objects.filter(consumer_number=consumer_number).order_by('-bill_date', 'bill_id')
+    return BillSerializer(queryset, many=True).data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--consumers', type=int, default=20000)
+    parser.add_argument('--bills', type=int, default=6, help='bills per consumer')
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--repeat', type=float, default=4, help='average lookups per consumer')
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed(args.consumers, args.bills)
+        cache.clear()
+        pool = max(1, int(args.lookups / args.repeat))
+        targets = [f"EL{random.randrange(min(pool, args.consumers)):08d}" for _ in range(args.lookups)]
+
+        print_report("query + serialize", measure(lambda i: uncached(targets[i]), args.lookups))
+        print_report("bill cache", measure(lambda i: get_bills(targets[i]), args.lookups))
+        print(f"Cache: {bill_cache_stats.snapshot()}")
+
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create(username='bench', phone='9000000000'))
+        url = f"/api/v1/billing/fetch/{targets[0]}/"
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        bill = Bill.objects.filter(consumer_number=targets[0]).first()
+        bill.status = Bill.Status.PAID
+        bill.save()
+        response = client.get(url)
+        paid = {row['bill_id']: row['status'] for row in response.data['results']}[bill.bill_id]
+        assert response['X-Cache'] == 'MISS' and paid == Bill.Status.PAID
+        print("Invalidation on payment: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Itemized bill reads: nested ModelSerializers vs the plain renderer.
+
+    python scripts/bench_bill_detail.py --bills 5000 --items 8 --batch 20
+
+First checks the query budget of the detail and batch endpoints (two
+queries however many bills and line items), then times rendering `--batch`
+itemized bills three ways: nested ModelSerializer without prefetching
+(N+1), with prefetch_related, and load_itemized_bills().
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from apps.billing.models import Bill, BillLineItem
+from apps.billing.serializers import load_itemized_bills
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+
+class LineItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BillLineItem
+        fields = ('id', 'description', 'amount', 'quantity')
+
+
+class NestedBillSerializer(serializers.ModelSerializer):
+    line_items = LineItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Bill
+        fields = '__all__'
+
+
+def seed(bills, items_per_bill):
+    Bill.objects.bulk_create(
+        Bill(bill_id=f"B{n:08d}", account_type=Bill.AccountType.ELECTRICITY, consumer_number=f"EL{n:08d}",
+             bill_date=date.today(), due_date=date.today(), amount=1000 + n % 500, arrears=0)
+        for n in range(bills)
+    )
+    BillLineItem.objects.bulk_create(
+        (BillLineItem(bill_id=f"B{n:08d}", description=f"Charge {i}", amount=10 + i, quantity=1)
+         for n in range(bills) for i in range(items_per_bill)),
+        batch_size=5000,
+    )
+
+
+def check_query_budget(batch):
+    client = APIClient()
+    client.force_authenticate(CustomUser.objects.create(username='bench', phone='9000000000'))
+    ids = [f"B{n:08d}" for n in range(batch)] + ['MISSING']
+    for label, url in [
+        ("detail", f"/api/v1/billing/details/{ids[0]}/"),
+        (f"batch of {len(ids)}", f"/api/v1/billing/details/batch/?bill_ids={','.join(ids)}"),
+    ]:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200, response.data
+        assert len(queries) <= 2, f"{label}: {len(queries)} queries"
+        print(f"Query budget, {label}: {len(queries)} queries OK")
+    assert response.data['missing'] == ['MISSING']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bills', type=int, default=5000)
+    parser.add_argument('--items', type=int, default=8, help='line items per bill')
+    parser.add_argument('--batch', type=int, default=20, help='bills per call')
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed(args.bills, args.items)
+        check_query_budget(args.batch)
+
+        batches = [random.sample(range(args.bills), args.batch) for _ in range(args.iterations)]
+        batches = [[f"B{n:08d}" for n in batch] for batch in batches]
+
+        def naive(i):
+            return NestedBillSerializer(Bill.objects.filter(bill_id__in=batches[i]), many=True).data
+
+        def prefetched(i):
+            queryset = Bill.objects.filter(bill_id__in=batches[i]).prefetch_related('line_items')
+            return NestedBillSerializer(queryset, many=True).data
+
+        for label, fn in [
+            ("nested ModelSerializer (N+1)", naive),
+            ("nested ModelSerializer + prefetch", prefetched),
+            ("load_itemized_bills", lambda i: load_itemized_bills(batches[i])),
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                fn(0)
+            print_report(f"{label} [{len(queries)} q]", measure(fn, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
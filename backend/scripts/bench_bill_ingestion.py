@@ -0,0 +1,113 @@
+"""
+Bulk bill ingestion throughput.
+
+    python scripts/bench_bill_ingestion.py --bills 1000000
+    python scripts/bench_bill_ingestion.py --bills 200000 --format csv --crash-after 10
+
+Writes a synthetic billing cycle (3 line items per bill, a few invalid
+records) to a temporary file and ingests it. With --crash-after N the run
+is interrupted after N batches and resumed, and the final row counts are
+checked. Point DATABASE_URL at Postgres to exercise the COPY path.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from apps.billing.ingestion import ingest_bills
+from apps.billing.models import Bill, BillLineItem
+from utils.benchmark import benchmark_database
+
+COLUMNS = ['bill_id', 'account_type', 'consumer_number', 'bill_date', 'due_date', 'amount', 'arrears', 'line_items']
+
+
+class Crash(Exception):
+    pass
+
+
+def generate(path, bills, fmt, invalid_every=10000):
+    bill_date = date.today().replace(day=1)
+    due_date = bill_date + timedelta(days=15)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(COLUMNS)
+        for n in range(bills):
+            units = random.randint(50, 800)
+            items = [
+                {'description': 'Energy charge', 'amount': f"{units * 6.5:.2f}", 'quantity': units},
+                {'description': 'Fixed charge', 'amount': '120.00', 'quantity': 1},
+                {'description': 'Electricity duty', 'amount': f"{units * 0.4:.2f}", 'quantity': 1},
+            ]
+            row = {
+                'bill_id': f"EB{bill_date:%Y%m}{n:08d}", 'account_type': 'ELECTRICITY',
+                'consumer_number': f"EL{n:010d}", 'bill_date': bill_date.isoformat(),
+                'due_date': due_date.isoformat() if n % invalid_every else 'not-a-date',
+                'amount': f"{sum(float(i['amount']) for i in items):.2f}", 'arrears': '0', 'line_items': items,
+            }
+            if writer:
+                writer.writerow([json.dumps(row[c]) if c == 'line_items' else row[c] for c in COLUMNS])
+            else:
+                f.write(json.dumps(row) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bills', type=int, default=1000000)
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--crash-after', type=int, default=0, help='interrupt the first run after N batches')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix='suvidha-bills-', suffix=f".{args.format}")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        generate(path, args.bills, args.format)
+        print(f"Generated {args.bills:,} bills ({os.path.getsize(path) / 2**20:.0f} MiB) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        with benchmark_database():
+            batches = 0
+
+            def progress(run, rate):
+                nonlocal batches
+                batches += 1
+                if batches % 20 == 0:
+                    print(f"  {run.rows_processed:,} rows, {rate:,.0f} rows/s")
+                if batches == args.crash_after:
+                    raise Crash()
+
+            start = time.perf_counter()
+            try:
+                run = ingest_bills(path, batch_size=args.batch_size, on_batch=progress)
+            except Crash:
+                print(f"Interrupted after {batches} batches; resuming")
+                run = ingest_bills(path, batch_size=args.batch_size, on_batch=progress)
+            elapsed = time.perf_counter() - start
+
+            print(f"Ingested {run.rows_processed:,} rows in {elapsed:.1f}s: {run.rows_processed / elapsed:,.0f} rows/s "
+                  f"({run.bills_written:,} bills, {run.line_items_written:,} line items, {run.rows_rejected} rejected)")
+            expected = args.bills - len(range(0, args.bills, 10000))
+            assert Bill.objects.count() == expected, Bill.objects.count()
+            assert BillLineItem.objects.count() == expected * 3
+            print("Row counts: OK")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
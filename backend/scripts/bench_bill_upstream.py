@@ -0,0 +1,84 @@
+"""
+Bill lookups against a slow upstream: coalescing, stale-while-revalidate
+and the circuit breaker.
+
+    python scripts/bench_bill_upstream.py --latency-ms 300 --threads 16
+    python scripts/bench_bill_upstream.py --consumers 50 --failure-rate 1
+
+Starts scripts/fake_bill_upstream.py in-process and runs three scenarios:
+cold lookups where every kiosk thread asks for the same consumers at once,
+warm lookups of consumers whose local copy is out of date, and lookups
+while the upstream fails every call.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.core.cache import cache
+from django.test import override_settings
+from apps.billing.upstream import fetch_bills, get_bill_source
+from utils.background import get_executor
+from utils.benchmark import benchmark_database, measure, print_report, run_concurrently
+import fake_bill_upstream
+
+logging.getLogger("apps.billing.upstream").setLevel(logging.ERROR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency-ms', type=int, default=200)
+    parser.add_argument('--failure-rate', type=float, default=1.0, help='upstream failure rate in the last scenario')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent kiosks')
+    parser.add_argument('--consumers', type=int, default=20)
+    args = parser.parse_args()
+
+    server = fake_bill_upstream.start(latency_ms=args.latency_ms)
+    upstream = {'BACKEND': 'apps.billing.upstream.HTTPBillSource', 'OPTIONS': {'base_url': server.url}}
+    consumers = [f"CN{n:08d}" for n in range(args.consumers)]
+
+    with override_settings(BILL_UPSTREAM=upstream), benchmark_database():
+        get_bill_source.cache_clear()
+        source, _ = get_bill_source()
+        cache.clear()
+
+        server.requests = 0
+        stats = measure(lambda i: source.fetch(consumers[i]), len(consumers))
+        print_report("direct upstream call", stats)
+
+        server.requests = 0
+        stats = run_concurrently(lambda t, i: fetch_bills(consumers[i]), args.threads, len(consumers))
+        print_report(f"cold, {args.threads} kiosks per consumer", stats)
+        print(f"  upstream calls: {server.requests} for {stats['count']} lookups")
+
+        with override_settings(BILL_UPSTREAM_MAX_AGE=0):
+            cache.delete_many([f"bills:{c}" for c in consumers])
+            server.requests = 0
+            stats = run_concurrently(lambda t, i: fetch_bills(consumers[i]), args.threads, len(consumers))
+            print_report("warm, stale (served locally)", stats)
+            get_executor().shutdown(wait=True)
+            print(f"  background refreshes: {server.requests}")
+
+        cache.clear()
+        server.failure_rate = args.failure_rate
+        server.requests = 0
+        start = time.perf_counter()
+        stats = run_concurrently(lambda t, i: fetch_bills(consumers[i]), args.threads, len(consumers))
+        print_report(f"upstream failing ({args.failure_rate:.0%})", stats)
+        print(f"  upstream calls: {server.requests}, breaker: {get_bill_source()[1].state}, "
+              f"wall {time.perf_counter() - start:.2f}s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Overdue sweep and due-reminder jobs over a large Bill table.
+
+    python scripts/bench_billing_jobs.py --bills 10000000
+    python scripts/bench_billing_jobs.py --bills 1000000 --chunk-size 10000
+
+Seeds bills spread over 60 due dates (a third of them already past due,
+each owned by an electricity account), runs both jobs twice to show the
+second run is a no-op, and reports per-chunk statement times, which bound
+how long rows stay locked. Finally compares against a single unchunked
+UPDATE. Seeding 10M rows on SQLite takes a while; point DATABASE_URL at
+Postgres for production-like numbers.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+from apps.billing.jobs import create_due_reminders, mark_overdue_bills, overdue_chunk_latency, reminder_chunk_latency
+from apps.billing.models import Bill, ElectricityAccount
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database
+
+ACCOUNTS = 1000
+
+
+def seed(bills, batch_size=50000):
+    users = CustomUser.objects.bulk_create(CustomUser(username=f"u{n}", phone=f"9{n:09d}") for n in range(ACCOUNTS))
+    ElectricityAccount.objects.bulk_create(
+        ElectricityAccount(consumer_number=f"EL{n:08d}", user=user, account_holder='-', address='-', meter_number='-')
+        for n, user in enumerate(users)
+    )
+    today = timezone.localdate()
+    ops = connection.ops
+    dates = [ops.adapt_datefield_value(today + timedelta(days=d)) for d in range(-20, 40)]
+    table = ops.quote_name(Bill._meta.db_table)
+    sql = (f"INSERT INTO {table} (bill_id, account_type, consumer_number, bill_date, due_date, amount, arrears, status) "
+           f"VALUES (%s, 'ELECTRICITY', %s, %s, %s, 100, 0, 'PENDING')")
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        for offset in range(0, bills, batch_size):
+            cursor.executemany(sql, [
+                (f"B{n:010d}", f"EL{n % ACCOUNTS:08d}", dates[0], dates[n % len(dates)])
+                for n in range(offset, min(bills, offset + batch_size))
+            ])
+            if (offset + batch_size) % 1_000_000 < batch_size:
+                print(f"  seeded {min(bills, offset + batch_size):,} bills ({time.perf_counter() - start:.0f}s)")
+
+
+def report(label, count, elapsed, recorder=None):
+    line = f"{label:<36} {count:>10,} rows in {elapsed:7.2f}s"
+    chunks = recorder.snapshot() if recorder else {}
+    if 'p50_ms' in chunks:
+        line += f"   per chunk p50={chunks['p50_ms']}ms p99={chunks['p99_ms']}ms"
+    print(line)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bills', type=int, default=1000000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        print(f"Seeding {args.bills:,} bills...")
+        seed(args.bills)
+
+        updated, elapsed = timed(mark_overdue_bills, chunk_size=args.chunk_size)
+        report("mark_overdue_bills", updated, elapsed, overdue_chunk_latency)
+        updated, elapsed = timed(mark_overdue_bills, chunk_size=args.chunk_size)
+        report("mark_overdue_bills (re-run)", updated, elapsed)
+        created, elapsed = timed(create_due_reminders, days=3, chunk_size=args.chunk_size)
+        report("create_due_reminders", created, elapsed, reminder_chunk_latency)
+        created, elapsed = timed(create_due_reminders, days=3, chunk_size=args.chunk_size)
+        report("create_due_reminders (re-run)", created, elapsed)
+
+        Bill.objects.filter(status=Bill.Status.OVERDUE).update(status=Bill.Status.PENDING)
+        updated, elapsed = timed(
+            Bill.objects.filter(status=Bill.Status.PENDING, due_date__lt=timezone.localdate()).update,
+            status=Bill.Status.OVERDUE,
+        )
+        report("single unchunked UPDATE", updated, elapsed)
+        print("  (one statement holding every row lock for its whole duration)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Near-duplicate complaint detection (apps.grievances.dedup): precision,
+recall and throughput.
+
+    python scripts/bench_complaint_dedup.py
+    python scripts/bench_complaint_dedup.py --complaints 1000000 --outages 5000
+
+Generates a day of complaints: outage groups, each many citizens' takes on
+one incident (words dropped, swapped or added, typos, a different
+landmark), and as many unrelated complaints written from the same
+vocabulary. Then:
+
+1. signature() throughput and the in-memory index replayed over the day:
+   query/add latency, and precision (links whose parent is from the same
+   group) and recall (complaints with an earlier member of their group that
+   got linked);
+2. backfill() over the same complaints stored in the database, rows/s and
+   the same precision/recall from the stored links;
+3. find_parent() latency for new submissions against the process index.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.grievances import dedup
+from apps.grievances.models import Complaint
+from apps.user_management.models import CustomUser
+from utils.background import get_executor
+from utils.benchmark import benchmark_database, measure, print_report, summarize
+
+SCOPES = [('Electricity', 'Outage'), ('Electricity', 'Voltage'), ('Water', 'Supply'), ('Water', 'Leak'),
+          ('Gas', 'Booking'), ('Municipal', 'Streetlight'), ('Municipal', 'Garbage')]
+WORDS = ("power supply water gas cut off since morning evening night hours no electricity transformer burst "
+         "sparking pole wire fallen road street colony sector block near temple school market hospital park "
+         "low pressure dirty smell leaking pipe burst tanker not come cylinder booking pending delivery delayed "
+         "streetlight not working dark garbage not collected overflowing drain blocked please fix urgently "
+         "whole area affected children elderly patients suffering complaint already made nobody came").split()
+LANDMARKS = ["temple", "school", "market", "hospital", "park", "bus stand", "water tank", "post office"]
+EXTRAS = ["please help", "very urgent", "kindly resolve", "third time complaining", "since yesterday", "asap"]
+
+
+def perturb(rng, template):
+    words = template.split()
+    for _ in range(rng.randrange(0, 3)):
+        words.pop(rng.randrange(len(words)))
+    if rng.random() < 0.5:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    if rng.random() < 0.4:
+        word = words[rng.randrange(len(words))]
+        if len(word) > 3:
+            i = rng.randrange(len(word) - 1)
+            words[words.index(word)] = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    text = ' '.join(words)
+    if rng.random() < 0.5:
+        text += ' ' + rng.choice(EXTRAS)
+    if rng.random() < 0.3:
+        text = text.replace('near', f"near {rng.choice(LANDMARKS)}", 1)
+    return text.capitalize() + rng.choice(['.', '!', '', '!!'])
+
+
+def generate(complaints, outages, seed=11):
+    """(scope, description, group, seconds into the day) in filing order; groups < 0 are one-offs."""
+    rng = random.Random(seed)
+    items = []
+    templates = []
+    for group in range(outages):
+        words = rng.sample(WORDS, rng.randrange(14, 26))
+        templates.append((rng.choice(SCOPES), ' '.join(words), rng.uniform(0, 80000)))
+    grouped = complaints // 2
+    for n in range(grouped):
+        group = min(int(rng.paretovariate(0.8)) - 1, outages - 1) if n >= outages else n
+        scope, template, start = templates[group]
+        items.append((scope, perturb(rng, template), group, start + rng.expovariate(1 / 1800)))
+    for n in range(complaints - grouped):
+        words = [rng.choice(WORDS) for _ in range(rng.randrange(12, 30))]
+        items.append((rng.choice(SCOPES), ' '.join(words).capitalize() + '.', -1 - n, rng.uniform(0, 86400)))
+    items.sort(key=lambda item: item[3])
+    return items
+
+
+def score(groups, parents):
+    """(precision, recall) of links; parents[i] is the index of i's parent or None."""
+    seen, eligible, linked, correct, found = set(), 0, 0, 0, 0
+    for i, group in enumerate(groups):
+        if group in seen:
+            eligible += 1
+        if parents[i] is not None:
+            linked += 1
+            if groups[parents[i]] == group:
+                correct += 1
+                found += group in seen
+        seen.add(group)
+    return correct / linked if linked else 1.0, found / eligible if eligible else 1.0
+
+
+def replay(items, signatures):
+    index = dedup.DedupIndex()
+    parents, queries, adds = [], [], []
+    for i, ((scope, _, _, at), sig) in enumerate(zip(items, signatures)):
+        start = time.perf_counter()
+        parent, _ = index.query(scope, sig, at)
+        queries.append(time.perf_counter() - start)
+        if parent is None:
+            start = time.perf_counter()
+            index.add(i + 1, scope, sig, at)
+            adds.append(time.perf_counter() - start)
+        parents.append(parent - 1 if parent is not None else None)
+    print_report("index.query", summarize(queries))
+    print_report("index.add (roots)", summarize(adds))
+    print(f"  {len(index):,} roots indexed")
+    return parents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--complaints', type=int, default=200000)
+    parser.add_argument('--outages', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    items = generate(args.complaints, args.outages)
+    groups = [group for _, _, group, _ in items]
+    print(f"{len(items):,} complaints, {args.outages:,} outage groups, "
+          f"{sum(group < 0 for group in groups):,} one-offs\n")
+
+    start = time.perf_counter()
+    signatures = [dedup.signature(text) for _, text, _, _ in items]
+    elapsed = time.perf_counter() - start
+    print(f"signature(): {len(items) / elapsed:,.0f} descriptions/s ({elapsed / len(items) * 1e6:.0f} us each)")
+    precision, recall = score(groups, replay(items, signatures))
+    print(f"In-memory replay: precision {precision:.4f}, recall {recall:.4f}\n")
+
+    with benchmark_database():
+        user = CustomUser.objects.create(username='citizen', phone='9000000000')
+        day = timezone.now() - timedelta(days=1)
+        ops = connection.ops
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {Complaint._meta.db_table} (complaint_id, user_id, service_type, category, "
+                f"description, priority, status, language, created_at) "
+                f"VALUES (%s, %s, %s, %s, %s, 'MEDIUM', 'OPEN', 'en', %s)",
+                [(f"CMP{i:09d}", user.pk, scope[0], scope[1], text,
+                  ops.adapt_datetimefield_value(day + timedelta(seconds=at)))
+                 for i, (scope, text, _, at) in enumerate(items)],
+            )
+        start = time.perf_counter()
+        scanned, signed, linked = dedup.backfill(batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"backfill(): {scanned:,} complaints in {elapsed:.1f}s = {scanned / elapsed:,.0f}/s, "
+              f"{signed:,} signed, {linked:,} linked")
+        position = {f"CMP{i:09d}": i for i in range(len(items))}
+        by_pk = dict(Complaint.objects.values_list('pk', 'complaint_id'))
+        parents = [None] * len(items)
+        for complaint_id, parent in Complaint.objects.values_list('complaint_id', 'parent_id'):
+            parents[position[complaint_id]] = position[by_pk[parent]] if parent else None
+        precision, recall = score(groups, parents)
+        print(f"Stored links: precision {precision:.4f}, recall {recall:.4f}\n")
+
+        # New submissions against the live index: repeats of the busiest outages
+        start = time.perf_counter()
+        dedup.get_index().loaded.wait()
+        print(f"Process index loaded from the database in {time.perf_counter() - start:.2f}s")
+        rng = random.Random(5)
+        recent = [item for item in items if item[2] >= 0][-2000:]
+        submissions = [rng.choice(recent) for _ in range(2000)]
+        at = day + timedelta(seconds=max(item[3] for item in recent) + 60)
+        hits = []
+
+        def submit(i):
+            scope, text, _, _ = submissions[i]
+            hits.append(dedup.find_parent(scope[0], scope[1], perturb(rng, text), at=at)[1] is not None)
+
+        stats = measure(submit, len(submissions))
+        print_report("find_parent (signature + lookup)", stats)
+        print(f"  {sum(hits) / len(hits):.1%} of repeat submissions linked")
+        get_executor().shutdown(wait=True)
+    if precision < 0.95:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Complaint search: icontains scans vs the full-text index (apps.grievances.search).
+
+    python scripts/bench_complaint_search.py
+    python scripts/bench_complaint_search.py --complaints 500000 --iterations 50
+    DATABASE_URL=postgres://... python scripts/bench_complaint_search.py
+
+Seeds synthetic complaints in English, Hindi and Tamil through raw INSERTs
+(the search triggers index them as they land), then times a mix of queries
+through search_complaints() and, for the same words, the icontains filter
+admins used before. A token planted in every --planted-every'th complaint
+checks that search finds exactly those.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.grievances.models import Complaint
+from apps.grievances.search import search_complaints
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+PLANTED = 'zeroxylophone'
+
+VOCABULARY = {
+    'en': ("electricity meter bill water leak pipe gas cylinder supply outage transformer voltage streetlight "
+           "garbage sewage connection overcharged reading refund delay broken pressure contaminated billing "
+           "payment disconnected wrong estimated tap drainage booking subsidy kiosk receipt duplicate pole wire "
+           "sparking flooding tanker low high since days weeks please urgent again still not working").split(),
+    'hi': ("बिजली पानी बिल मीटर गैस कनेक्शन शिकायत लीकेज कटौती सिलेंडर आपूर्ति ट्रांसफार्मर वोल्टेज भुगतान "
+           "गलत रीडिंग कृपया जल्दी दिनों से नहीं आ रहा है बहुत ज़्यादा").split(),
+    'ta': ("மின்சாரம் தண்ணீர் கட்டணம் மீட்டர் எரிவாயு இணைப்பு புகார் கசிவு மின்தடை குழாய் "
+           "தவறான அளவீடு தயவுசெய்து நாட்களாக இல்லை").split(),
+}
+SERVICES = [('Electricity', ['Billing', 'Outage', 'Meter', 'Voltage']), ('Water', ['Leak', 'Supply', 'Quality']),
+            ('Gas', ['Booking', 'Leak', 'Subsidy']), ('Municipal', ['Streetlight', 'Garbage', 'Drainage'])]
+
+QUERIES = [
+    # (label, text, filters, words for the icontains baseline)
+    ("common word", "meter", {}, ["meter"]),
+    ("two words", "transformer sparking", {}, ["transformer", "sparking"]),
+    ("stemmed (billed -> bill)", "billed", {}, ["billed"]),
+    ("phrase", '"not working"', {}, ["not working"]),
+    ("word + status filter", "leak", {'status': 'OPEN'}, ["leak"]),
+    ("Hindi, language=hi", "बिजली मीटर", {'language': 'hi'}, ["बिजली", "मीटर"]),
+    ("Tamil", "கசிவு", {}, ["கசிவு"]),
+    ("rare planted token", PLANTED, {}, [PLANTED]),
+]
+
+
+def seed(complaints, planted_every, batch_size=20000):
+    rng = random.Random(3)
+    user = CustomUser.objects.create(username='citizen', phone='9000000000')
+    languages = ['en'] * 12 + ['hi'] * 5 + ['ta'] * 3
+    statuses = Complaint.Status.values
+    priorities = Complaint.Priority.values
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = (f"INSERT INTO {Complaint._meta.db_table} (complaint_id, user_id, service_type, category, description, "
+           f"priority, status, language, created_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)")
+
+    def row(n):
+        language = rng.choice(languages)
+        words = VOCABULARY[language]
+        # Zipf-ish: low indexes are far more frequent
+        text = [words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(rng.randrange(12, 30))]
+        if language != 'en' and rng.random() < 0.3:
+            text += rng.sample(VOCABULARY['en'], 3)
+        if n % planted_every == 0:
+            text.insert(rng.randrange(len(text)), PLANTED)
+        service, categories = rng.choice(SERVICES)
+        return (f"CMP{n:09d}", user.pk, service, rng.choice(categories), ' '.join(text),
+                rng.choice(priorities), rng.choice(statuses), language, now)
+
+    with connection.cursor() as cursor:
+        for offset in range(0, complaints, batch_size):
+            with transaction.atomic():
+                cursor.executemany(sql, [row(n) for n in range(offset, min(complaints, offset + batch_size))])
+    return user
+
+
+def icontains(words, filters):
+    condition = Q()
+    for word in words:
+        condition &= Q(description__icontains=word) | Q(category__icontains=word) | Q(service_type__icontains=word)
+    return list(Complaint.objects.filter(condition, **filters).order_by('-id')[:20])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--complaints', type=int, default=5000000)
+    parser.add_argument('--planted-every', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--baseline-iterations', type=int, default=3, help='icontains scans are slow')
+    args = parser.parse_args()
+
+    with benchmark_database():
+        start = time.perf_counter()
+        seed(args.complaints, args.planted_every)
+        elapsed = time.perf_counter() - start
+        print(f"Seeded and indexed {args.complaints:,} complaints in {elapsed:.1f}s "
+              f"({args.complaints / elapsed:,.0f} rows/s)\n")
+
+        expected = len(range(0, args.complaints, args.planted_every))
+        found = search_complaints(PLANTED, limit=100)
+        ok = len(found) == min(expected, 100) and all(PLANTED in complaint.description for complaint, _ in found)
+        print(f"Planted token: found {len(found)} of {expected}  {'OK' if ok else 'MISMATCH'}")
+        top, rank = search_complaints("transformer sparking", limit=1)[0]
+        print(f"Top hit for 'transformer sparking' (rank {rank:.3f}): {top.category} / {top.description[:70]}...\n")
+
+        for label, text, filters, words in QUERIES:
+            print_report(f"search: {label}", measure(
+                lambda i: search_complaints(text, **filters), args.iterations))
+            print_report(f"icontains: {label}", measure(
+                lambda i: icontains(words, filters), args.baseline_iterations))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Household bill summary: one query per utility vs the single UNION query,
+and the per-user cache on top.
+
+    python scripts/bench_household_summary.py --users 20000 --lookups 5000
+
+Every user gets an electricity, gas and water account with `--bills`
+monthly bills each. The naive baseline runs one annotated query per
+account table, which is what covering all three utilities took before.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.test.utils import CaptureQueriesContext
+from apps.billing.accounts import ACCOUNT_MODELS, build_household_summary, get_household_summary
+from apps.billing.models import Bill
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+
+def seed(users, bills_per_account, batch_size=2000):
+    first = date.today().replace(day=1)
+    for offset in range(0, users, batch_size):
+        created = CustomUser.objects.bulk_create(
+            CustomUser(username=f"u{n}", phone=f"9{n:09d}") for n in range(offset, min(users, offset + batch_size))
+        )
+        bills = []
+        for account_type, model in ACCOUNT_MODELS.items():
+            prefix = account_type[0]
+            model.objects.bulk_create(
+                model(consumer_number=f"{prefix}{user.pk:09d}", user=user, account_holder=user.username, address='-',
+                      **({'meter_number': '-'} if account_type == Bill.AccountType.ELECTRICITY else {}))
+                for user in created
+            )
+            for user in created:
+                for m in range(bills_per_account):
+                    bill_date = first - timedelta(days=31 * m)
+                    bills.append(Bill(
+                        bill_id=f"{prefix}{user.pk:09d}-{m:02d}", account_type=account_type,
+                        consumer_number=f"{prefix}{user.pk:09d}", bill_date=bill_date,
+                        due_date=bill_date + timedelta(days=15), amount=500 + m, arrears=m * 10,
+                        status=Bill.Status.PENDING if m < 2 else Bill.Status.PAID,
+                    ))
+        Bill.objects.bulk_create(bills, batch_size=5000)
+
+
+def naive_summary(user_id):
+    """One query per utility: accounts annotated with outstanding and the latest bill."""
+    result = []
+    for account_type, model in ACCOUNT_MODELS.items():
+        bills = Bill.objects.filter(account_type=account_type, consumer_number=OuterRef('consumer_number'))
+        latest = bills.order_by('-bill_date', '-bill_id')
+        result.extend(model.objects.filter(user_id=user_id).annotate(
+            outstanding=Subquery(bills.filter(~Q(status=Bill.Status.PAID)).values('consumer_number')
+                                 .annotate(total=Sum('amount')).values('total')),
+            latest_bill_id=Subquery(latest.values('bill_id')[:1]),
+            latest_amount=Subquery(latest.values('amount')[:1]),
+            latest_status=Subquery(latest.values('status')[:1]),
+        ).values())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--bills', type=int, default=12, help='bills per account')
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        print(f"Seeding {args.users:,} households...")
+        seed(args.users, args.bills)
+        user_ids = list(CustomUser.objects.values_list('pk', flat=True))
+        targets = [random.choice(user_ids) for _ in range(args.lookups)]
+
+        for label, fn in [("naive (one query per utility)", naive_summary), ("single UNION query", build_household_summary)]:
+            with CaptureQueriesContext(connection) as queries:
+                fn(targets[0])
+            print_report(f"{label} [{len(queries)} queries]", measure(lambda i: fn(targets[i]), args.lookups))
+
+        cache.clear()
+        print_report("cached summary (4 lookups per user)",
+                     measure(lambda i: get_household_summary(targets[i // 4]), args.lookups))
+
+        summary = build_household_summary(targets[0])
+        assert len(summary['accounts']) == 3 and all(a['latest_bill'] for a in summary['accounts'])
+        print(f"Sample: {summary['utilities']}, total outstanding {summary['total_outstanding']}")
+
+
+if __name__ == "__main__":
+    main()
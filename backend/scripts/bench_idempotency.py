@@ -0,0 +1,109 @@
+"""
+Retry storms against the kiosk POST endpoints, with and without Idempotency-Key.
+
+    python scripts/bench_idempotency.py
+    python scripts/bench_idempotency.py --threads 16 --requests 500
+
+For each of payment initiation, grievance submission and service request
+submission, `--threads` threads send the same `--requests` logical
+requests at the same time, like kiosks retrying on timeouts. Without the
+header every attempt creates a row; with it each logical request must
+create exactly one row however many attempts arrive, and every attempt must
+get the same resource back.
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import date
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from apps.billing.models import Bill
+from apps.grievances.models import Complaint
+from apps.payments.models import Payment
+from apps.service_requests.models import ServiceRequest
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, print_report, run_concurrently
+
+
+def endpoints(user):
+    bill = Bill.objects.create(bill_id='B00000001', account_type=Bill.AccountType.ELECTRICITY,
+                               consumer_number='EL00000001', bill_date=date(2026, 1, 1),
+                               due_date=date(2026, 1, 16), amount=100)
+    return [
+        # The initiate response does not echo the payment id, so only rows are checked there
+        ('payment initiate', '/api/v1/payment/initiate/', Payment, None,
+         lambda i: {'bill': bill.pk, 'amount': '100.00', 'payment_method': 'UPI'}),
+        ('grievance submit', '/api/v1/grievance/submit/', Complaint, 'complaint_id',
+         lambda i: {'user': user.pk, 'service_type': 'Billing', 'category': 'Wrong bill',
+                    'description': f"Kiosk {i}: bill amount looks wrong"}),
+        ('service request submit', '/api/v1/service/request/', ServiceRequest, 'request_id',
+         lambda i: {'user': user.pk, 'service_type': 'Electricity', 'request_type': 'Load Change',
+                    'details': {'kiosk': i}}),
+    ]
+
+
+def storm(user, url, body, id_field, threads, requests, run_id=None):
+    """Every thread sends requests 0..n-1 in order. Returns (stats, status counts, ids per logical request)."""
+    local = threading.local()
+    lock = threading.Lock()
+    statuses = defaultdict(int)
+    ids = defaultdict(set)
+
+    def send(t, i):
+        if not hasattr(local, 'client'):
+            local.client = APIClient()
+            local.client.force_authenticate(user)
+        headers = {'HTTP_IDEMPOTENCY_KEY': f"{run_id}-{i}"} if run_id else {}
+        response = local.client.post(url, body(i), format='json', **headers)
+        with lock:
+            statuses[response.status_code] += 1
+            if response.status_code == 201 and id_field:
+                ids[i].add(response.data[id_field])
+
+    stats = run_concurrently(send, threads, requests)
+    return stats, dict(statuses), ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    failed = False
+    with benchmark_database():
+        user = CustomUser.objects.create(username='kiosk', phone='9000000000')
+        for label, url, model, id_field, body in endpoints(user):
+            for run_id in (None, label.replace(' ', '-')):
+                cache.clear()
+                before = model.objects.count()
+                stats, statuses, ids = storm(user, url, body, id_field, args.threads, args.requests, run_id)
+                created = model.objects.count() - before
+                attempts = args.threads * args.requests
+                print_report(f"{label} ({'Idempotency-Key' if run_id else 'no key'})", stats)
+                print(f"  {attempts} attempts of {args.requests} requests -> {created} rows "
+                      f"({created / args.requests:.2f} per request)  statuses={statuses}")
+                if run_id:
+                    consistent = not id_field or (all(len(v) == 1 for v in ids.values()) and len(ids) == args.requests)
+                    if created != args.requests or not consistent:
+                        print("  FAILED: expected one row per request and one id per request across attempts")
+                        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
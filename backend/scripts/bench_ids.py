@@ -0,0 +1,170 @@
+"""
+Business ids: random uuid4().hex[:8] vs time-ordered utils.ids.
+
+    python scripts/bench_ids.py
+    DATABASE_URL=postgres://... python scripts/bench_ids.py --rows 2000000
+
+1. Minting: ids/s on one thread and across threads, checking that every id
+   is unique and that each thread sees them increasing.
+2. Collisions: how many of --rows old-style ids repeat (each one was a
+   failed insert, since nothing retried).
+3. Inserts: --rows complaints loaded in batches with each scheme, reporting
+   rows/s, rows lost to collisions, the size of the unique complaint_id
+   index and its leaf density (SQLite dbstat, Postgres pgstattuple), then
+   the latency of single-row Complaint.objects.create() into the loaded
+   table. On Postgres random keys split leaf pages all over the index and
+   leave them half full while ordered keys fill the rightmost page and move
+   on; SQLite rebalances sibling pages, so there the difference is small and
+   the new ids' extra 5 characters dominate the size.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection, transaction
+from apps.grievances.models import Complaint
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+from utils.ids import generator, new_id
+
+SCHEMES = {
+    'uuid4 hex[:8]': lambda: f"CMP-{uuid.uuid4().hex[:8].upper()}",
+    'utils.ids': lambda: new_id("CMP"),
+}
+
+
+def mint(threads, per_thread):
+    start = time.perf_counter()
+    for _ in range(per_thread):
+        generator.next_id()
+    elapsed = time.perf_counter() - start
+    print(f"next_id(), 1 thread: {per_thread / elapsed:,.0f} ids/s")
+
+    minted = [[] for _ in range(threads)]
+
+    def worker(index):
+        out = minted[index]
+        for _ in range(per_thread):
+            out.append(generator.next_id())
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    every = [value for ids in minted for value in ids]
+    unique = len(set(every)) == len(every)
+    ordered = all(ids == sorted(ids) for ids in minted)
+    print(f"next_id(), {threads} threads: {len(every) / elapsed:,.0f} ids/s, "
+          f"unique={'OK' if unique else 'DUPLICATES'}, per-thread order={'OK' if ordered else 'BROKEN'}")
+    return unique and ordered
+
+
+def unique_index_name():
+    table = Complaint._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for _, name, unique, *_ in cursor.execute(f"PRAGMA index_list({table})").fetchall():
+                columns = [row[2] for row in cursor.execute(f"PRAGMA index_info({name})").fetchall()]
+                if unique and columns == ['complaint_id']:
+                    return name
+            return None
+        for name, info in connection.introspection.get_constraints(cursor, table).items():
+            if info['unique'] and info['columns'] == ['complaint_id']:
+                return name
+    return None
+
+
+def index_stats():
+    """(index size in bytes, leaf density % or None)."""
+    name = unique_index_name()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT SUM(pgsize), 100.0 * SUM(pgsize - unused) / SUM(pgsize) FROM dbstat WHERE name = %s",
+                           [name])
+            return cursor.fetchone()
+        if connection.vendor != 'postgresql':
+            return None, None
+        cursor.execute("SELECT pg_relation_size(%s::regclass)", [name])
+        size = cursor.fetchone()[0]
+        try:
+            with transaction.atomic():
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pgstattuple")
+                cursor.execute("SELECT avg_leaf_density FROM pgstatindex(%s)", [name])
+                density = cursor.fetchone()[0]
+        except Exception:
+            density = None
+        return size, density
+
+
+def reset():
+    # Raw DELETE: the ORM would load every row to send post_delete
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {Complaint._meta.db_table}")
+        cursor.execute("VACUUM" if connection.vendor == 'sqlite' else f"VACUUM FULL {Complaint._meta.db_table}")
+
+
+def load(user, make_id, rows, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        with transaction.atomic():
+            Complaint.objects.bulk_create(
+                [Complaint(complaint_id=make_id(), user=user, service_type='Billing', category='Wrong bill',
+                           description='-') for _ in range(min(batch_size, rows - offset))],
+                ignore_conflicts=True,
+            )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--creates', type=int, default=2000, help='single-row creates timed after the load')
+    args = parser.parse_args()
+
+    ok = mint(args.threads, 100000)
+
+    old = [SCHEMES['uuid4 hex[:8]']() for _ in range(args.rows)]
+    print(f"uuid4 hex[:8]: {len(old) - len(set(old)):,} repeated ids in {args.rows:,} "
+          f"(utils.ids: 0 by construction)\n")
+
+    with benchmark_database():
+        user = CustomUser.objects.create(username='citizen', phone='9000000000')
+        for label, make_id in SCHEMES.items():
+            reset()
+            elapsed = load(user, make_id, args.rows, args.batch_size)
+            stored = Complaint.objects.count()
+            size, density = index_stats()
+            print(f"{label}: loaded {stored:,} rows in {elapsed:.1f}s = {stored / elapsed:,.0f} rows/s, "
+                  f"lost to collisions: {args.rows - stored:,}")
+            if size is not None:
+                print(f"  complaint_id index: {size / 2**20:,.1f} MB = {size / stored:.1f} bytes/row"
+                      + (f", leaf density {density:.0f}%" if density is not None else ""))
+            print_report(f"  {label}: create()", measure(
+                lambda i: Complaint.objects.create(complaint_id=make_id(), user=user, service_type='Billing',
+                                                   category='Wrong bill', description='-'),
+                args.creates,
+            ))
+            if label == 'utils.ids':
+                ok &= stored == args.rows
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Admin dashboard: live aggregates vs incrementally maintained KPI rollups.
+
+    python scripts/bench_kpi_rollups.py
+    python scripts/bench_kpi_rollups.py --payments 5000000 --users 200000
+
+Seeds 30 days of payments, users and complaints, backfills the rollups
+with rebuild(), and times the dashboard numbers computed live (COUNT/SUM
+over Payment, CustomUser and Complaint) against dashboard_stats(). Then
+verifies payments, files and progresses complaints and creates users
+through the normal code paths and checks that the incrementally updated
+counters still equal the live aggregates, without a rebuild.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from apps.admin_dashboard.rollups import dashboard_stats, hour_start, rebuild
+from apps.billing.models import Bill
+from apps.grievances.models import Complaint
+from apps.payments.models import Payment
+from apps.payments.transitions import verify_payment
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+BILLS_PER_TYPE = 1000
+METHODS = Payment.Method.values
+
+
+def seed(payments, users, complaints, batch_size=50000):
+    rng = random.Random(7)
+    now = timezone.now()
+    ops = connection.ops
+
+    def past():
+        return ops.adapt_datetimefield_value(now - timedelta(seconds=rng.randrange(30 * 86400)))
+
+    CustomUser.objects.bulk_create(
+        (CustomUser(username=f"u{n}", phone=f"9{n:09d}", created_at=now - timedelta(seconds=rng.randrange(30 * 86400)))
+         for n in range(users)),
+        batch_size=5000,
+    )
+    # created_at is auto_now_add, so backdate it in SQL
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {ops.quote_name(CustomUser._meta.db_table)} SET created_at = %s WHERE id = %s",
+            [(past(), pk) for pk in CustomUser.objects.values_list('pk', flat=True)],
+        )
+    payer = CustomUser.objects.order_by('pk').first()
+    Bill.objects.bulk_create(
+        Bill(bill_id=f"{account_type[0]}{n:08d}", account_type=account_type, consumer_number=f"{account_type[:2]}{n:08d}",
+             bill_date=date(2026, 1, 1), due_date=date(2026, 1, 16), amount=100)
+        for account_type in Bill.AccountType.values for n in range(BILLS_PER_TYPE)
+    )
+    bill_ids = list(Bill.objects.values_list('bill_id', flat=True))
+
+    sql = (f"INSERT INTO {ops.quote_name(Payment._meta.db_table)} "
+           f"(payment_id, bill_id, user_id, amount, payment_method, status, timestamp) VALUES (%s, %s, %s, %s, %s, %s, %s)")
+    statuses = [Payment.Status.SUCCESS] * 16 + [Payment.Status.INITIATED] * 2 + [Payment.Status.FAILURE] * 2
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, payments, batch_size):
+            cursor.executemany(sql, [
+                (f"PAY{n:010d}", rng.choice(bill_ids), payer.pk, f"{rng.randrange(10000, 500000) / 100:.2f}",
+                 rng.choice(METHODS), rng.choice(statuses), past())
+                for n in range(offset, min(payments, offset + batch_size))
+            ])
+        cursor.executemany(
+            f"INSERT INTO {ops.quote_name(Complaint._meta.db_table)} "
+            f"(complaint_id, user_id, service_type, category, description, priority, status, created_at) "
+            f"VALUES (%s, %s, 'Billing', 'Wrong bill', '-', 'MEDIUM', %s, %s)",
+            [(f"CMP{n:08d}", payer.pk, rng.choice(Complaint.Status.values), past()) for n in range(complaints)],
+        )
+
+
+def live_stats():
+    """What the dashboard needs, aggregated from the source tables on every call."""
+    now = timezone.now()
+    paid = Payment.objects.filter(status=Payment.Status.SUCCESS)
+    by_dimension = list(paid.values('bill__account_type', 'payment_method').annotate(n=Count('pk'), total=Sum('amount')))
+    first_hour = hour_start(now) - timedelta(hours=23)
+    hourly = list(
+        paid.filter(timestamp__gte=first_hour).annotate(hour=TruncHour('timestamp')).values('hour')
+        .annotate(n=Count('pk'), total=Sum('amount'))
+    )
+    by_status = dict(Complaint.objects.values_list('status').annotate(n=Count('pk')))
+    return {
+        'total_users': CustomUser.objects.count(),
+        'total_complaints': Complaint.objects.count(),
+        'complaints_by_status': by_status,
+        'total_revenue': sum((row['total'] for row in by_dimension), 0),
+        'total_payments': sum(row['n'] for row in by_dimension),
+        'hourly': hourly,
+    }
+
+
+def compare(label):
+    live = live_stats()
+    stats = dashboard_stats()
+    checks = {
+        'total_users': (live['total_users'], stats['total_users']),
+        'total_complaints': (live['total_complaints'], stats['total_complaints']),
+        'total_payments': (live['total_payments'], stats['total_payments']),
+        'total_revenue': (f"{live['total_revenue']:.2f}", stats['total_revenue']),
+        'complaints_by_status': (
+            {k: v for k, v in live['complaints_by_status'].items() if v},
+            {k: v for k, v in stats['complaints_by_status'].items() if v},
+        ),
+    }
+    bad = {name: pair for name, pair in checks.items() if pair[0] != pair[1]}
+    print(f"{label}: {'rollups match live aggregates' if not bad else f'MISMATCH (live, rollup): {bad}'}")
+    return not bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--payments', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--complaints', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    ok = True
+    with benchmark_database(), override_settings(RECEIPT_RENDER_MODE='sync'):
+        start = time.perf_counter()
+        seed(args.payments, args.users, args.complaints)
+        print(f"Seeded {args.payments:,} payments, {args.users:,} users, {args.complaints:,} complaints "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        rows = rebuild()
+        print(f"Backfill rebuild(): {rows:,} rollup rows in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        rebuild(timezone.now() - timedelta(days=1))
+        print(f"Hourly reconciliation (2 days): {time.perf_counter() - start:.2f}s")
+        ok &= compare("After backfill")
+
+        with CaptureQueriesContext(connection) as queries:
+            dashboard_stats()
+        print(f"dashboard_stats(): {len(queries)} queries")
+        ok &= len(queries) == 2
+
+        print_report("live aggregates", measure(lambda i: live_stats(), max(args.iterations // 10, 3)))
+        print_report("dashboard_stats (rollups)", measure(lambda i: dashboard_stats(), args.iterations))
+
+        pending = list(Payment.objects.filter(status=Payment.Status.INITIATED).values_list('payment_id', flat=True)[:500])
+        print_report("verify_payment (+ rollup upsert)", measure(
+            lambda i: verify_payment(pending[i], 'SUCCESS' if i % 5 else 'FAILURE', f"TXN{i}"), len(pending),
+        ))
+        payer = CustomUser.objects.order_by('pk').first()
+        for n in range(200):
+            complaint = Complaint.objects.create(complaint_id=f"NEW{n:06d}", user=payer, service_type='Billing',
+                                                 category='Meter', description='-')
+            if n % 2:
+                complaint.status = Complaint.Status.IN_PROGRESS
+                complaint.save()
+        for complaint in Complaint.objects.filter(status=Complaint.Status.OPEN)[:100]:
+            complaint.delete()
+        for n in range(100):
+            CustomUser.objects.create(username=f"new{n}", phone=f"8{n:09d}")
+        ok &= compare("After incremental updates")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
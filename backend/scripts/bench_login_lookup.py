@@ -0,0 +1,85 @@
+"""
+Login lookup: the old phone-OR-consumer_number query vs the identifier index.
+
+    python scripts/bench_login_lookup.py --users 5000000
+    python scripts/bench_login_lookup.py --users 200000 --lookups 5000
+
+Seeds synthetic users (each with an electricity account), rebuilds the
+LoginIdentifier index and prints both query plans. Use a Postgres
+DATABASE_URL for production-like plans at 5M users.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db.models import Q
+from apps.billing.models import ElectricityAccount
+from apps.user_management.identifiers import rebuild_login_identifiers, resolve_login_user, normalize_identifier
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+
+def seed(users, batch_size=20000):
+    start = time.perf_counter()
+    for offset in range(0, users, batch_size):
+        size = min(batch_size, users - offset)
+        created = CustomUser.objects.bulk_create(
+            CustomUser(username=f"u{n}", phone=f"9{n:09d}", consumer_number=f"CN{n:010d}")
+            for n in range(offset, offset + size)
+        )
+        ElectricityAccount.objects.bulk_create(
+            ElectricityAccount(consumer_number=f"EL{user.pk:010d}", user=user, account_holder=user.username,
+                               address='-', meter_number=f"M{user.pk}")
+            for user in created
+        )
+        if (offset + size) % 1_000_000 < batch_size:
+            print(f"  seeded {offset + size:,} users ({time.perf_counter() - start:.0f}s)")
+
+
+def or_lookup(identifier):
+    """The query SendLoginOTPView / VerifyLoginOTPView used to run."""
+    return CustomUser.objects.filter(Q(phone=identifier) | Q(consumer_number=identifier)).first()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        print(f"Seeding {args.users:,} users...")
+        seed(args.users)
+        start = time.perf_counter()
+        indexed = rebuild_login_identifiers(batch_size=20000)
+        print(f"Indexed {indexed:,} identifiers in {time.perf_counter() - start:.1f}s")
+
+        first_pk = CustomUser.objects.order_by('pk').values_list('pk', flat=True).first()
+        identifiers = []
+        for _ in range(args.lookups):
+            n = random.randrange(args.users)
+            identifiers.append(random.choice([f"9{n:09d}", f"CN{n:010d}", f"EL{first_pk + n:010d}"]))
+
+        print("\nOR query plan:\n" + CustomUser.objects.filter(
+            Q(phone=identifiers[0]) | Q(consumer_number=identifiers[0])).explain())
+        print("\nIndex query plan:\n" + CustomUser.objects.filter(
+            login_identifiers__identifier=normalize_identifier(identifiers[0])).explain() + "\n")
+
+        print_report("OR lookup (phone/consumer_number)", measure(lambda i: or_lookup(identifiers[i]), args.lookups))
+        print_report("identifier index lookup", measure(lambda i: resolve_login_user(identifiers[i]), args.lookups))
+        misses = sum(1 for i in identifiers if resolve_login_user(i) is None)
+        print(f"Unresolved identifiers via index: {misses} (account numbers are invisible to the OR query)")
+
+
+if __name__ == "__main__":
+    main()
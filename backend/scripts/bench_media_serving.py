@@ -0,0 +1,223 @@
+"""
+Attachment downloads (apps.uploads.serving): worker time per MB served.
+
+    python scripts/bench_media_serving.py
+    python scripts/bench_media_serving.py --files 4 --file-mb 64 --rounds 5
+
+Requests go through the full WSGI handler (middleware, JWT auth, the access
+check) and the response body is written to a local socket drained by
+another thread, the way a sync gunicorn worker writes to its client:
+
+* python: no wsgi.file_wrapper, so the worker iterates the FileResponse
+  and writes every block itself (runserver, or gunicorn behind TLS);
+* sendfile: gunicorn's path, os.sendfile() from the open file, honouring
+  the Range offset and Content-Length;
+* x-accel: MEDIA_ACCEL_REDIRECT='nginx', the worker only produces headers
+  and nginx would send the bytes.
+
+With a slow client (--client-mb-per-s) the first two hold the worker for
+the whole transfer; x-accel does not depend on the client at all.
+
+Also serves random 1 MB ranges with sendfile and checks their bytes.
+"""
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.grievances.models import Complaint, ComplaintAttachment
+from apps.uploads.models import StoredBlob
+from apps.uploads.storage import content_digest
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, print_report, summarize
+
+MB = 1024 * 1024
+
+
+class FileWrapper:
+    """wsgi.file_wrapper as gunicorn's: the worker sendfile()s `filelike` when it has a descriptor."""
+
+    def __init__(self, filelike, block_size=8192):
+        self.filelike, self.block_size = filelike, block_size
+
+    def __iter__(self):
+        return iter(lambda: self.filelike.read(self.block_size), b'')
+
+    def close(self):
+        self.filelike.close()
+
+
+class Sink:
+    """One end of a socket pair, drained (and optionally recorded) by a background thread."""
+
+    def __init__(self, rate=None):
+        self.sock, self._peer = socket.socketpair()
+        self.rate = rate
+        self.received = self.written = 0
+        self.record = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        buffer = memoryview(bytearray(MB))
+        while True:
+            n = self._peer.recv_into(buffer)
+            if not n:
+                return
+            self.received += n
+            if self.rate:
+                time.sleep(n / self.rate)
+            if self.record is not None:
+                self.record.extend(buffer[:n])
+
+    def drained(self):
+        while self.received < self.written:
+            time.sleep(0.0005)
+
+    def close(self):
+        self.sock.close()
+        self._thread.join()
+
+
+def serve(handler, environ, sink):
+    """Runs one request as a sync worker would: handler, headers, body. Returns (status, headers, body bytes)."""
+    state = {}
+
+    def start_response(status, headers, exc_info=None):
+        state['status'], state['headers'] = status, dict(headers)
+
+    result = handler(environ, start_response)
+    sent, head = 0, b""
+    try:
+        head = f"HTTP/1.1 {state['status']}\r\n" + ''.join(f"{k}: {v}\r\n" for k, v in state['headers'].items())
+        head = head.encode('latin-1') + b'\r\n'
+        sink.sock.sendall(head)
+        filelike = getattr(result, 'filelike', None)
+        if isinstance(result, FileWrapper) and hasattr(filelike, 'fileno'):
+            fd = filelike.fileno()
+            offset = os.lseek(fd, 0, os.SEEK_CUR)
+            remaining = int(state['headers']['Content-Length'])
+            while remaining:
+                n = os.sendfile(sink.sock.fileno(), fd, offset + sent, remaining)
+                sent += n
+                remaining -= n
+        else:
+            for block in result:
+                sink.sock.sendall(block)
+                sent += len(block)
+    finally:
+        sink.written += len(head) + sent
+        if hasattr(result, 'close'):
+            result.close()
+    return state['status'], state['headers'], sent
+
+
+def seed(media, files, file_mb):
+    user = CustomUser.objects.create(username='citizen', phone='9000000000')
+    complaint = Complaint.objects.create(complaint_id='CMP1', user=user, service_type='Water', category='Leak',
+                                         description='Pipe burst')
+    rng = random.Random(4)
+    attachments = []
+    for n in range(files):
+        data = rng.randbytes(int(file_mb * MB))
+        digest = content_digest(hashlib.sha256(data[i:i + MB]).hexdigest() for i in range(0, len(data), MB))
+        name = f"blobs/{digest[:2]}/{digest}"
+        (media / name).parent.mkdir(parents=True, exist_ok=True)
+        (media / name).write_bytes(data)
+        blob = StoredBlob.objects.create(digest=digest, size=len(data), content_type='application/pdf', file=name)
+        attachment = ComplaintAttachment.objects.create(complaint=complaint, blob=blob, filename=f"scan{n}.pdf")
+        attachments.append((attachment.pk, data))
+    return user, attachments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--file-mb', type=float, default=16)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--ranges', type=int, default=200)
+    parser.add_argument('--client-mb-per-s', type=float, default=0,
+                        help="the client's bandwidth; 0 reads as fast as the machine allows")
+    args = parser.parse_args()
+
+    media = Path(tempfile.mkdtemp(prefix='suvidha-bench-media-'))
+    try:
+        with benchmark_database(), override_settings(MEDIA_ROOT=media):
+            user, attachments = seed(media, args.files, args.file_mb)
+            token = str(RefreshToken.for_user(user).access_token)
+            handler = WSGIHandler()
+            factory = RequestFactory()
+            sink = Sink(args.client_mb_per_s * MB if args.client_mb_per_s else None)
+
+            def environ(pk, file_wrapper, **headers):
+                env = factory._base_environ(PATH_INFO=f'/api/v1/grievance/attachments/CMP1/{pk}/',
+                                            REQUEST_METHOD='GET', HTTP_AUTHORIZATION=f'Bearer {token}', **headers)
+                if file_wrapper:
+                    env['wsgi.file_wrapper'] = FileWrapper
+                return env
+
+            total_mb = args.files * args.file_mb
+            print(f"{args.files} attachments of {args.file_mb} MB, {args.rounds} rounds each\n")
+            for label, accel, file_wrapper in (('python', None, False), ('sendfile', None, True),
+                                               ('x-accel', 'nginx', True)):
+                with override_settings(MEDIA_ACCEL_REDIRECT=accel):
+                    timings, sent = [], 0
+                    for round_ in range(args.rounds + 1):
+                        for pk, data in attachments:
+                            start = time.perf_counter()
+                            status, headers, body = serve(handler, environ(pk, file_wrapper), sink)
+                            elapsed = time.perf_counter() - start
+                            assert status.startswith('200'), status
+                            if round_:  # the first round warms the page cache and the user cache
+                                timings.append(elapsed)
+                                sent += body
+                    stats = summarize(timings)
+                    print_report(f"{label}: full download", stats)
+                    print(f"  worker time {stats['total_s'] * 1000 / (total_mb * args.rounds):.3f} ms/MB served, "
+                          f"{sent / MB:,.0f} MB written by the worker")
+
+            rng = random.Random(9)
+            ok, timings = True, []
+            for _ in range(args.ranges):
+                pk, data = rng.choice(attachments)
+                start_byte = rng.randrange(0, len(data) - MB)
+                sink.drained()
+                sink.record = bytearray()
+                start = time.perf_counter()
+                status, headers, body = serve(handler, environ(pk, True, HTTP_RANGE=f'bytes={start_byte}-'
+                                                                                  f'{start_byte + MB - 1}'), sink)
+                timings.append(time.perf_counter() - start)
+                sink.drained()
+                ok &= status.startswith('206') and bytes(sink.record[-MB:]) == data[start_byte:start_byte + MB]
+                sink.record = None
+            print()
+            print_report("sendfile: 1 MB Range", summarize(timings))
+            print(f"  range bytes {'OK' if ok else 'MISMATCH'}")
+            sink.close()
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Meter readings: packed monthly blocks vs a row per reading.
+
+    python scripts/bench_meter_store.py --meters 200 --days 90
+    python scripts/bench_meter_store.py --meters 1000 --days 365 --interval 30
+
+Loads `--days` of readings every `--interval` minutes for each meter, one
+day per append (a daily upload from the meter data system), into both
+layouts. Reports load throughput, storage size and the time to compute 90
+daily totals for a meter.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import django
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection, transaction
+from apps.billing.meter_store import append_readings, daily_totals
+from apps.billing.models import MeterReadingBlock
+from utils.benchmark import benchmark_database, measure, print_report
+
+ROW_TABLE = 'bench_meter_reading'
+
+
+def create_row_table():
+    """The row-per-reading layout a plain Django model would get, with its lookup index."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {ROW_TABLE} (id INTEGER PRIMARY KEY, meter_number VARCHAR(50) NOT NULL, "
+                       f"timestamp TIMESTAMP NOT NULL, value REAL NOT NULL)")
+        cursor.execute(f"CREATE INDEX {ROW_TABLE}_idx ON {ROW_TABLE} (meter_number, timestamp)")
+
+
+def table_bytes(*tables):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            return sum(cursor.execute("SELECT pg_total_relation_size(%s)", [t]) or cursor.fetchone()[0] for t in tables)
+        try:
+            cursor.execute("SELECT name, tbl_name FROM sqlite_master WHERE tbl_name IN (%s)" % ','.join('%s' for _ in tables),
+                           list(tables))
+            names = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name IN (%s)" % ','.join('%s' for _ in names), names)
+            return cursor.fetchone()[0]
+        except Exception:
+            return None
+
+
+def day_of_readings(meter, day, interval):
+    """Deterministic per (meter, day), so both layouts store the same readings."""
+    rng = np.random.default_rng([int(meter[1:]), day.toordinal()])
+    per_day = 24 * 60 // interval
+    ts = np.datetime64(day, 's') + np.arange(per_day) * np.timedelta64(interval * 60, 's')
+    values = rng.gamma(2.0, 0.15 * interval / 15, per_day).astype(np.float32)
+    return ts, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meters', type=int, default=200)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--interval', type=int, default=15, help='minutes between readings')
+    parser.add_argument('--queries', type=int, default=300)
+    args = parser.parse_args()
+
+    first_day = date.today() - timedelta(days=args.days - 1)
+    meters = [f"M{n:07d}" for n in range(args.meters)]
+    uploads = [(meter, first_day + timedelta(days=d)) for d in range(args.days) for meter in meters]
+    readings = args.meters * args.days * (24 * 60 // args.interval)
+
+    with benchmark_database():
+        create_row_table()
+        sql = f"INSERT INTO {ROW_TABLE} (meter_number, timestamp, value) VALUES (%s, %s, %s)"
+
+        start = time.perf_counter()
+        for meter, day in uploads:
+            ts, values = day_of_readings(meter, day, args.interval)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, [(meter, t.item(), float(v)) for t, v in zip(ts, values)])
+        rows_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for meter, day in uploads:
+            append_readings(meter, *day_of_readings(meter, day, args.interval))
+        blocks_elapsed = time.perf_counter() - start
+
+        print(f"{readings:,} readings, {len(uploads):,} daily uploads")
+        print(f"{'row per reading':<20} load {readings / rows_elapsed:>10,.0f} readings/s  "
+              f"storage {table_bytes(ROW_TABLE) or 0:>12,} bytes")
+        print(f"{'monthly blocks':<20} load {readings / blocks_elapsed:>10,.0f} readings/s  "
+              f"storage {table_bytes(MeterReadingBlock._meta.db_table) or 0:>12,} bytes "
+              f"({MeterReadingBlock.objects.count():,} blocks)")
+
+        end = date.today()
+        start_day = end - timedelta(days=89)
+        targets = [random.choice(meters) for _ in range(args.queries)]
+
+        def rows_daily(i):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT date(timestamp), SUM(value) FROM {ROW_TABLE} WHERE meter_number = %s "
+                    f"AND timestamp >= %s AND timestamp < %s GROUP BY date(timestamp)",
+                    [targets[i], datetime.combine(start_day, datetime.min.time()),
+                     datetime.combine(end + timedelta(days=1), datetime.min.time())],
+                )
+                return cursor.fetchall()
+
+        print_report("90 daily totals: GROUP BY rows", measure(rows_daily, args.queries))
+        print_report("90 daily totals: blocks", measure(lambda i: daily_totals(targets[i], start_day, end), args.queries))
+
+        _, totals, _ = daily_totals(targets[0], start_day, end)
+        expected = sum(total for _, total in rows_daily(0))
+        assert abs(totals.sum() - expected) < 1e-3 * expected, (totals.sum(), expected)
+        print("Block totals match the row layout")
+
+
+if __name__ == "__main__":
+    main()
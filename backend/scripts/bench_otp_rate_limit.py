@@ -0,0 +1,82 @@
+"""
+Compares the OTP rate limiter against the old ORM-based check_spam.
+
+    python scripts/bench_otp_rate_limit.py --rows 200000 --checks 5000
+    python scripts/bench_otp_rate_limit.py --backend redis
+
+The ORM path is measured on a PhoneOTP table seeded with --rows historical
+codes, which is what made the original check slow.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.utils import timezone
+from apps.authentication.models import PhoneOTP
+from apps.authentication.ratelimit import InMemoryRateLimiter, RedisRateLimiter
+from utils.benchmark import benchmark_database, measure, run_concurrently, print_report
+
+
+def orm_check_spam(phone):
+    """The pre-rate-limiter implementation of check_spam."""
+    now = timezone.now()
+    last_otp = PhoneOTP.objects.filter(phone=phone).order_by('-created_at').first()
+    if last_otp and last_otp.created_at > now - timedelta(seconds=60):
+        return False, "wait"
+    if PhoneOTP.objects.filter(phone=phone, created_at__gte=now - timedelta(minutes=10)).count() >= 3:
+        return False, "too many"
+    return True, ""
+
+
+def seed_phone_otps(rows, phones):
+    batch = []
+    for i in range(rows):
+        batch.append(PhoneOTP(phone=random.choice(phones), otp=f"{random.randint(0, 999999):06d}"))
+        if len(batch) == 10000:
+            PhoneOTP.objects.bulk_create(batch)
+            batch = []
+    PhoneOTP.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000, help='PhoneOTP rows to seed')
+    parser.add_argument('--checks', type=int, default=5000, help='check_spam calls per run')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--backend', choices=['memory', 'redis'], default='memory')
+    args = parser.parse_args()
+
+    phones = [f"9{n:09d}" for n in range(max(1, args.rows // 20))]
+    limiter = RedisRateLimiter() if args.backend == 'redis' else InMemoryRateLimiter()
+
+    with benchmark_database():
+        print(f"Seeding {args.rows:,} PhoneOTP rows...")
+        seed_phone_otps(args.rows, phones)
+
+        print_report("ORM check_spam", measure(lambda i: orm_check_spam(random.choice(phones)), args.checks))
+        print_report(f"{args.backend} limiter hit", measure(lambda i: limiter.hit(f"8{i:09d}"), args.checks))
+        print_report(
+            f"{args.backend} limiter x{args.threads} threads",
+            run_concurrently(lambda t, i: limiter.hit(f"7{t:03d}{i:06d}"), args.threads, args.checks // args.threads),
+        )
+
+    # Every thread races for the same phone: exactly one request may pass the 60s rule.
+    limiter.reset('race')
+    allowed = []
+    run_concurrently(lambda t, i: allowed.append(limiter.hit('race')[0]), args.threads, 10)
+    print(f"Concurrent hits on one phone: {len(allowed)}, allowed: {sum(allowed)} (expected 1)")
+    limiter.reset('race')
+
+
+if __name__ == "__main__":
+    main()
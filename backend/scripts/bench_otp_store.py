@@ -0,0 +1,73 @@
+"""
+Issue/verify throughput of the OTP store backends under concurrent load.
+
+    python scripts/bench_otp_store.py --users 2000 --threads 8
+    python scripts/bench_otp_store.py --backends database redis
+
+Each operation is one OTPService.create_otp followed by verify_otp for a
+distinct user, with SMS delivery replaced by a zero-latency fake gateway.
+"""
+import argparse
+import os
+import sys
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.test import override_settings
+from apps.authentication.otp_store import get_otp_store
+from apps.notifications.sms import get_gateways
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, run_concurrently, print_report
+from utils.otp_service import OTPService
+
+BACKENDS = {
+    'database': 'database',
+    'memory': 'apps.authentication.otp_store.InMemoryOTPStore',
+    'redis': 'apps.authentication.otp_store.RedisOTPStore',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=['database', 'memory'])
+    args = parser.parse_args()
+
+    fake_sms = [{'BACKEND': 'apps.notifications.sms.FakeGateway', 'OPTIONS': {'latency_ms': 0}}]
+    per_thread = args.users // args.threads
+
+    with override_settings(SMS_GATEWAYS=fake_sms, SMS_DISPATCH_MODE='sync', OTP_AUDIT_TRAIL='off'), \
+            benchmark_database():
+        get_gateways.cache_clear()
+        CustomUser.objects.bulk_create(
+            CustomUser(username=f"bench_{n}", phone=f"9{n:09d}") for n in range(args.users)
+        )
+        users = list(CustomUser.objects.order_by('pk'))
+
+        for name in args.backends:
+            with override_settings(OTP_STORE_BACKEND=BACKENDS[name]):
+                get_otp_store.cache_clear()
+                issued = {}
+
+                def issue(thread, i):
+                    user = users[thread * per_thread + i]
+                    issued[user.pk] = OTPService.create_otp(user)
+
+                def verify(thread, i):
+                    user = users[thread * per_thread + i]
+                    assert OTPService.verify_otp(user, issued[user.pk])
+
+                print_report(f"{name}: issue x{args.threads}", run_concurrently(issue, args.threads, per_thread))
+                print_report(f"{name}: verify x{args.threads}", run_concurrently(verify, args.threads, per_thread))
+        get_otp_store.cache_clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Concurrent payment verification: duplicate callbacks racing on the same payments.
+
+    python scripts/bench_payment_verify.py
+    python scripts/bench_payment_verify.py --threads 16 --payments 2000 --repeats 4
+
+Two workloads, each run against the previous read-modify-save logic of
+VerifyPaymentView and against transitions.verify_payment:
+
+* same: every thread verifies every payment (each callback delivered
+  `threads` times at once);
+* different: each thread verifies its own share of the payments once.
+
+Every payment is then checked: exactly one receipt per SUCCESS payment, no
+receipt otherwise, and its bill PAID. Errors are callbacks that raised
+(the old path hits the receipt's unique constraint when it loses a race).
+"""
+import argparse
+import os
+import sys
+import threading
+import uuid
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from datetime import date
+
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError
+from django.utils import timezone
+from apps.billing.models import Bill
+from apps.payments.models import Payment, PaymentReceipt
+from apps.payments.transitions import CONFLICT, verify_payment
+from apps.user_management.models import CustomUser
+from utils.background import get_executor
+from utils.benchmark import benchmark_database, print_report, run_concurrently
+
+
+def naive_verify(payment_id, status, transaction_id):
+    """The verification logic VerifyPaymentView used before transitions.py."""
+    payment = Payment.objects.get(payment_id=payment_id)
+    payment.status = status
+    payment.transaction_id = transaction_id
+    payment.save()
+    if status == 'SUCCESS':
+        payment.bill.status = Bill.Status.PAID
+        payment.bill.save()
+        PaymentReceipt.objects.create(
+            payment=payment,
+            receipt_number=f"REC-{uuid.uuid4().hex[:8].upper()}",
+            receipt_data={"amount": str(payment.amount), "date": str(timezone.now())},
+        )
+
+
+def seed(payments):
+    user = CustomUser.objects.create(username='payer', phone='9000000000')
+    bills = Bill.objects.bulk_create(
+        Bill(bill_id=f"B{n:08d}", account_type=Bill.AccountType.ELECTRICITY, consumer_number=f"EL{n:08d}",
+             bill_date=date(2026, 1, 1), due_date=date(2026, 1, 16), amount=100)
+        for n in range(payments)
+    )
+    Payment.objects.bulk_create(
+        Payment(payment_id=f"PAY{n:08d}", bill=bill, user=user, amount=100, payment_method=Payment.Method.UPI)
+        for n, bill in enumerate(bills)
+    )
+
+
+def reset():
+    PaymentReceipt.objects.all().delete()
+    Payment.objects.update(status=Payment.Status.INITIATED, transaction_id=None)
+    Bill.objects.update(status=Bill.Status.PENDING)
+    cache.clear()
+
+
+def callback(n):
+    # Every 10th payment fails at the gateway
+    return f"PAY{n:08d}", 'FAILURE' if n % 10 == 0 else 'SUCCESS', f"TXN{n:08d}"
+
+
+def check(payments):
+    receipts = PaymentReceipt.objects.count()
+    success = Payment.objects.filter(status=Payment.Status.SUCCESS).count()
+    unpaid = Bill.objects.filter(payments__status=Payment.Status.SUCCESS).exclude(status=Bill.Status.PAID).count()
+    expected = sum(1 for n in range(payments) if callback(n)[1] == 'SUCCESS')
+    return {'receipts': receipts, 'success': success, 'expected': expected, 'unpaid_bills': unpaid}
+
+
+def run(label, verify, workload, threads, payments, repeats):
+    reset()
+    errors, conflicts = [0], [0]
+    lock = threading.Lock()
+
+    def call(n):
+        try:
+            result = verify(*callback(n))
+        except (IntegrityError, OperationalError):
+            with lock:
+                errors[0] += 1
+            return
+        if result is not None and result.outcome == CONFLICT:
+            with lock:
+                conflicts[0] += 1
+
+    if workload == 'same':
+        stats = run_concurrently(lambda t, i: call(i % payments), threads, payments * repeats)
+    else:
+        share = payments // threads
+        stats = run_concurrently(lambda t, i: call(t * share + i), threads, share)
+
+    print_report(f"{label} ({workload})", stats)
+    result = check(payments if workload == 'same' else payments // threads * threads)
+    ok = result['receipts'] == result['success'] == result['expected'] and not result['unpaid_bills'] and not errors[0]
+    print(f"  receipts={result['receipts']} success={result['success']} expected={result['expected']} "
+          f"unpaid_bills={result['unpaid_bills']} errors={errors[0]} conflicts={conflicts[0]} "
+          f"{'OK' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--payments', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=2, help="Times each thread replays the callbacks (same)")
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed(args.payments)
+        for workload in ('same', 'different'):
+            run("old view logic", naive_verify, workload, args.threads, args.payments, args.repeats)
+            ok = run("verify_payment", verify_payment, workload, args.threads, args.payments, args.repeats)
+            if not ok:
+                sys.exit("verify_payment raised errors or left payments inconsistent")
+        # Let queued receipt renders finish before the database goes away
+        get_executor().shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Payment verify to printable receipt: inline JSON vs pre-rendered receipts.
+
+    python scripts/bench_receipts.py
+    python scripts/bench_receipts.py --payments 2000 --items 8
+
+For each payment: POST /payment/verify/ and then GET what the kiosk prints.
+The time from starting the verify to having the receipt's bytes is
+reported for:
+
+* old: the previous ReceiptView (Payment serialized with fields='__all__')
+  plus the bill details the kiosk fetched separately to format a receipt;
+* sync: RECEIPT_RENDER_MODE='sync', rendered inside the verify request;
+* thread: RECEIPT_RENDER_MODE='thread', rendered by the background pool
+  right after commit (or on the spot if the GET wins the race).
+
+Then times warm receipt GETs (stored bytes, one query) and revalidations
+with If-None-Match (304).
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework import generics, permissions
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from apps.billing.models import Bill, BillLineItem, ElectricityAccount
+from apps.payments import transitions
+from apps.payments.models import Payment
+from apps.payments.serializers import PaymentSerializer
+from apps.user_management.models import CustomUser
+from utils.background import get_executor
+from utils.benchmark import benchmark_database, measure, print_report, summarize
+
+
+class OldReceiptView(generics.RetrieveAPIView):
+    """ReceiptView as it was before pre-rendered receipts."""
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'payment_id'
+
+
+def seed(payments, items):
+    user = CustomUser.objects.create(username='payer', phone='9000000000')
+    ElectricityAccount.objects.bulk_create(
+        ElectricityAccount(consumer_number=f"EL{n:08d}", user=user, account_holder=f"Consumer {n}",
+                           address=f"House {n}, Ward {n % 40}, Sector {n % 12}", meter_number=f"M{n}")
+        for n in range(payments)
+    )
+    Bill.objects.bulk_create(
+        Bill(bill_id=f"B{n:08d}", account_type=Bill.AccountType.ELECTRICITY, consumer_number=f"EL{n:08d}",
+             bill_date=date(2026, 1, 1), due_date=date(2026, 1, 16), amount=1000 + n % 500)
+        for n in range(payments)
+    )
+    BillLineItem.objects.bulk_create(
+        (BillLineItem(bill_id=f"B{n:08d}", description=f"Charge {i}", amount=10 + i)
+         for n in range(payments) for i in range(items)),
+        batch_size=5000,
+    )
+    Payment.objects.bulk_create(
+        Payment(payment_id=f"PAY{n:08d}", bill_id=f"B{n:08d}", user=user, amount=1000 + n % 500,
+                payment_method=Payment.Method.UPI)
+        for n in range(payments)
+    )
+    return user
+
+
+def verify_then_receipt(client, label, payment_ids, get_receipt):
+    verify, to_receipt = [], []
+    for n, payment_id in enumerate(payment_ids):
+        start = time.perf_counter()
+        response = client.post('/api/v1/payment/verify/',
+                               {'payment_id': payment_id, 'status': 'SUCCESS', 'transaction_id': f"TXN{n}"})
+        assert response.status_code == 200, response.data
+        verified = time.perf_counter()
+        get_receipt(payment_id)
+        done = time.perf_counter()
+        verify.append(verified - start)
+        to_receipt.append(done - start)
+    print_report(f"{label}: verify", summarize(verify))
+    print_report(f"{label}: verify -> receipt bytes", summarize(to_receipt))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--payments', type=int, default=600, help='payments verified per mode')
+    parser.add_argument('--items', type=int, default=6, help='line items per bill')
+    args = parser.parse_args()
+
+    with benchmark_database():
+        user = seed(args.payments * 3, args.items)
+        client = APIClient()
+        client.force_authenticate(user)
+        factory = APIRequestFactory()
+        old_view = OldReceiptView.as_view()
+        groups = [[f"PAY{n:08d}" for n in range(k * args.payments, (k + 1) * args.payments)] for k in range(3)]
+
+        def old_receipt(payment_id):
+            request = factory.get(f"/api/v1/payment/receipt/{payment_id}/")
+            force_authenticate(request, user)
+            response = old_view(request, payment_id=payment_id)
+            response.render()
+            bill_id = response.data['bill']
+            assert client.get(f"/api/v1/billing/details/{bill_id}/").status_code == 200
+
+        def new_receipt(payment_id):
+            response = client.get(f"/api/v1/payment/receipt/{payment_id}/")
+            assert response.status_code == 200 and response.content
+            return response
+
+        schedule_render = transitions.schedule_render
+        transitions.schedule_render = lambda *pks: None
+        try:
+            verify_then_receipt(client, "old", groups[0], old_receipt)
+        finally:
+            transitions.schedule_render = schedule_render
+        with override_settings(RECEIPT_RENDER_MODE='sync'):
+            verify_then_receipt(client, "sync", groups[1], new_receipt)
+        with override_settings(RECEIPT_RENDER_MODE='thread'):
+            verify_then_receipt(client, "thread", groups[2], new_receipt)
+            get_executor().shutdown(wait=True)
+
+        payment_ids = groups[1]
+        with CaptureQueriesContext(connection) as queries:
+            response = new_receipt(payment_ids[0])
+        assert len(queries) == 1, f"warm receipt GET took {len(queries)} queries"
+        print(f"\nWarm receipt GET: {len(queries)} query OK; receipt:\n\n{response.content.decode()}")
+        etags = {payment_id: new_receipt(payment_id)['ETag'] for payment_id in payment_ids}
+
+        print_report("old receipt GET (+ bill details)",
+                     measure(lambda i: old_receipt(payment_ids[i % len(payment_ids)]), args.payments))
+        print_report("receipt GET (stored bytes)",
+                     measure(lambda i: new_receipt(payment_ids[i % len(payment_ids)]), args.payments))
+
+        def revalidate(i):
+            payment_id = payment_ids[i % len(payment_ids)]
+            response = client.get(f"/api/v1/payment/receipt/{payment_id}/", HTTP_IF_NONE_MATCH=etags[payment_id])
+            assert response.status_code == 304
+
+        print_report("receipt GET If-None-Match (304)", measure(revalidate, args.payments))
+
+
+if __name__ == "__main__":
+    main()
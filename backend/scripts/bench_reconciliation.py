@@ -0,0 +1,158 @@
+"""
+Settlement-file reconciliation throughput on a synthetic bill-due day.
+
+    python scripts/bench_reconciliation.py --lines 5000000
+    python scripts/bench_reconciliation.py --lines 1000000 --batch-size 20000
+
+Seeds one day of payments (mostly SUCCESS, some still INITIATED or FAILED),
+writes a settlement file for them with a known number of each kind of
+problem (amount mismatches, unknown transactions, duplicates, unreadable
+lines, omitted successful payments, INITIATED payments the gateway
+settled), reconciles it with reconcile_settlements' engine, and checks
+every count. Reports lines/s and the growth of the process's peak RSS,
+which follows the day's payment index, not the file.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.billing.models import Bill
+from apps.payments.models import Payment, PaymentReceipt, SettlementDiscrepancy
+from apps.payments.reconciliation import reconcile
+from apps.user_management.models import CustomUser
+from utils.background import get_executor
+from utils.benchmark import benchmark_database
+
+BILLS = 1000
+PROBLEM_EVERY = 1000  # one line in this many carries each kind of problem
+
+
+def status_of(n):
+    if n % 20 == 1:
+        return Payment.Status.INITIATED
+    if n % 20 == 2:
+        return Payment.Status.FAILURE
+    return Payment.Status.SUCCESS
+
+
+def seed(payments, batch_size=50000):
+    user = CustomUser.objects.create(username='payer', phone='9000000000')
+    Bill.objects.bulk_create(
+        Bill(bill_id=f"B{n:08d}", account_type=Bill.AccountType.ELECTRICITY, consumer_number=f"EL{n:08d}",
+             bill_date=date(2026, 1, 1), due_date=date(2026, 1, 16), amount=100)
+        for n in range(BILLS)
+    )
+    ops = connection.ops
+    table = ops.quote_name(Payment._meta.db_table)
+    now = ops.adapt_datetimefield_value(timezone.now())
+    sql = (f"INSERT INTO {table} (payment_id, bill_id, user_id, amount, payment_method, status, timestamp) "
+           f"VALUES (%s, %s, %s, %s, 'UPI', %s, %s)")
+    start = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, payments, batch_size):
+            cursor.executemany(sql, [
+                (f"PAY{n:010d}", f"B{n % BILLS:08d}", user.pk, 100 + n % 900, status_of(n), now)
+                for n in range(offset, min(payments, offset + batch_size))
+            ])
+    print(f"Seeded {payments:,} payments in {time.perf_counter() - start:.1f}s")
+
+
+def write_settlement(path, payments):
+    """Writes the file and returns the discrepancy counts reconcile() should report."""
+    expected = {'matched': 0, 'corrected': 0, 'MISSING': 0, 'EXTRA': 0, 'AMOUNT_MISMATCH': 0,
+                'STATUS_MISMATCH': 0, 'DUPLICATE': 0, 'INVALID': 0}
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('payment_id,transaction_id,amount,status,settlement_reference\n')
+        for n in range(payments):
+            status = status_of(n)
+            amount = 100 + n % 900
+            problem = n % PROBLEM_EVERY
+            if status == Payment.Status.SUCCESS and problem == 3:
+                expected['MISSING'] += 1
+                continue
+            if status == Payment.Status.INITIATED:
+                # The gateway settled it: the callback never reached us
+                expected['corrected'] += 1
+                status = Payment.Status.SUCCESS
+            elif problem == 4 and status == Payment.Status.SUCCESS:
+                expected['AMOUNT_MISMATCH'] += 1
+                amount += 1
+            elif problem == 5 and status == Payment.Status.SUCCESS:
+                expected['STATUS_MISMATCH'] += 1
+                status = Payment.Status.FAILURE
+            else:
+                expected['matched'] += 1
+            f.write(f"PAY{n:010d},TXN{rng.getrandbits(40):012x},{amount}.00,{status},UTR{n:012d}\n")
+            if problem == 6:
+                expected['DUPLICATE'] += 1
+                f.write(f"PAY{n:010d},TXN{n:012d},{amount}.00,{status},UTR{n:012d}\n")
+            if problem == 7:
+                expected['EXTRA'] += 1
+                f.write(f"UNKNOWN{n:010d},TXN{n:012d},{amount}.00,SUCCESS,UTR{n:012d}\n")
+            if problem == 8:
+                expected['INVALID'] += 1
+                f.write(f"PAY{n:010d},TXN{n:012d},not-a-number,SUCCESS,UTR{n:012d}\n")
+    return expected
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=1000000, help='Payments on the settlement day (~ file lines)')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix='settlement-', suffix='.csv')
+    os.close(fd)
+    try:
+        with benchmark_database():
+            seed(args.lines)
+            start = time.perf_counter()
+            expected = write_settlement(path, args.lines)
+            print(f"Wrote {os.path.getsize(path) / 2**20:,.0f} MB settlement file in {time.perf_counter() - start:.1f}s")
+
+            rss_before = peak_rss_mb()
+            start = time.perf_counter()
+            run = reconcile(path, timezone.localdate(), batch_size=args.batch_size)
+            elapsed = time.perf_counter() - start
+            print(f"reconcile: {run.lines:,} lines in {elapsed:.1f}s = {run.lines / elapsed:,.0f} lines/s, "
+                  f"peak RSS +{peak_rss_mb() - rss_before:,.0f} MB")
+
+            actual = {'matched': run.matched, 'corrected': run.corrected, **run.kinds}
+            stored = dict.fromkeys(run.kinds, 0)
+            for kind in SettlementDiscrepancy.objects.filter(run=run).values_list('kind', flat=True).iterator():
+                stored[kind] += 1
+            receipts = PaymentReceipt.objects.count()
+            print(f"  {actual}")
+            ok = actual == expected and stored == run.kinds and receipts == expected['corrected']
+            print(f"  expected {expected}\n  receipts for corrected payments: {receipts}  {'OK' if ok else 'MISMATCH'}")
+            # Let queued receipt renders finish before the database goes away
+            get_executor().shutdown(wait=True)
+            if not ok:
+                sys.exit(1)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Tariff engine: vectorized NumPy evaluation vs the per-row reference.
+
+    python scripts/bench_tariffs.py --readings 5000000
+    python scripts/bench_tariffs.py --readings 1000000 --write 100000
+
+Prices random consumption across the configured connection types both ways
+and checks that every charge matches to the paisa. With --write N, also runs
+the full billing pipeline (readings CSV -> Bill + BillLineItem) for N
+consumers.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import django
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from apps.billing.models import Bill, BillLineItem, ElectricityAccount
+from apps.billing.tariffs import compile_tariffs, reference_charges, run_billing
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database
+
+
+def timed(label, count, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {count:>10,} readings in {elapsed:7.2f}s  {count / elapsed:>12,.0f} readings/s")
+    return result
+
+
+def run_pipeline(consumers):
+    user = CustomUser.objects.create(username='bench', phone='9000000000')
+    types = list(compile_tariffs().connection_types)
+    ElectricityAccount.objects.bulk_create(
+        (ElectricityAccount(consumer_number=f"EL{n:09d}", user=user, account_holder='-', address='-',
+                            meter_number=f"M{n}", connection_type=types[n % len(types)]) for n in range(consumers)),
+        batch_size=5000,
+    )
+    fd, path = tempfile.mkstemp(prefix='suvidha-readings-', suffix='.csv')
+    with os.fdopen(fd, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['consumer_number', 'previous_reading', 'current_reading'])
+        rng = np.random.default_rng(1)
+        previous = rng.integers(0, 90000, consumers)
+        for n, (prev, used) in enumerate(zip(previous, rng.integers(0, 1500, consumers))):
+            writer.writerow([f"EL{n:09d}", prev, prev + used])
+    try:
+        stats = timed("pipeline (CSV -> bills)", consumers, lambda: run_billing(path, date.today()))
+        print(f"  {stats['bills']:,} bills, {BillLineItem.objects.count():,} line items, {stats['skipped']} skipped")
+        assert Bill.objects.count() == consumers
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readings', type=int, default=1000000)
+    parser.add_argument('--reference', type=int, default=200000, help='readings priced by the per-row reference')
+    parser.add_argument('--write', type=int, default=0, help='consumers for the full pipeline run')
+    args = parser.parse_args()
+
+    table = compile_tariffs()
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(table.connection_types), args.readings)
+    units = rng.integers(0, 12000, args.readings)
+
+    charges = timed("vectorized (NumPy)", args.readings, lambda: table.evaluate(codes, units))
+
+    sample = min(args.reference, args.readings)
+    names = [table.connection_types[c] for c in codes[:sample]]
+    reference = timed("per-row reference (Decimal)", sample,
+                      lambda: [reference_charges(names[i], int(units[i])) for i in range(sample)])
+    for field in ('energy', 'fixed', 'duty', 'total'):
+        expected = np.array([getattr(r, field) for r in reference])
+        mismatches = np.flatnonzero(getattr(charges, field)[:sample] != expected)
+        assert not len(mismatches), f"{field} differs at {mismatches[:5]}"
+    print(f"All {sample:,} reference charges match to the paisa")
+
+    if args.write:
+        with benchmark_database():
+            run_pipeline(args.write)
+
+
+if __name__ == "__main__":
+    main()
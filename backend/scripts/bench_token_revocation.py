@@ -0,0 +1,94 @@
+"""
+Refresh latency with a large token blacklist: stock simplejwt vs the
+in-process revocation filter.
+
+    python scripts/bench_token_revocation.py --outstanding 10000000 --blacklisted 0.8
+    python scripts/bench_token_revocation.py --outstanding 500000 --refreshes 2000
+
+Seeding 10M rows takes a while on SQLite; point DATABASE_URL at Postgres
+for numbers that match production.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.authentication.revocation import get_revocation_index
+from apps.authentication.tokens import FilteredRefreshToken, FilteredTokenRefreshSerializer
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+
+def seed_tokens(total, blacklisted_ratio, batch_size=20000):
+    expires = timezone.now() + timedelta(days=1)
+    blacklist_upto = int(total * blacklisted_ratio)
+    created = 0
+    start = time.perf_counter()
+    while created < total:
+        size = min(batch_size, total - created)
+        tokens = OutstandingToken.objects.bulk_create(
+            OutstandingToken(jti=uuid.uuid4().hex, token='-', expires_at=expires) for _ in range(size)
+        )
+        if created < blacklist_upto:
+            BlacklistedToken.objects.bulk_create(
+                BlacklistedToken(token=token) for token in tokens[:blacklist_upto - created]
+            )
+        created += size
+        if created % 1_000_000 < batch_size:
+            print(f"  seeded {created:,} tokens ({time.perf_counter() - start:.0f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--outstanding', type=int, default=500000)
+    parser.add_argument('--blacklisted', type=float, default=0.8, help='fraction of tokens blacklisted')
+    parser.add_argument('--refreshes', type=int, default=1000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        print(f"Seeding {args.outstanding:,} outstanding tokens...")
+        seed_tokens(args.outstanding, args.blacklisted)
+        user = CustomUser.objects.create(username='bench', phone='9000000000')
+
+        index = get_revocation_index()
+        start = time.perf_counter()
+        index.rebuild()
+        print(f"Filter built in {time.perf_counter() - start:.2f}s, {index._bloom.nbytes / 2**20:.1f} MiB")
+
+        live = [str(RefreshToken.for_user(user)['jti']) for _ in range(args.refreshes)]
+        revoked = list(BlacklistedToken.objects.values_list('token__jti', flat=True)[:args.refreshes])
+
+        print_report("exact check (live jti)",
+                     measure(lambda i: BlacklistedToken.objects.filter(token__jti=live[i]).exists(), len(live)))
+        print_report("filter check (live jti)", measure(lambda i: index.is_revoked(live[i]), len(live)))
+        print_report("filter check (revoked jti)", measure(lambda i: index.is_revoked(revoked[i]), len(revoked)))
+
+        for label, serializer_class, token_class in [
+            ("refresh: stock serializer", TokenRefreshSerializer, RefreshToken),
+            ("refresh: filtered serializer", FilteredTokenRefreshSerializer, FilteredRefreshToken),
+        ]:
+            tokens = [str(token_class.for_user(user)) for _ in range(args.refreshes)]
+
+            def refresh(i):
+                serializer = serializer_class(data={'refresh': tokens[i]})
+                assert serializer.is_valid(), serializer.errors
+
+            print_report(label, measure(refresh, args.refreshes))
+
+
+if __name__ == "__main__":
+    main()
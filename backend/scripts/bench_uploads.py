@@ -0,0 +1,293 @@
+"""
+Attachment uploads: one multipart request per file vs chunked uploads into
+content-addressed storage (apps.uploads).
+
+    python scripts/bench_uploads.py
+    python scripts/bench_uploads.py --file-mb 16 --bandwidth-mb 2 --mtbf-mb 6
+
+1. Slow, flaky link: --uploads files of --file-mb each are sent through a
+   simulated kiosk link of --bandwidth-mb MB/s that drops the connection
+   after an exponentially distributed amount of data (mean --mtbf-mb). A
+   one-shot upload starts over after every drop; a chunked one re-sends the
+   chunk that was cut. Reported per scheme: requests, MB sent over the
+   link, worker-seconds (time spent inside views, i.e. a worker held), the
+   longest single request and the peak Python memory of one request.
+2. Disk: --citizens citizens each file --requests-each service requests
+   with the same ID proof plus a fresh photo, stored through both schemes,
+   comparing bytes on disk.
+3. Chunk PUT throughput on a fast link (hashing + writing cost).
+"""
+import argparse
+import hashlib
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+django.setup()
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIRequest
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, RequestFactory, encode_multipart
+from django.test.utils import override_settings
+from rest_framework import generics, parsers, permissions, serializers
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from apps.service_requests.models import RequestDocument, ServiceRequest
+from apps.uploads.models import StoredBlob
+from apps.uploads.views import CompleteUploadView, CreateUploadSessionView, UploadChunkView, UploadSessionView
+from apps.user_management.models import CustomUser
+from utils.benchmark import benchmark_database, measure, print_report
+
+MB = 1024 * 1024
+
+
+class OneShotDocumentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RequestDocument
+        fields = ['service_request', 'document_type', 'file_path']
+
+
+class OneShotDocumentView(generics.CreateAPIView):
+    """A plain multipart FileField upload, the way documents were stored before apps.uploads."""
+    serializer_class = OneShotDocumentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [parsers.MultiPartParser]
+
+
+class Link:
+    """A connection of `bandwidth` bytes/s that drops after exponentially distributed amounts of data."""
+
+    def __init__(self, bandwidth, mtbf, seed):
+        self.bandwidth = bandwidth
+        self.rng = random.Random(seed)
+        self.mtbf = mtbf
+        self.sent = 0
+        self.next_drop = self.rng.expovariate(1 / mtbf)
+
+    def stream(self, body):
+        return LinkStream(self, body)
+
+
+class LinkStream:
+    def __init__(self, link, body):
+        self.link, self.body, self.position = link, body, 0
+
+    def read(self, size=-1):
+        link = self.link
+        if self.position >= len(self.body) or link.sent >= link.next_drop:
+            return b''
+        remaining = len(self.body) - self.position
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        size = max(1, min(size, int(link.next_drop - link.sent) + 1))
+        data = self.body[self.position:self.position + size]
+        self.position += size
+        link.sent += size
+        time.sleep(size / link.bandwidth)
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+    def dropped(self):
+        if self.link.sent >= self.link.next_drop:
+            self.link.next_drop = self.link.sent + self.link.rng.expovariate(1 / self.link.mtbf)
+            return True
+        return False
+
+
+class Worker:
+    """Runs views on requests read from a Link, accounting for the time and memory each holds."""
+
+    def __init__(self, user):
+        self.user = user
+        self.factory = RequestFactory()
+        self.requests, self.held, self.longest, self.peak_memory = 0, 0.0, 0.0, 0
+
+    def call(self, view, method, path, stream, length, content_type, headers=None, **kwargs):
+        environ = self.factory._base_environ(
+            PATH_INFO=path, REQUEST_METHOD=method, CONTENT_TYPE=content_type, CONTENT_LENGTH=str(length),
+            **{'wsgi.input': stream}, **(headers or {}),
+        )
+        request = WSGIRequest(environ)
+        force_authenticate(request, self.user)
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            response = view(request, **kwargs)
+        finally:
+            request.close()
+            elapsed = time.perf_counter() - start
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.requests += 1
+        self.held += elapsed
+        self.longest = max(self.longest, elapsed)
+        return response
+
+
+def one_shot(worker, link, service_request, data, name, max_attempts):
+    body = encode_multipart(BOUNDARY, {
+        'service_request': service_request.pk, 'document_type': 'ID Proof',
+        'file_path': SimpleUploadedFile(name, data, content_type='application/pdf'),
+    })
+    view = OneShotDocumentView.as_view()
+    for _ in range(max_attempts):
+        stream = link.stream(body)
+        try:
+            response = worker.call(view, 'POST', '/bench/one-shot/', stream, len(body), MULTIPART_CONTENT)
+            ok = response.status_code == 201
+        except Exception:
+            ok = False
+        if stream.dropped():
+            ok = False
+        if ok:
+            return True
+    return False
+
+
+def chunked(worker, link, client, data, name, max_attempts):
+    session = client.post('/api/v1/uploads/sessions/', {
+        'filename': name, 'content_type': 'application/pdf', 'size': len(data),
+    }, format='json').data
+    upload_id, chunk_size = session['upload_id'], session['chunk_size']
+    put, status = UploadChunkView.as_view(), UploadSessionView.as_view()
+    for _ in range(max_attempts):
+        for index in session['missing']:
+            chunk = data[index * chunk_size:(index + 1) * chunk_size]
+            stream = link.stream(chunk)
+            worker.call(put, 'PUT', f'/api/v1/uploads/sessions/{upload_id}/chunks/{index}/', stream, len(chunk),
+                        'application/octet-stream', {'HTTP_UPLOAD_CHUNK_SHA256': hashlib.sha256(chunk).hexdigest()},
+                        upload_id=upload_id, index=index)
+            stream.dropped()
+        # After a drop the kiosk asks what is still missing and sends only that
+        session = worker.call(status, 'GET', f'/api/v1/uploads/sessions/{upload_id}/', link.stream(b''), 0, '',
+                              upload_id=upload_id).data
+        if not session['missing']:
+            response = worker.call(CompleteUploadView.as_view(), 'POST',
+                                   f'/api/v1/uploads/sessions/{upload_id}/complete/', link.stream(b''), 0, '',
+                                   upload_id=upload_id)
+            return response.status_code == 200, upload_id
+    return False, upload_id
+
+
+def flaky_link(args, user, client, service_request):
+    print(f"{args.uploads} uploads of {args.file_mb} MB over a {args.bandwidth_mb} MB/s link dropping every "
+          f"{args.mtbf_mb} MB on average (chunks of {args.chunk_mb} MB)")
+    rng = random.Random(1)
+    files = [rng.randbytes(int(args.file_mb * MB)) for _ in range(args.uploads)]
+    for label in ('one-shot multipart', 'chunked'):
+        worker = Worker(user)
+        link = Link(args.bandwidth_mb * MB, args.mtbf_mb * MB, seed=7)
+        done = 0
+        start = time.perf_counter()
+        for n, data in enumerate(files):
+            if label == 'chunked':
+                ok, _ = chunked(worker, link, client, data, f"doc{n}.pdf", args.max_attempts)
+            else:
+                ok = one_shot(worker, link, service_request, data, f"doc{n}.pdf", args.max_attempts)
+            done += ok
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<20} {done}/{len(files)} stored in {elapsed:.1f}s, {worker.requests} requests, "
+              f"{link.sent / MB:,.1f} MB sent, worker-seconds {worker.held:.1f}, longest request "
+              f"{worker.longest:.2f}s, peak memory per request {worker.peak_memory / 1024:,.0f} KB")
+
+
+def disk_usage(path):
+    return sum(file.stat().st_size for file in Path(path).rglob('*') if file.is_file())
+
+
+def dedup(args, media, service_request, client):
+    rng = random.Random(2)
+    factory = APIRequestFactory()
+    id_proofs = [rng.randbytes(args.doc_kb * 1024) for _ in range(args.citizens)]
+    for label in ('one-shot multipart', 'chunked'):
+        before = disk_usage(media)
+        uploads = 0
+        for citizen in range(args.citizens):
+            for _ in range(args.requests_each):
+                for name, data in (('id_proof.pdf', id_proofs[citizen]), ('photo.jpg', rng.randbytes(args.doc_kb * 256))):
+                    uploads += 1
+                    if label == 'chunked':
+                        upload_id = client.post('/api/v1/uploads/sessions/', {
+                            'filename': name, 'content_type': 'application/pdf', 'size': len(data),
+                        }, format='json').data['upload_id']
+                        for index in range(0, len(data), args.chunk_mb * MB):
+                            client.put(f'/api/v1/uploads/sessions/{upload_id}/chunks/{index // (args.chunk_mb * MB)}/',
+                                       data[index:index + args.chunk_mb * MB], content_type='application/octet-stream')
+                        client.post(f'/api/v1/uploads/sessions/{upload_id}/complete/')
+                        client.post(f'/api/v1/service/documents/{service_request.request_id}/',
+                                    {'upload_id': upload_id, 'document_type': 'ID Proof'}, format='json')
+                    else:
+                        request = factory.post('/bench/one-shot/', {
+                            'service_request': service_request.pk, 'document_type': 'ID Proof',
+                            'file_path': SimpleUploadedFile(name, data),
+                        }, format='multipart')
+                        force_authenticate(request, service_request.user)
+                        OneShotDocumentView.as_view()(request)
+                        request.close()
+        used = disk_usage(media) - before
+        print(f"  {label:<20} {uploads} uploads, {used / MB:,.1f} MB on disk"
+              + (f", {StoredBlob.objects.count()} blobs" if label == 'chunked' else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--uploads', type=int, default=4)
+    parser.add_argument('--file-mb', type=float, default=12)
+    parser.add_argument('--bandwidth-mb', type=float, default=4)
+    parser.add_argument('--mtbf-mb', type=float, default=8)
+    parser.add_argument('--chunk-mb', type=int, default=1)
+    parser.add_argument('--max-attempts', type=int, default=20)
+    parser.add_argument('--citizens', type=int, default=40)
+    parser.add_argument('--requests-each', type=int, default=4)
+    parser.add_argument('--doc-kb', type=int, default=800)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    # Every chunk cut by a drop is a 400; do not log each one
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    media = Path(tempfile.mkdtemp(prefix='suvidha-bench-media-'))
+    try:
+        with benchmark_database(), override_settings(
+            MEDIA_ROOT=media, UPLOAD_PARTIAL_DIR=media / 'partial', UPLOAD_CHUNK_SIZE=args.chunk_mb * MB,
+            UPLOAD_MAX_SIZE=1024 * MB, DATA_UPLOAD_MAX_MEMORY_SIZE=None,
+        ):
+            # One citizen opens hundreds of sessions here, far beyond the daily 'uploads' rate
+            CreateUploadSessionView.throttle_classes = []
+            user = CustomUser.objects.create(username='citizen', phone='9000000000')
+            service_request = ServiceRequest.objects.create(request_id='SR1', user=user, service_type='Electricity',
+                                                            request_type='New Connection')
+            client = APIClient()
+            client.force_authenticate(user)
+            flaky_link(args, user, client, service_request)
+
+            print(f"\n{args.citizens} citizens x {args.requests_each} requests, each with the citizen's "
+                  f"{args.doc_kb} KB ID proof and a new {args.doc_kb // 4} KB photo")
+            dedup(args, media, service_request, client)
+
+            data = random.Random(3).randbytes(args.chunk_mb * MB)
+            upload_id = client.post('/api/v1/uploads/sessions/', {
+                'filename': 'big.pdf', 'content_type': 'application/pdf', 'size': len(data) * args.iterations,
+            }, format='json').data['upload_id']
+            stats = measure(lambda i: client.put(f'/api/v1/uploads/sessions/{upload_id}/chunks/{i}/', data,
+                                                 content_type='application/octet-stream'), args.iterations)
+            print()
+            print_report(f"chunk PUT ({args.chunk_mb} MB, fast link)", stats)
+            print(f"  {stats['ops_per_sec'] * args.chunk_mb:,.0f} MB/s")
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Fake upstream billing system for load tests of apps.billing.upstream.
+
+    python scripts/fake_bill_upstream.py --port 8900 --latency-ms 300 --failure-rate 0.05
+    BILL_UPSTREAM_URL=http://127.0.0.1:8900 python manage.py runserver
+
+Serves GET /bills/<consumer_number> with a few deterministic bills per
+consumer, after `latency_ms` (+ up to `jitter_ms`) of delay. A fraction
+`failure_rate` of requests answer HTTP 503; consumers starting with
+"NONE" get a 404. Standard library only.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+def make_bills(consumer_number, count):
+    first = date.today().replace(day=1)
+    bills = []
+    for n in range(count):
+        bill_date = (first - timedelta(days=31 * n)).replace(day=1)
+        units = 100 + (sum(map(ord, consumer_number)) + n * 37) % 400
+        bills.append({
+            'bill_id': f"UP-{consumer_number}-{bill_date:%Y%m}",
+            'account_type': 'ELECTRICITY',
+            'consumer_number': consumer_number,
+            'bill_date': bill_date.isoformat(),
+            'due_date': (bill_date + timedelta(days=15)).isoformat(),
+            'amount': f"{units * 6.5 + 120:.2f}",
+            'line_items': [
+                {'description': 'Energy charge', 'amount': f"{units * 6.5:.2f}", 'quantity': units},
+                {'description': 'Fixed charge', 'amount': '120.00', 'quantity': 1},
+            ],
+        })
+    return bills
+
+
+class FakeUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=100, jitter_ms=0, failure_rate=0.0, bills_per_consumer=3):
+        super().__init__(address, Handler)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.failure_rate = failure_rate
+        self.bills_per_consumer = bills_per_consumer
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        parts = [unquote(part) for part in self.path.strip('/').split('/')]
+        if len(parts) != 2 or parts[0] != 'bills':
+            return self._reply(404, {'detail': 'not found'})
+        if random.random() < server.failure_rate:
+            return self._reply(503, {'detail': 'injected failure'})
+        if parts[1].startswith('NONE'):
+            return self._reply(404, {'detail': 'unknown consumer'})
+        self._reply(200, {'bills': make_bills(parts[1], server.bills_per_consumer)})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(port=0, **options):
+    """Starts a fake upstream on a daemon thread and returns the server."""
+    server = FakeUpstream(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=int, default=100)
+    parser.add_argument('--jitter-ms', type=int, default=0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--bills', type=int, default=3, help='bills per consumer')
+    args = parser.parse_args()
+
+    server = FakeUpstream(('127.0.0.1', args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          failure_rate=args.failure_rate, bills_per_consumer=args.bills)
+    print(f"Fake bill upstream on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+A small process-wide thread pool for fire-and-forget work that should not
+block the request thread (SMS delivery, audit writes, ...).
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+def get_executor():
+    """Returns the shared executor, recreating it after a fork (gunicorn preload)."""
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_THREAD_POOL_SIZE', 8),
+                thread_name_prefix='suvidha-bg',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(fn, args, kwargs):
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(fn, '__name__', fn))
+        raise
+    finally:
+        close_old_connections()
+
+
+def submit(fn, *args, **kwargs):
+    """Schedules `fn(*args, **kwargs)` on the shared pool and returns its Future."""
+    return get_executor().submit(_run, fn, args, kwargs)
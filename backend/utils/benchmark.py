@@ -0,0 +1,107 @@
+"""
+Helpers shared by the benchmark scripts in ``scripts/``.
+
+Benchmarks run against a throwaway test database so they never touch the
+configured development data.
+"""
+import os
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Creates a test database for the duration of the block and destroys it
+    afterwards. SQLite gets an on-disk file instead of the shared in-memory
+    database so that threaded benchmarks do not trip over table locks.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        fd, path = tempfile.mkstemp(prefix='suvidha-bench-', suffix='.sqlite3')
+        os.close(fd)
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+        teardown_test_environment()
+
+
+def summarize(timings, wall_time=None):
+    """Turns a list of per-operation durations (seconds) into a stats dict."""
+    timings = sorted(timings)
+    count = len(timings)
+    total = wall_time if wall_time is not None else sum(timings)
+
+    def pct(p):
+        return timings[min(count - 1, int(count * p))] * 1000 if count else 0.0
+
+    return {
+        'count': count,
+        'total_s': total,
+        'ops_per_sec': count / total if total else 0.0,
+        'mean_ms': statistics.fmean(timings) * 1000 if count else 0.0,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+    }
+
+
+def measure(fn, iterations):
+    """Calls `fn(i)` sequentially and returns its latency stats."""
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def run_concurrently(fn, threads, iterations):
+    """
+    Calls `fn(thread_index, i)` `iterations` times on each of `threads`
+    threads and returns latency stats with throughput over wall time.
+    Each thread closes its own DB connection when done.
+    """
+    from django.db import connection
+
+    timings = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        local = []
+        barrier.wait()
+        try:
+            for i in range(iterations):
+                start = time.perf_counter()
+                fn(index, i)
+                local.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+            with lock:
+                timings.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return summarize(timings, wall_time=time.perf_counter() - start)
+
+
+def print_report(label, stats):
+    print(
+        f"{label:<40} n={stats['count']:<8} {stats['ops_per_sec']:>12,.0f} ops/s  "
+        f"mean={stats['mean_ms']:.3f}ms  p50={stats['p50_ms']:.3f}ms  "
+        f"p95={stats['p95_ms']:.3f}ms  p99={stats['p99_ms']:.3f}ms"
+    )
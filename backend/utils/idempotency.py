@@ -0,0 +1,155 @@
+"""
+Idempotency-Key support for retried POST requests.
+
+A client that may retry (a kiosk on a flaky link) sends the same
+`Idempotency-Key` header with every attempt of one logical request. The
+first attempt claims the key with an atomic cache.add and runs the view;
+its response is stored for IDEMPOTENCY_TTL seconds and every later attempt
+gets that response back, marked `Idempotent-Replayed: true`, without the
+view running again. An attempt arriving while the first is still running
+waits for it (up to IDEMPOTENCY_WAIT seconds) instead of executing twice.
+
+Keys are scoped per view and per user. Reusing a key with a different body
+is rejected with 422. Responses with a 5xx status and exceptions (DRF
+validation errors included) release the claim, so the client's next retry
+runs the view again. Requests without the header are not affected.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import HitRatio
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+PENDING = 'pending'
+DONE = 'done'
+
+replay_stats = HitRatio('idempotency.replays')
+
+
+class IdempotencyStore:
+    """Claims and stored responses in the default cache, shared by every worker when it is Redis."""
+
+    key_prefix = 'idem'
+
+    def make_key(self, scope, key):
+        return f"{self.key_prefix}:{scope}:{key}"
+
+    def claim(self, key, fingerprint):
+        """Marks `key` in flight. Returns False if another request holds or has completed it."""
+        return cache.add(key, (PENDING, fingerprint, None), settings.IDEMPOTENCY_LOCK_TTL)
+
+    def get(self, key):
+        """(state, fingerprint, stored response) or None."""
+        return cache.get(key)
+
+    def complete(self, key, fingerprint, response):
+        cache.set(key, (DONE, fingerprint, response), settings.IDEMPOTENCY_TTL)
+
+    def release(self, key):
+        cache.delete(key)
+
+
+store = IdempotencyStore()
+
+
+def _fingerprint(request):
+    """
+    SHA-256 of the request body. A body over DATA_UPLOAD_MAX_MEMORY_SIZE
+    (a multipart upload) cannot be read whole, so its parsed fields and
+    files are hashed instead.
+    """
+    try:
+        return hashlib.sha256(request.body).hexdigest()
+    except RequestDataTooBig:
+        pass
+    digest = hashlib.sha256()
+    data = request.data
+    if not hasattr(data, 'lists'):
+        digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+    for name, values in sorted(data.lists()):
+        digest.update(name.encode() + b'\0')
+        for value in values:
+            if isinstance(value, UploadedFile):
+                for chunk in value.chunks():
+                    digest.update(chunk)
+                value.seek(0)
+            else:
+                digest.update(str(value).encode())
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _replay(stored):
+    data, status_code, headers = stored
+    response = Response(data, status=status_code, headers=headers)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _error(message, status_code):
+    return Response({'success': False, 'message': message}, status=status_code)
+
+
+class IdempotencyMixin:
+    """
+    Makes a view's POST idempotent under the Idempotency-Key header. Put it
+    before the DRF view class; `idempotency_scope` defaults to the view name.
+    """
+
+    idempotency_scope = None
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", status.HTTP_400_BAD_REQUEST)
+
+        scope = self.idempotency_scope or type(self).__name__
+        cache_key = store.make_key(f"{scope}:{request.user.pk}", key)
+        try:
+            fingerprint = _fingerprint(request)
+        except RequestDataTooBig:
+            # A form field alone is over the limit: nothing the view could accept either
+            return _error("Request body is too large", status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+
+        while not store.claim(cache_key, fingerprint):
+            entry = store.get(cache_key)
+            if entry is None:
+                # Released or expired between our claim and read: try to claim again
+                continue
+            state, stored_fingerprint, stored = entry
+            if stored_fingerprint != fingerprint:
+                return _error(f"{HEADER} was already used with a different request body",
+                              status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if state == DONE:
+                replay_stats.hit()
+                return _replay(stored)
+            if time.monotonic() >= deadline:
+                return _error("A request with this Idempotency-Key is still in progress", status.HTTP_409_CONFLICT)
+            time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+        replay_stats.miss()
+        try:
+            response = super().post(request, *args, **kwargs)
+        except BaseException:
+            store.release(cache_key)
+            raise
+        if response.status_code >= 500:
+            store.release(cache_key)
+        else:
+            headers = {name: value for name, value in response.items() if name != 'Content-Type'}
+            store.complete(cache_key, fingerprint, (response.data, response.status_code, headers))
+        return response
@@ -0,0 +1,142 @@
+"""
+Time-ordered business IDs (CMP-, SR-, PAY-, REC-, ...).
+
+Snowflake-style 63-bit integers: milliseconds since ID_EPOCH (41 bits, ~69
+years), a worker id (10 bits) and a per-millisecond sequence (12 bits),
+written as 13 Crockford base32 characters so that string order is creation
+order, e.g. PAY-0ASZ3V8J40001. New rows therefore append to the right edge
+of the unique indexes instead of landing on random leaf pages, and two
+processes can only mint the same id if they share a worker id.
+
+The worker id comes from ID_WORKER_ID when set (one per process: give each
+gunicorn worker / Celery child its own), otherwise it is leased from the
+shared cache with cache.add() and renewed while the process keeps minting.
+A fork gets a lease of its own. Within a process a lock serialises minting;
+when the clock goes backwards or 4096 ids are taken within one millisecond
+the generator keeps counting from its last timestamp instead of waiting, so
+ids stay unique and increasing.
+"""
+import os
+import secrets
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+TIMESTAMP_BITS = 41
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'  # Crockford base32
+ENCODED_LENGTH = 13
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+
+
+def encode(value):
+    """Fixed-width base32 of a non-negative id, so that string order equals numeric order."""
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def decode(text):
+    value = 0
+    for char in text.upper():
+        value = value * 32 + _DECODE[char]
+    return value
+
+
+class WorkerIdUnavailable(RuntimeError):
+    pass
+
+
+class IdGenerator:
+    def __init__(self, worker_id=None, epoch_ms=None, clock=None):
+        self.fixed_worker_id = worker_id
+        self.epoch_ms = epoch_ms
+        self._clock = clock or (lambda: time.time_ns() // 1_000_000)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._worker_id = None
+        self._lease_token = None
+        self._lease_renewed = 0.0
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _lease(self):
+        """Claims a free worker id in the shared cache, starting from a random slot."""
+        self._lease_token = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        start = secrets.randbelow(MAX_WORKER + 1)
+        for offset in range(MAX_WORKER + 1):
+            worker_id = (start + offset) & MAX_WORKER
+            if cache.add(f"id-worker:{worker_id}", self._lease_token, settings.ID_WORKER_LEASE_TTL):
+                return worker_id
+        raise WorkerIdUnavailable(f"All {MAX_WORKER + 1} worker ids are leased")
+
+    def _renew(self):
+        key = f"id-worker:{self._worker_id}"
+        if cache.get(key) == self._lease_token:
+            cache.touch(key, settings.ID_WORKER_LEASE_TTL)
+            return self._worker_id
+        # Expired while idle and possibly taken by another process
+        return self._lease()
+
+    def _current_worker(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._worker_id = None
+        fixed = self.fixed_worker_id if self.fixed_worker_id is not None else settings.ID_WORKER_ID
+        if fixed is not None:
+            if not 0 <= fixed <= MAX_WORKER:
+                raise ValueError(f"ID_WORKER_ID must be between 0 and {MAX_WORKER}")
+            return fixed
+        now = time.monotonic()
+        if self._worker_id is None:
+            self._worker_id = self._lease()
+            self._lease_renewed = now
+        elif now - self._lease_renewed > settings.ID_WORKER_LEASE_TTL / 2:
+            self._worker_id = self._renew()
+            self._lease_renewed = now
+        return self._worker_id
+
+    def _epoch(self):
+        if self.epoch_ms is None:
+            self.epoch_ms = int(datetime.fromisoformat(settings.ID_EPOCH).replace(tzinfo=timezone.utc).timestamp() * 1000)
+        return self.epoch_ms
+
+    def next_id(self):
+        with self._lock:
+            worker_id = self._current_worker()
+            now = self._clock() - self._epoch()
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                self._last_ms, self._sequence = self._last_ms + 1, 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (worker_id << SEQUENCE_BITS) | self._sequence
+
+    def new_id(self, prefix):
+        return f"{prefix}-{encode(self.next_id())}"
+
+    def parse(self, business_id):
+        """(creation time, worker id, sequence) of an id minted by this scheme."""
+        value = decode(business_id.rpartition('-')[2])
+        ms = (value >> (WORKER_BITS + SEQUENCE_BITS)) + self._epoch()
+        worker_id = (value >> SEQUENCE_BITS) & MAX_WORKER
+        return datetime.fromtimestamp(ms / 1000, tz=timezone.utc), worker_id, value & MAX_SEQUENCE
+
+
+generator = IdGenerator()
+
+
+def new_id(prefix):
+    """A new unique, time-ordered business id such as "CMP-0ASZ3V8J40001"."""
+    return generator.new_id(prefix)
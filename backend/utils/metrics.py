@@ -0,0 +1,74 @@
+"""
+In-process counters for cache hit ratios and latencies.
+
+Counters are per worker process; every counter registers itself by name so
+the admin dashboard can list them (see /api/v1/admin/dashboard/cache-stats/).
+"""
+import threading
+from collections import deque
+
+_registry = {}
+
+
+def get_metrics():
+    """Returns a snapshot of every registered counter, keyed by name."""
+    return {name: metric.snapshot() for name, metric in sorted(_registry.items())}
+
+
+class HitRatio:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _registry[name] = self
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+            }
+
+
+class LatencyRecorder:
+    """Keeps the most recent `window` samples (seconds) and reports percentiles in ms."""
+
+    def __init__(self, name, window=2048):
+        self.name = name
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        _registry[name] = self
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'count': self.count}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3)
+
+        return {
+            'count': self.count,
+            'avg_ms': round(sum(samples) / len(samples) * 1000, 3),
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+        }
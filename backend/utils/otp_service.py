@@ -3,34 +3,53 @@ from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
 from apps.user_management.models import OTPVerification
+from apps.authentication.otp_store import get_otp_store, audit_issue, audit_verify
+from apps.notifications.sms import send_sms
 
 class OTPService:
     @staticmethod
     def generate_otp():
         return str(random.randint(100000, 999999))
 
+    @staticmethod
+    def store_key(user, otp_type):
+        return f"user:{user.pk}:{otp_type}"
+
     @staticmethod
     def create_otp(user, otp_type=OTPVerification.OtpType.LOGIN):
         otp_code = OTPService.generate_otp()
-        expires_at = timezone.now() + timedelta(minutes=5) # 5 min expiry
-        
-        # Invalidate previous OTPs
-        OTPVerification.objects.filter(user=user, is_verified=False).delete()
+        expires_at = timezone.now() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
         
-        otp_obj = OTPVerification.objects.create(
-            user=user,
-            otp_code=otp_code,
-            otp_type=otp_type,
-            expires_at=expires_at
-        )
+        store = get_otp_store()
+        if store is not None:
+            # Replaces any previous live code for this user and type
+            store.issue(OTPService.store_key(user, otp_type), otp_code, settings.OTP_EXPIRY_MINUTES * 60)
+            audit_issue(OTPVerification, user=user, otp_code=otp_code, otp_type=otp_type, expires_at=expires_at)
+        else:
+            # Invalidate previous OTPs
+            OTPVerification.objects.filter(user=user, is_verified=False).delete()
+            
+            OTPVerification.objects.create(
+                user=user,
+                otp_code=otp_code,
+                otp_type=otp_type,
+                expires_at=expires_at
+            )
         
-        # Mock SMS sending
+        # Send SMS
         OTPService.send_sms(user.phone, otp_code)
         
-        return otp_obj.otp_code
+        return otp_code
 
     @staticmethod
     def verify_otp(user, otp_code, otp_type=OTPVerification.OtpType.LOGIN):
+        store = get_otp_store()
+        if store is not None:
+            if not store.consume(OTPService.store_key(user, otp_type), otp_code):
+                return False
+            audit_verify(OTPVerification, user=user, otp_code=otp_code, otp_type=otp_type)
+            return True
+
         try:
             otp_record = OTPVerification.objects.get(
                 user=user,
@@ -50,8 +69,5 @@ class OTPService:
 
     @staticmethod
     def send_sms(phone, otp):
-        # Integration point for SMS Gateway
-        print(f"==========================================")
-        print(f"SENDING SMS to {phone}: Your OTP is {otp}")
-        print(f"==========================================")
-        return True
+        # Queued on the shared SMS dispatcher; returns once enqueued
+        return send_sms(phone, f"Your OTP is {otp}. Expires in {settings.OTP_EXPIRY_MINUTES} minutes.")
@@ -0,0 +1,12 @@
+import redis
+from django.conf import settings
+
+_pool = None
+
+
+def get_redis():
+    """Returns a Redis client backed by a process-wide connection pool."""
+    global _pool
+    if _pool is None:
+        _pool = redis.ConnectionPool.from_url(settings.REDIS_URL)
+    return redis.Redis(connection_pool=_pool)
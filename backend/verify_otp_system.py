@@ -12,6 +12,7 @@ django.setup()
 
 from rest_framework.test import APIClient
 from apps.authentication.models import PhoneOTP
+from apps.authentication.ratelimit import get_rate_limiter
 from django.utils import timezone
 
 client = APIClient()
@@ -30,6 +31,7 @@ def test_otp_system():
 
     # Clear OLD OTPs for this phone to start fresh
     PhoneOTP.objects.filter(phone=phone).delete()
+    get_rate_limiter().reset(phone)
 
     # 1. Send OTP (Attempt 1)
     print("\n1. Requesting OTP (1st attempt)...")